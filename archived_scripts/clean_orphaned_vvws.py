@@ -9,6 +9,7 @@ import json
 from pathlib import Path
 import time
 from dataclasses import dataclass
+from clients.BqClient import BqClient
 
 # Helper dataclass (struct) for the non-bq method (see main)
 # This allows usage of orphaned data later to not care which method we used
@@ -74,18 +75,13 @@ def get_all_clients(ignore_clients_string):
         return client_list
 
 # Fetch all versioned views for the specified client, optionally look only in the specified dataset(s)
-def get_all_vvws(client, datasets=[]):
+# One catalog query rather than list_datasets + list_tables per dataset
+def get_all_vvws(client_name, datasets=[]):
+    catalog = BqClient(client_name).get_catalog(datasets, include_definitions=False)
     versioned_views = list()
-
-    # If no datasets were specified, get all of them
-    if len(datasets) == 0:
-        datasets = client.list_datasets(max_results=100)
-
-    # For each dataset, find all views where the name starts with vvw, put them in a list
-    for dataset in datasets:
-        tables = client.list_tables(dataset.dataset_id)
-        for view in filter(lambda c: c.table_type == "VIEW" and c.table_id[0:3] == "vvw", tables):
-            versioned_views.append(view)
+    for full_name in catalog.get_names([catalog.ObjectType.VIEW], prefix="vvw"):
+        parts = full_name.split('.')
+        versioned_views.append(bq_table_lite(dataset_id = parts[0], table_id = parts[1]))
 
     return versioned_views
 
@@ -222,7 +218,7 @@ def process_client_dependencies(debug, client):
     print(f"Analyzing {client}...")
     bq_client = prepare_bq_client(client)
 
-    versioned_views = get_all_vvws(bq_client)
+    versioned_views = get_all_vvws(client)
     if debug:
         print_debug(f"vvws fetched", time.time() - t)
 
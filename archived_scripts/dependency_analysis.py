@@ -41,35 +41,27 @@ def prepare_bq_transfer_client(client_name):
     parent = client.common_project_path(project_id)
     return client, parent
 
-def get_all_vvws(client, datasets=[]):
+def get_all_vvws(client_name, datasets=[]):
+    # One catalog query instead of list_datasets + list_tables per dataset
+    catalog = BqClient(client_name).get_catalog(datasets, include_definitions=False)
     versioned_views = list()
-
-    if len(datasets) == 0:
-        datasets = client.list_datasets(max_results=100)
-
-    for dataset in datasets:
-        # dataset = client.dataset(dataset_name)
-        tables = client.list_tables(dataset.dataset_id)
-        for view in filter(lambda c: c.table_type == "VIEW" and c.table_id[0:3] == "vvw", tables):
-            versioned_views.append(view)
+    for full_name in catalog.get_names([catalog.ObjectType.VIEW], prefix="vvw"):
+        parts = full_name.split('.')
+        versioned_views.append(view_info(parts[0], parts[1]))
 
     return versioned_views
 
-# This method is more "pythonic" than the SQL version, but also much much slower (~5-6x)
-def get_dependent_views(dependencies, project_id, bq_client, versioned_views):
-    datasets = bq_client.list_datasets(max_results=100)
-
-    for dataset in datasets:
-        tables = bq_client.list_tables(dataset.dataset_id)
-        for view in filter(lambda c: c.table_type == "VIEW", tables):
-            full_view = bq_client.get_table(f"{project_id}.{view.dataset_id}.{view.table_id}")
-            vvw_matches = filter(lambda vvw: f"{vvw.dataset_id}.{vvw.table_id}" in full_view.view_query, versioned_views)
-            for vvw_match in vvw_matches:
-                key = f"{vvw_match.dataset_id}.{vvw_match.table_id}"
-                if key in dependencies:
-                    dependencies[key].append(f"{view.dataset_id}.{view.table_id}")
-                else:
-                    dependencies[key] = [f"{view.dataset_id}.{view.table_id}"]
+# Uses the catalog's view definitions rather than list_tables + get_table per view
+def get_dependent_views(dependencies, bq_client, versioned_views):
+    catalog = bq_client.get_catalog()
+    for full_name, view_query in catalog.get_definitions([catalog.ObjectType.VIEW]).items():
+        vvw_matches = filter(lambda vvw: f"{vvw.dataset_id}.{vvw.table_id}" in view_query, versioned_views)
+        for vvw_match in vvw_matches:
+            key = f"{vvw_match.dataset_id}.{vvw_match.table_id}"
+            if key in dependencies:
+                dependencies[key].append(full_name)
+            else:
+                dependencies[key] = [full_name]
 
 def get_dependent_views_sql(dependencies, bq_client, versioned_views):
     all_views_query = """
@@ -0,0 +1,39 @@
+# Compares commit.stats (numstat line counting) with CommitFileParser's name-status diff on recent merge commits
+#   python -m benchmarks.commit_parsing [-path <repo>] [-n <merge commits>]
+
+import argparse
+import time
+from git import Repo
+from helpers.StaticMethods import get_mono_path, print_info
+from parsers.CommitFileParser import CommitFileParser
+
+def stats_scan(commit) -> int:
+    # What _parse_changed_files previously did, minus the classification
+    return len([file for file in commit.stats.files if file[-4:] == '.sql'])
+
+def name_status_scan(commit) -> int:
+    # Bypass __init__, which would also resolve clients
+    parser = CommitFileParser.__new__(CommitFileParser)
+    parser._commit = commit
+    return len(parser.get_name_status())
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-path', default=get_mono_path(), help='(Optional) Repo to read, defaults to the mono repo')
+    parser.add_argument('-n', type=int, default=20, help='(Optional) Number of most recent merge commits to parse (default 20)')
+    args = parser.parse_args()
+
+    repo = Repo(args.path)
+    shas = [commit.hexsha for commit in repo.iter_commits(merges = True, max_count = args.n)]
+    print_info(f"Parsing {len(shas)} merge commits")
+
+    for name, scan in [('commit.stats', stats_scan), ('name-status', name_status_scan)]:
+        file_count = 0
+        started_at = time.perf_counter()
+        for sha in shas:
+            # A fresh Commit each time, so nothing is reused between approaches
+            file_count += scan(repo.commit(sha))
+        print_info(f"{name}: {(time.perf_counter() - started_at) * 1000:.1f} ms ({file_count} files)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+# Compares testing every pattern with `in` against MultiPatternMatcher, on generated versioned view names and definitions
+#   python -m benchmarks.multi_pattern_matching [-p <patterns>] [-d <definitions>]
+
+import argparse
+import random
+import time
+from helpers.StaticMethods import print_info
+from parsers.MultiPatternMatcher import MultiPatternMatcher
+
+def generate(pattern_count: int, definition_count: int) -> tuple:
+    random.seed(3879)
+    patterns = [f"{random.choice(['ext', 'core', 'looker'])}.vvw_{''.join(random.choices('abcdefghij', k = 8))}_{random.randint(0, 3)}"
+        for _ in range(pattern_count)]
+    words = ['select', 'from', 'join', '`soundcommerce-client-x.ext.vw_orders`', 'o.order_id', 'sum(amount)', 'where', 'group by', 'coalesce(x, 0)']
+    definitions = [' '.join(random.choices(words, k = 500)) + f" join `soundcommerce-client-x.{random.choice(patterns)}`"
+        for _ in range(definition_count)]
+
+    return patterns, definitions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-p', type=int, default=200, help='(Optional) Number of patterns, i.e. versioned views (default 200)')
+    parser.add_argument('-d', type=int, default=2000, help='(Optional) Number of definitions to scan (default 2000)')
+    args = parser.parse_args()
+
+    patterns, definitions = generate(args.p, args.d)
+    print_info(f"{len(patterns)} patterns, {len(definitions)} definitions ({sum([len(x) for x in definitions]) / 1024 / 1024:.1f} MB)")
+
+    started_at = time.perf_counter()
+    naive = [set([pattern for pattern in patterns if pattern in definition]) for definition in definitions]
+    print_info(f"`in` per pattern: {(time.perf_counter() - started_at) * 1000:.1f} ms")
+
+    started_at = time.perf_counter()
+    matcher = MultiPatternMatcher(patterns)
+    compiled_at = time.perf_counter()
+    matched = [matcher.find_all(definition) for definition in definitions]
+    print_info(f"MultiPatternMatcher: {(time.perf_counter() - compiled_at) * 1000:.1f} ms (+{(compiled_at - started_at) * 1000:.1f} ms to compile)")
+
+    if naive != matched:
+        raise Exception("Results differ")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# Compares the original split(' ') reference scan with SqlLexer over every .sql file in the bq folder
+#   python -m benchmarks.reference_extraction [-path <bq folder>] [-n <repeats>]
+
+import argparse
+import os
+import re
+import time
+from helpers.StaticMethods import get_bq_path, print_info, print_warn
+from parsers.SqlLexer import SqlLexer
+
+def split_scan(definition: str, dataset: str) -> list[str]:
+    # The approach previously used by SqlObjectReferences._get_referenced_objects, minus the file read
+    references = list()
+    words = definition.split(' ')
+    for ref in filter(lambda w: '${project}' in w and 'temp.' not in w, words):
+        reference = ref.replace('${dataset}', dataset).replace('`','').replace('${color}', 'blue').replace('\n', '')
+        references.append(re.sub(r'([a-zA-Z_0-9\.\-\*\$\{\}]+).*', r'\1', reference))
+
+    return references
+
+def lexer_scan(definition: str, dataset: str) -> list[str]:
+    return list(SqlLexer(definition).references('${project}', {'${dataset}': dataset, '${color}': 'blue'}))
+
+def load_definitions(bq_path: str) -> list[tuple]:
+    definitions = list()
+    for root, _, file_names in os.walk(bq_path):
+        for file_name in file_names:
+            if file_name[-4:] != '.sql':
+                continue
+            # The dataset folder is always two above the file
+            dataset = os.path.basename(os.path.dirname(root))
+            with open(os.path.join(root, file_name), 'r') as f:
+                definitions.append((definition := f.read(), dataset))
+
+    return definitions
+
+def time_scan(scan, definitions: list[tuple], repeats: int) -> tuple:
+    started_at = time.perf_counter()
+    for _ in range(repeats):
+        results = [set(scan(definition, dataset)) for definition, dataset in definitions]
+    return (time.perf_counter() - started_at) / repeats, results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-path', default=get_bq_path(), help='(Optional) bq folder to scan, defaults to the mono repo')
+    parser.add_argument('-n', type=int, default=5, help='(Optional) Number of repeats to average over (default 5)')
+    args = parser.parse_args()
+
+    definitions = load_definitions(args.path)
+    total_bytes = sum([len(definition) for definition, _ in definitions])
+    print_info(f"Scanning {len(definitions)} files ({total_bytes / 1024 / 1024:.1f} MB), {args.n} repeats")
+
+    split_seconds, split_results = time_scan(split_scan, definitions, args.n)
+    lexer_seconds, lexer_results = time_scan(lexer_scan, definitions, args.n)
+    print_info(f"split(' ') scan: {split_seconds * 1000:.1f} ms")
+    print_info(f"SqlLexer scan:   {lexer_seconds * 1000:.1f} ms")
+
+    differing = sum([1 for split, lexed in zip(split_results, lexer_results) if split != lexed])
+    if differing > 0:
+        print_warn(f"{differing} files produced different references (e.g. newline separated or commented out references)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# Compares the archived serial str.replace migration against ReferenceMigrator, on a generated bq folder
+#   python -m benchmarks.reference_migration [-f <files>] [-m <moved objects>] [-w <workers>]
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from helpers.StaticMethods import print_info
+from modules.ReferenceMigrator import ReferenceMigrator
+
+def generate(bq_path: str, file_count: int, moved_count: int) -> dict[str, str]:
+    random.seed(3879)
+    names = [f"vw_{''.join(random.choices('abcdefghij', k = 8))}" for _ in range(moved_count * 10)]
+    words = ['select', 'from', 'join', 'o.order_id', 'sum(amount)', 'where', 'group by', 'coalesce(x, 0)']
+    for i in range(file_count):
+        folder = f"{bq_path}/client_{i % 20}/{random.choice(['ext', 'core'])}/view"
+        os.makedirs(folder, exist_ok = True)
+        references = ' '.join([f"join `${{project}}.{random.choice(['ext', 'core'])}.{random.choice(names)}`" for _ in range(5)])
+        with open(f"{folder}/vw_{i}.sql", 'w') as f:
+            f.write(' '.join(random.choices(words, k = 300)) + ' ' + references)
+
+    return {f"ext.{name}": f"core.{name}" for name in names[:moved_count]}
+
+def migrate_serially(bq_path: str, mapping: dict[str, str]) -> int:
+    """The archived update_ext_references_to_core approach"""
+    updated = 0
+    for root, _, files in os.walk(bq_path):
+        for file in filter(lambda f: '.sql' in f, files):
+            with open(f"{root}/{file}", 'r') as read_file:
+                content = read_file.read()
+            original_content = content
+            for old_name, new_name in mapping.items():
+                if old_name in content:
+                    content = content.replace(old_name, new_name)
+            if content != original_content:
+                with open(f"{root}/{file}", 'w') as write_file:
+                    write_file.write(content)
+                updated += 1
+
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-f', type=int, default=5000, help='(Optional) Number of files (default 5000)')
+    parser.add_argument('-m', type=int, default=200, help='(Optional) Number of moved objects (default 200)')
+    parser.add_argument('-w', type=int, help='(Optional) Number of worker processes (default one per cpu)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        serial_path, migrator_path = f"{temp_dir}/serial", f"{temp_dir}/migrator"
+        mapping = generate(serial_path, args.f, args.m)
+        shutil.copytree(serial_path, migrator_path)
+
+        started_at = time.perf_counter()
+        updated = migrate_serially(serial_path, mapping)
+        print_info(f"Serial str.replace: {(time.perf_counter() - started_at) * 1000:.1f} ms, {updated} files updated")
+
+        started_at = time.perf_counter()
+        ReferenceMigrator(mapping, migrator_path, args.w).execute(is_dry_run = False)
+        print_info(f"ReferenceMigrator: {(time.perf_counter() - started_at) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
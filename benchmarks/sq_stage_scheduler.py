@@ -0,0 +1,119 @@
+# Runs SqStageScheduler against an in-process event bus and config table, measuring events handled per second and the
+#   number of BQ/transfer API calls, compared with the archived invoker (config query, UPDATE and re-list per event)
+#   python -m benchmarks.sq_stage_scheduler [-s <stages>] [-q <queries per stage>] [-c <cycles>] [-l <call latency ms>]
+
+import argparse
+import base64
+import contextlib
+import io
+import json
+import random
+import time
+from collections import deque
+from helpers.StaticMethods import print_info
+from modules.SqStageScheduler import SqStageScheduler
+
+class FakeEnvironment:
+    """Config table, transfer service and Pub/Sub topic in memory, started runs publish their completion to the bus"""
+    def __init__(self, stages: int, queries: int, latency: float):
+        self.latency = latency
+        self.calls = {'config queries': 0, 'writes': 0, 'transfer calls': 0}
+        self.table = {
+            f"projects/p/locations/us/transferConfigs/s{stage}_q{query}": [stage, 'success']
+            for stage in range(2, stages + 2) for query in range(queries)
+        }
+        self.bus = deque()
+        self.run_count = 0
+
+    def _call(self, kind: str) -> None:
+        self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def publish(self, run: dict) -> None:
+        self.bus.append({'data': base64.b64encode(json.dumps(run).encode('utf-8'))})
+
+    def load_config(self) -> list[tuple]:
+        self._call('config queries')
+        return [(name, stage, status) for name, (stage, status) in self.table.items()]
+
+    def merge_updates(self, updates: list[tuple]) -> None:
+        self._call('writes')
+        for name, status, _, _ in updates:
+            self.table[name][1] = status
+
+    def start_runs(self, names: list[str]) -> dict:
+        self._call('transfer calls')
+        # Runs finish in any order
+        for name in random.sample(names, len(names)):
+            self.run_count += 1
+            self.publish({'name': f"{name}/runs/{self.run_count}", 'state': 'SUCCEEDED', 'updateTime': '2024-01-01T00:00:00Z'})
+        return {name: '2024-01-01T00:00:00Z' for name in names}
+
+def run_scheduler(environment: FakeEnvironment, cycles: int, batch_updates = False) -> int:
+    scheduler = SqStageScheduler(environment.load_config, environment.merge_updates, environment.start_runs, batch_updates = batch_updates)
+    handled = 0
+    for _ in range(cycles):
+        environment.publish({'name': 'projects/p/upstream_job'})
+        while environment.bus:
+            scheduler.execute(environment.bus.popleft())
+            handled += 1
+
+    return handled
+
+def run_archived(environment: FakeEnvironment, cycles: int) -> int:
+    """Same flow as archived_scripts/invoker_cloud_function before it used SqStageScheduler"""
+    handled = 0
+    for _ in range(cycles):
+        environment.publish({'name': 'projects/p/upstream_job'})
+        while environment.bus:
+            run = json.loads(base64.b64decode(environment.bus.popleft()['data']).decode('utf-8'))
+            handled += 1
+            sq_config = environment.load_config()
+            if 'transferConfigs' not in run['name']:
+                stage = 1
+            else:
+                name = run['name'].split('/runs/')[0]
+                stage = [x for x in sq_config if x[0] == name][0][1]
+                environment.merge_updates([(name, 'success', None, run['updateTime'])])
+                sq_config = [(x[0], x[1], 'success' if x[0] == name else x[2]) for x in sq_config]
+
+            remaining_same_stage = [x for x in sq_config if x[1] == stage and x[2] in ('pending', 'processing')]
+            if len(remaining_same_stage) > 0:
+                continue
+            next_stage = [x[0] for x in sq_config if x[1] == stage + 1]
+            if len(next_stage) > 0:
+                # Re-listed transfer configs
+                environment._call('transfer calls')
+                environment.merge_updates([(name, 'processing', None, None) for name in next_stage])
+                environment.start_runs(next_stage)
+
+    return handled
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-s', type=int, default=5, help='(Optional) Number of stages (default 5)')
+    parser.add_argument('-q', type=int, default=200, help='(Optional) Number of scheduled queries per stage (default 200)')
+    parser.add_argument('-c', type=int, default=5, help='(Optional) Number of cycles, each runs every stage once (default 5)')
+    parser.add_argument('-l', type=float, default=0, help='(Optional) Simulated latency of each BQ/transfer call in ms (default 0)')
+    args = parser.parse_args()
+
+    runs = [
+        ('Archived invoker', run_archived),
+        ('SqStageScheduler', run_scheduler),
+        ('SqStageScheduler (batch_updates)', lambda environment, cycles: run_scheduler(environment, cycles, batch_updates = True))
+    ]
+    for label, run in runs:
+        random.seed(3879)
+        environment = FakeEnvironment(args.s, args.q, args.l / 1000)
+        started_at = time.perf_counter()
+        # Stage transitions are printed, keep them out of the results
+        with contextlib.redirect_stdout(io.StringIO()):
+            handled = run(environment, args.c)
+        elapsed = time.perf_counter() - started_at
+
+        calls = ', '.join([f"{count} {kind}" for kind, count in environment.calls.items()])
+        print_info(f"{label}: {handled} events in {elapsed * 1000:.1f} ms ({handled / elapsed:,.0f} events/s), {calls}")
+
+if __name__ == "__main__":
+    main()
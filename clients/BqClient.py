@@ -1,7 +1,10 @@
 import re
+import time
 from google.cloud import bigquery
 from google.cloud import bigquery_v2
-from google.cloud.exceptions import NotFound
+from google.cloud.exceptions import Conflict, NotFound
+from domain.MetadataSnapshot import MetadataSnapshot
+from domain.ProjectCatalog import ProjectCatalog
 from domain.SqlObject import SqlObject
 from helpers.PrintColors import *
 from helpers.StaticMethods import *
@@ -12,12 +15,36 @@ class BqClient:
         MODIFIED = 1
         DELETED = 2
 
+    class DiffStatus(Enum):
+        # Does not exist in BQ
+        NEW = 1
+        # Exists in BQ with a different definition
+        CHANGED = 2
+        # Exists in BQ with an equivalent definition
+        UNCHANGED = 3
+
+    class RefreshMode(Enum):
+        # Re-pull all metadata and definitions
+        FULL = 1
+        # Only pull definitions for objects modified since the cached snapshot was taken
+        INCREMENTAL = 2
+
+    # Metadata snapshots younger than this (in seconds) are served from the local cache
+    DEFAULT_METADATA_TTL = 60 * 60
+
     """Helper class to wrap bigQuery client initialization and operations"""
-    def __init__(self, client_name, project_id = None, skip_instance = False):
+    def __init__(self, client_name, project_id = None, skip_instance = False, metadata_ttl = DEFAULT_METADATA_TTL, metadata_refresh = RefreshMode.FULL):
         if project_id is None:
             project_id = client_name if 'sandbox' in client_name else "soundcommerce-client-"+client_name
         self.project_id = project_id
         self.client_name = client_name
+        self.metadata_ttl = metadata_ttl
+        self.metadata_refresh = metadata_refresh
+        self._metadata = None
+        self._object_definitions = None
+        self._datasets = None
+        # True once this client has pulled metadata from BQ itself, rather than using a cached snapshot
+        self._metadata_refreshed = False
         self.instance = None
         if not skip_instance:
             self.instance = bigquery.Client(project=self.project_id)
@@ -26,67 +53,288 @@ class BqClient:
         if self.instance:
             self.instance._http.close()
 
-    all_tables_and_views_query = """
-        with data as (
-            SELECT concat(table_schema, '.', table_name) as full_name, table_schema
-            FROM region-us.INFORMATION_SCHEMA.VIEWS
+    # Rows are streamed into a ProjectCatalog a page at a time
+    CATALOG_PAGE_SIZE = 10000
 
-            union all
+    # queried_at is BQ's clock (not ours) so it can be used as an incremental refresh watermark
+    all_metadata_query = """
+        SELECT 'view' as object_type, concat(table_schema, '.', table_name) as full_name, view_definition as definition,
+            unix_millis(current_timestamp()) as queried_at
+        FROM region-us.INFORMATION_SCHEMA.VIEWS
+
+        union all
 
-            SELECT concat(table_schema, '.', table_name) as full_name, table_schema
-            FROM region-us.INFORMATION_SCHEMA.TABLES
-        )
-        -- unsure why but it seems we sometimes get duplicates in here
-        select distinct full_name from data
+        SELECT 'table' as object_type, concat(table_schema, '.', table_name) as full_name, cast(null as string) as definition,
+            unix_millis(current_timestamp()) as queried_at
+        FROM region-us.INFORMATION_SCHEMA.TABLES
+        where table_type != 'VIEW'
+
+        union all
+
+        SELECT routine_type as object_type, concat(routine_schema, '.', routine_name) as full_name, routine_definition as definition,
+            unix_millis(current_timestamp()) as queried_at
+        FROM region-us.INFORMATION_SCHEMA.ROUTINES
     """
 
-    def _fetch_object_definitions(self) -> dict[str, list]:
-        all_objects_query = """
+    def _fetch_metadata(self) -> MetadataSnapshot:
+        """
+            (None) -> MetadataSnapshot
+            Pulls views, tables and routines (with definitions) for the whole project in a single query.
+        """
+        snapshot = MetadataSnapshot(self.project_id)
+        for result in self.instance.query(self.all_metadata_query).result():
+            snapshot.watermark = result.queried_at
+            if result.object_type == 'view':
+                snapshot.add_view(result.full_name, result.definition)
+            elif result.object_type == 'table':
+                snapshot.add_table(result.full_name)
+            else:
+                snapshot.add_routine(result.full_name, result.object_type, result.definition)
+
+        return snapshot
+
+    def _build_modified_times_query(self) -> str:
+        """
+            (None) -> str
+            Builds a name-only query returning every object with its last modified time (epoch millis), no definitions.
+            INFORMATION_SCHEMA.TABLES only has creation_time, so last_modified_time comes from each dataset's __TABLES__.
+        """
+        # SCHEMATA rather than list_datasets so that we only get datasets in the same region as the rest of the query
+        datasets = self.instance.query("SELECT schema_name FROM region-us.INFORMATION_SCHEMA.SCHEMATA").result()
+        dataset_queries = list()
+        for dataset in datasets:
+            dataset_queries.append(
+                f"SELECT dataset_id, table_id, last_modified_time FROM `{self.project_id}.{dataset.schema_name}.__TABLES__`"
+            )
+        # Keeps the query valid for a project with no datasets
+        if len(dataset_queries) == 0:
+            dataset_queries.append("SELECT '' as dataset_id, '' as table_id, 0 as last_modified_time")
+
+        union_all = '\n            union all\n            '
+        return f"""
+            with modified as (
+                {union_all.join(dataset_queries)}
+            )
+            SELECT if(t.table_type = 'VIEW', 'view', 'table') as object_type, concat(t.table_schema, '.', t.table_name) as full_name,
+                coalesce(m.last_modified_time, unix_millis(t.creation_time)) as modified_at, unix_millis(current_timestamp()) as queried_at
+            FROM region-us.INFORMATION_SCHEMA.TABLES t
+            left join modified m on m.dataset_id = t.table_schema and m.table_id = t.table_name
+
+            union all
+
+            SELECT routine_type as object_type, concat(routine_schema, '.', routine_name) as full_name,
+                unix_millis(coalesce(last_altered, created)) as modified_at, unix_millis(current_timestamp()) as queried_at
+            FROM region-us.INFORMATION_SCHEMA.ROUTINES
+        """
+
+    def _fetch_changed_definitions(self, view_names: list[str], routine_names: list[str]):
+        """
+            (list[str], list[str]) -> RowIterator
+            Fetches definitions for only the provided views and routines.
+        """
+        quote_names = lambda names: ', '.join([f"'{name}'" for name in names]) if len(names) > 0 else "''"
+        query = f"""
             SELECT 'view' as object_type, concat(table_schema, '.', table_name) as full_name, view_definition as definition
             FROM region-us.INFORMATION_SCHEMA.VIEWS
+            where concat(table_schema, '.', table_name) in ({quote_names(view_names)})
 
             union all
 
             SELECT routine_type as object_type, concat(routine_schema, '.', routine_name) as full_name, routine_definition as definition
             FROM region-us.INFORMATION_SCHEMA.ROUTINES
-            where routine_type != 'PROCEDURE'
-        """
-        results = self.instance.query(all_objects_query).result()
-        object_definitions = dict[str, list()]
-        for result in results:
-            if result.object_type not in object_definitions:
-                object_definitions[result.object_type] = list()
-            
-            object_definitions[result.object_type].append(
+            where concat(routine_schema, '.', routine_name) in ({quote_names(routine_names)})
+        """
+        return self.instance.query(query).result()
+
+    def _refresh_metadata_incremental(self, snapshot: MetadataSnapshot) -> MetadataSnapshot:
+        """
+            (MetadataSnapshot) -> MetadataSnapshot
+            Brings an existing snapshot up to date, only pulling definitions for objects modified since its watermark.
+            Drops are detected by diffing names against the snapshot.
+        """
+        changed_views = list()
+        changed_routines = list()
+        remaining = snapshot.views_and_tables | snapshot.routines.keys()
+        watermark = snapshot.watermark
+
+        for result in self.instance.query(self._build_modified_times_query()).result():
+            snapshot.watermark = result.queried_at
+            remaining.discard(result.full_name)
+            object_type = result.object_type if result.object_type in ['view', 'table'] else 'routine'
+            if result.full_name in snapshot.views:
+                cached_type = 'view'
+            elif result.full_name in snapshot.tables:
+                cached_type = 'table'
+            elif result.full_name in snapshot.routines:
+                cached_type = 'routine'
+            else:
+                cached_type = None
+
+            # Replacing a view with a table (or the reverse) doesn't necessarily bump its modified time, so compare types too
+            # >= so that anything modified in the same millisecond as the last refresh is re-checked
+            if object_type == cached_type and result.modified_at is not None and result.modified_at < watermark:
+                continue
+
+            # Re-added under its current type below, never left behind in the collection for its old one
+            snapshot.remove(result.full_name)
+            if result.object_type == 'view':
+                changed_views.append(result.full_name)
+            elif result.object_type == 'table':
+                snapshot.add_table(result.full_name)
+            else:
+                changed_routines.append(result.full_name)
+
+        for dropped in remaining:
+            snapshot.remove(dropped)
+
+        if len(changed_views) + len(changed_routines) > 0:
+            for result in self._fetch_changed_definitions(changed_views, changed_routines):
+                if result.object_type == 'view':
+                    snapshot.add_view(result.full_name, result.definition)
+                else:
+                    snapshot.add_routine(result.full_name, result.object_type, result.definition)
+
+        snapshot.created_at = time.time()
+        return snapshot
+
+    def refresh_metadata(self, refresh_mode = None) -> MetadataSnapshot:
+        """
+            (optional RefreshMode) -> MetadataSnapshot
+            Re-fetches project metadata from BQ regardless of cache age and persists it.
+            Defaults to the client's metadata_refresh mode, incremental refreshes fall back to full when there is nothing to build on.
+        """
+        refresh_mode = self.metadata_refresh if refresh_mode is None else refresh_mode
+        snapshot = self._metadata if self._metadata is not None else MetadataSnapshot.load(self.project_id)
+
+        if refresh_mode == self.RefreshMode.INCREMENTAL and snapshot is not None and snapshot.watermark is not None:
+            self._metadata = self._refresh_metadata_incremental(snapshot)
+        else:
+            self._metadata = self._fetch_metadata()
+
+        self._metadata.save()
+        self._metadata_refreshed = True
+        self._object_definitions = None
+        return self._metadata
+
+    @property
+    def metadata(self) -> MetadataSnapshot:
+        """Project metadata, served from the local snapshot cache while it is younger than metadata_ttl"""
+        if self._metadata is None:
+            # An expired snapshot is still kept, an incremental refresh builds on it
+            self._metadata = MetadataSnapshot.load(self.project_id)
+            if self._metadata is None or self._metadata.is_expired(self.metadata_ttl):
+                return self.refresh_metadata()
+
+        return self._metadata
+
+    def _record_metadata_change(self, operation, sql_object: SqlObject) -> None:
+        """
+            (Operation, SqlObject) -> None
+            Keeps an already loaded metadata snapshot in line with changes this client has made.
+        """
+        if self._metadata is None:
+            return
+
+        full_name = f"{sql_object.dataset}.{sql_object.object_name}"
+        if sql_object.object_type in ['table', 'schema']:
+            # Tables are never dropped by this utility
+            if operation == self.Operation.MODIFIED:
+                self._metadata.add_table(full_name)
+        elif operation == self.Operation.DELETED:
+            self._metadata.remove(full_name)
+        elif sql_object.object_type == 'view':
+            self._metadata.add_view(full_name, sql_object.definition)
+        else:
+            definition = sql_object.definition
+            self._metadata.add_routine(full_name, sql_object.routine_type, definition)
+
+        self._object_definitions = None
+
+    def _fetch_object_definitions(self) -> dict[str, list]:
+        object_definitions = dict()
+        object_definitions['view'] = list()
+        for full_name, definition in self.metadata.views.items():
+            object_definitions['view'].append(
+                SqlObject(
+                    fully_qualified_name = f"`{self.project_id}.{full_name}`",
+                    definition = definition
+                )
+            )
+
+        for full_name, (routine_type, definition) in self.metadata.routines.items():
+            if routine_type == 'PROCEDURE':
+                continue
+            if routine_type not in object_definitions:
+                object_definitions[routine_type] = list()
+
+            object_definitions[routine_type].append(
                 SqlObject(
-                    fully_qualified_name = f"`{self.project_id}.{result.full_name}`",
-                    definition = result.definition
+                    fully_qualified_name = f"`{self.project_id}.{full_name}`",
+                    definition = definition
                 )
             )
 
         return object_definitions
 
     @property
-    def object_definitions(self) -> dict[str, str]:
+    def object_definitions(self) -> dict[str, list]:
         if self._object_definitions is None:
             self._object_definitions = self._fetch_object_definitions()
 
         return self._object_definitions
 
+    @property
+    def datasets(self) -> set[str]:
+        """All dataset ids in the project, listed once per client and kept up to date as datasets are created"""
+        if self._datasets is None:
+            self._datasets = set([dataset.dataset_id for dataset in self.instance.list_datasets()])
+
+        return self._datasets
+
+    def create_missing_datasets(self, datasets) -> list[str]:
+        """
+            (iterable<str>) -> list<str>
+            Creates any of the provided datasets which don't exist yet, returns those which were created.
+        """
+        missing = sorted(set(datasets) - self.datasets)
+        for dataset in missing:
+            # exists_ok as another process may have beaten us to it
+            self.instance.create_dataset(f"{self.project_id}.{dataset}", exists_ok = True)
+            self._datasets.add(dataset)
+
+        return missing
+
     def _create_dataset_if_not_exists(self, dataset: str) -> None:
-        fully_qualified_dataset = f"{self.project_id}.{dataset}"
-        try:
-            self.instance.get_dataset(bigquery.Dataset(fully_qualified_dataset))
-        except NotFound:
-            self.instance.create_dataset(fully_qualified_dataset)
+        if dataset not in self.datasets:
+            self.create_missing_datasets([dataset])
 
-    def _manage_view(self, operation, sql_object: SqlObject):
+    def _manage_view(self, operation, sql_object: SqlObject, diff_status: DiffStatus = None):
         to_modify = bigquery.Table(sql_object.fully_qualified_name)
-        to_modify.view_query = sql_object.definition
 
         if operation == self.Operation.MODIFIED:
+            # Only read for modifications, a deleted view's file no longer exists
+            to_modify.view_query = sql_object.definition
             self._create_dataset_if_not_exists(sql_object.dataset)
 
+            # If we already know the remote state we can skip the get_table round trip
+            if diff_status == self.DiffStatus.UNCHANGED:
+                return f"Skipping {sql_object.dataset}.{sql_object.object_name}, definition is already up to date."
+            elif diff_status == self.DiffStatus.CHANGED:
+                try:
+                    self.instance.update_table(table=to_modify, fields=["view_query"])
+                    return f"({sql_object.object_type}) {sql_object.dataset}.{sql_object.object_name} has been updated."
+                # Dropped since the definitions were fetched, fall through to the standard path
+                except NotFound:
+                    pass
+            elif diff_status == self.DiffStatus.NEW:
+                try:
+                    self.instance.create_table(table=to_modify)
+                    return f"({sql_object.object_type}) {sql_object.dataset}.{sql_object.object_name} has been created."
+                # Created since the definitions were fetched, fall through to the standard path
+                except Conflict:
+                    to_modify = bigquery.Table(sql_object.fully_qualified_name)
+                    to_modify.view_query = sql_object.definition
+
             # Try to update the table/view
             try:
                 to_modify = self.instance.get_table(to_modify)
@@ -97,6 +345,7 @@ class BqClient:
                 self.instance.update_table(
                     table=to_modify, fields=["view_query"]
                 )
+                return f"({sql_object.object_type}) {sql_object.dataset}.{sql_object.object_name} has been updated."
             # If it doesn't exist, create it
             except NotFound:
                 self.instance.create_table(
@@ -107,6 +356,7 @@ class BqClient:
         elif operation == self.Operation.DELETED:
             try:
                 self.instance.delete_table(table = to_modify)
+                return f"({sql_object.object_type}) {sql_object.dataset}.{sql_object.object_name} has been deleted."
             except NotFound:
                 return f"{sql_object.object_name} does not exist and will be skipped."
 
@@ -153,7 +403,7 @@ class BqClient:
         elif operation == self.Operation.DELETED:
             return f"This utility will not drop tables; no operation has been performed on {sql_object.dataset}.{sql_object.object_name}."
 
-    def _manage_function(self, operation, sql_object: SqlObject):
+    def _manage_function(self, operation, sql_object: SqlObject, diff_status: DiffStatus = None):
         # TODO: Handle arguments, see https://cloud.google.com/bigquery/docs/samples/bigquery-create-routine#bigquery_create_routine-python
         if operation == self.Operation.MODIFIED:
             to_modify = bigquery.Routine(
@@ -164,6 +414,28 @@ class BqClient:
                 return_type = sql_object.return_type
             )
             self._create_dataset_if_not_exists(sql_object.dataset)
+
+            # If we already know the remote state we can skip the get_routine round trip
+            if diff_status == self.DiffStatus.UNCHANGED:
+                return f"Skipping {sql_object.dataset}.{sql_object.object_name}, definition is already up to date."
+            elif diff_status == self.DiffStatus.CHANGED:
+                try:
+                    # Routine updates replace the whole routine, so arguments have to be included
+                    self.instance.update_routine(
+                        routine=to_modify, fields=["body", "type_", "return_type", "arguments"]
+                    )
+                    return f"({sql_object.object_type}) {sql_object.dataset}.{sql_object.object_name} has been updated."
+                # Dropped since the definitions were fetched, fall through to the standard path
+                except NotFound:
+                    pass
+            elif diff_status == self.DiffStatus.NEW:
+                try:
+                    self.instance.create_routine(routine=to_modify)
+                    return f"({sql_object.object_type}) {sql_object.dataset}.{sql_object.object_name} has been created."
+                # Created since the definitions were fetched, fall through to the standard path
+                except Conflict:
+                    pass
+
             # Try to update the table/view
             try:
                 to_modify = self.instance.get_routine(to_modify)
@@ -174,6 +446,7 @@ class BqClient:
                 self.instance.update_routine( # For some reason you need to specify type_ or the API bombs
                     routine=to_modify, fields=["body", "type_", "return_type"]
                 )
+                return f"({sql_object.object_type}) {sql_object.dataset}.{sql_object.object_name} has been updated."
             # If it doesn't exist, create it
             except NotFound:
                 self.instance.create_routine(
@@ -186,41 +459,128 @@ class BqClient:
                 self.instance.delete_routine(
                     bigquery.Routine(routine_ref = sql_object.fully_qualified_name)
                 )
+                return f"({sql_object.object_type}) {sql_object.dataset}.{sql_object.object_name} has been deleted."
             except NotFound:
                 return f"{sql_object.object_name} does not exist and will be skipped."
 
-    def _manage_proc(self, operation, sql_object: SqlObject):
+    def _manage_proc(self, operation, sql_object: SqlObject, diff_status: DiffStatus = None):
         # Currently no divergence in how we handle functions and procs, this may change in the future though
-        self._manage_function(operation, sql_object)
+        return self._manage_function(operation, sql_object, diff_status)
 
     # TODO: Refactor this to use SqlObject
-    def manage_object(self, operation: Operation, sql_object: SqlObject) -> str:
+    def manage_object(self, operation: Operation, sql_object: SqlObject, diff_status: DiffStatus = None) -> str:
         """
-            (str, str) -> None
+            (Operation, SqlObject, optional DiffStatus) -> str
             Performs the specified BQ operation on the specified file.
+            If the object's diff_status is known (see diff_definitions) the lookup of the remote definition is skipped.
         """
 
         if sql_object.object_type in ['table', 'schema']:
-            return self._manage_table(operation, sql_object)
+            result = self._manage_table(operation, sql_object)
         elif sql_object.object_type == 'view':
-            return self._manage_view(operation, sql_object)
+            result = self._manage_view(operation, sql_object, diff_status)
         # TODO: Implement Procs and Function
         elif sql_object.object_type == 'function':
-            return self._manage_function(operation, sql_object)
+            result = self._manage_function(operation, sql_object, diff_status)
         elif sql_object.object_type == 'procedure':
-            return  self._manage_proc(operation, sql_object)
+            result = self._manage_proc(operation, sql_object, diff_status)
         else:
             raise NotImplementedError("Only tables and views are supported at this time")
+
+        self._record_metadata_change(operation, sql_object)
+        return result
     
-    def check_objects_exist(self, objects):
+    def diff_definitions(self, sql_objects: list[SqlObject]) -> dict[SqlObject, DiffStatus]:
+        """
+            (list<SqlObject>) -> dict(SqlObject, DiffStatus)
+            Compares local definitions of views and routines against those in the metadata snapshot.
+            Definitions are compared by a hash of their normalized text, so whitespace and comment changes don't count.
+            Objects of other types (e.g. tables) are not included as their definitions aren't in the snapshot.
+        """
+        statuses = dict()
+        for sql_object in sql_objects:
+            full_name = f"{sql_object.dataset}.{sql_object.object_name}"
+            if sql_object.object_type == 'view':
+                remote_definition = self.metadata.views.get(full_name)
+            elif sql_object.object_type in ['function', 'procedure']:
+                remote_definition = self.metadata.routines.get(full_name, (None, None))[1]
+            else:
+                continue
+
+            if remote_definition is None:
+                statuses[sql_object] = self.DiffStatus.NEW
+            elif hash_sql(remote_definition) == hash_sql(sql_object.definition):
+                statuses[sql_object] = self.DiffStatus.UNCHANGED
+            else:
+                statuses[sql_object] = self.DiffStatus.CHANGED
+
+        return statuses
+
+    def _build_catalog_query(self, datasets: list[str] = [], include_definitions = True) -> str:
+        """
+            (optional list[str], optional bool) -> str
+            Builds a single query listing every table, view and routine in the project (or the provided datasets).
         """
-            (list<str>) -> list<str>
+        table_filter, routine_filter = '', ''
+        if len(datasets) > 0:
+            quoted_datasets = ', '.join([f"'{dataset}'" for dataset in datasets])
+            table_filter = f"where t.table_schema in ({quoted_datasets})"
+            routine_filter = f"where routine_schema in ({quoted_datasets})"
+
+        if include_definitions:
+            view_definition = 'v.view_definition'
+            views_join = 'left join region-us.INFORMATION_SCHEMA.VIEWS v on v.table_schema = t.table_schema and v.table_name = t.table_name'
+            routine_definition = 'routine_definition'
+        else:
+            view_definition, views_join, routine_definition = 'cast(null as string)', '', 'cast(null as string)'
+
+        return f"""
+            SELECT t.table_schema as dataset, t.table_name as name, t.table_type as object_type, {view_definition} as definition,
+                false as is_routine
+            FROM region-us.INFORMATION_SCHEMA.TABLES t
+            {views_join}
+            {table_filter}
+
+            union all
+
+            SELECT routine_schema as dataset, routine_name as name, routine_type as object_type, {routine_definition} as definition,
+                true as is_routine
+            FROM region-us.INFORMATION_SCHEMA.ROUTINES
+            {routine_filter}
+        """
+
+    def get_catalog(self, datasets: list[str] = [], include_definitions = True) -> ProjectCatalog:
+        """
+            (optional list[str], optional bool) -> ProjectCatalog
+            Lists every table, view and routine in the project (or only the provided datasets) with one query, rather than
+                list_datasets, list_tables per dataset and get_table per view. Always queries BQ, bypassing the metadata snapshot.
+            Skip definitions when only names and types are needed, it's a much smaller result.
+        """
+        catalog = ProjectCatalog(self.project_id)
+        query = self._build_catalog_query(datasets, include_definitions)
+        for result in self.instance.query(query).result(page_size = self.CATALOG_PAGE_SIZE):
+            catalog.add(result.dataset, result.name, ProjectCatalog.get_object_type(result.object_type, result.is_routine), result.definition)
+
+        return catalog
+
+    def _query_views_and_tables(self, datasets: list[str] = []) -> list[str]:
+        """
+            (optional list[str]) -> list[str]
+            Queries BQ directly for all views and tables, bypassing the metadata snapshot.
+        """
+        catalog = self.get_catalog(datasets, include_definitions = False)
+        return catalog.get_names([object_type for object_type in ProjectCatalog.ObjectType if object_type not in ProjectCatalog.ROUTINE_TYPES])
+
+    def check_objects_exist(self, objects, use_cache = True):
+        """
+            (list<str>, optional bool) -> list<str>
             Returns a list of the objects which were provided as an argument and exist in BQ.
+            Set use_cache to False to check against BQ directly (e.g. when validating a deployment).
         """
-        results = self.instance.query(self.all_tables_and_views_query).result()
-        views_and_tables = list()
-        for result in results:
-            views_and_tables.append(result.full_name)
+        if use_cache:
+            views_and_tables = self.metadata.views_and_tables
+        else:
+            views_and_tables = set(self._query_views_and_tables())
 
         return list(filter(lambda o: o in views_and_tables, objects))
     
@@ -245,37 +605,29 @@ class BqClient:
         query = query.replace('[replace_me]', ',\n\t'.join(quoted_objects))
         return self.instance.query(query).result()
 
-    def get_views_and_tables(self, datasets: list[str] = []):
+    def get_views_and_tables(self, datasets: list[str] = [], use_cache = True):
         """
-            (optional list[str]) -> list[str]
+            (optional list[str], optional bool) -> list[str]
             Returns all views and tables currently present in BQ for the associated client
+            Set use_cache to False to query BQ directly (e.g. when validating a deployment).
         """
-        query = BqClient.all_tables_and_views_query
-        if len(datasets) > 0:
-            query += '\nWHERE table_schema in (\n\t'
-            quoted_datasets = list()
-            for dataset in datasets:
-                quoted_datasets.append(f"'{dataset}'")
-            query += (",\n\t".join(quoted_datasets))
-            query += '\n)'
-
-        results = self.instance.query(query).result()
-        views_and_tables = list()
-        for result in results:
-            views_and_tables.append(result.full_name)
+        if not use_cache:
+            return self._query_views_and_tables(datasets)
 
-        return views_and_tables
+        if len(datasets) == 0:
+            return list(self.metadata.views_and_tables)
 
-    def path_to_fully_qualified(self, path: str) -> str:
-        return self.path_to_fully_qualified(Path(path))
+        datasets = set(datasets)
+        return [x for x in self.metadata.views_and_tables if x.split('.')[0] in datasets]
 
-    def path_to_fully_qualified(self, path: Path) -> str:
+    def path_to_fully_qualified(self, path) -> str:
         """
-            (os.Path) -> str
+            (str | os.Path) -> str
             Turn a system path into a fully qualified SQL object name.
             This needs to exist here so that we have awareness of the associated project-id.
         """
-        object_name = path[-1].replace('.sql','')
-        dataset = path[-3]
+        parts = Path(path).parts
+        object_name = parts[-1].replace('.sql','').replace('.json','')
+        dataset = parts[-3]
         fully_qualified_name = f"`{self.project_id}.{dataset}.{object_name}`"
-        return fully_qualified_name
\ No newline at end of file
+        return fully_qualified_name
@@ -1,3 +1,9 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from domain.DeploymentManifest import DeploymentManifest
+from domain.abstracts.DefinitionSource import DefinitionSource
+from domain.DependencyGraph import DependencyGraph
+from domain.DeploymentPlan import DeploymentPlan
 from domain.SqlObjectReferences import SqlObjectReferences
 from clients.BqClient import *
 from helpers.StaticMethods import *
@@ -5,44 +11,158 @@ from anytree import Node, RenderTree
 
 class BqDeploymentClient(BqClient):
     """Helper class (child of BqClient) designed to help with deployment to BQ."""
-    def __init__(self, client_name, project_name = None):
-        BqClient.__init__(self, client_name = client_name, project_name = project_name)
-        self.before_state = self.get_views_and_tables()
+    def __init__(self, client_name, project_id = None, metadata_ttl = BqClient.DEFAULT_METADATA_TTL, metadata_refresh = BqClient.RefreshMode.FULL,
+        source: DefinitionSource = None):
+        BqClient.__init__(self, client_name = client_name, project_id = project_id, metadata_ttl = metadata_ttl, metadata_refresh = metadata_refresh)
+        # If provided, files are read from this (e.g. a git commit) instead of the working tree
+        self._source = source
+        # Captured lazily just before the first change, so a client with nothing to deploy never touches BQ.
+        #   Always queried from BQ, objects dropped since a cached snapshot was taken would be reported as collateral drops
+        self._before_state = None
+        self._sql_objects = dict()
+        # Shared across all deploy_files calls so that each dependency is only parsed once
+        self._dependency_graph = DependencyGraph(source)
+        self.manifest = DeploymentManifest(self.project_id)
+        # Successfully deployed objects by DiffStatus, objects which aren't diffed (e.g. tables, deletions) are under None
+        self.deployment_counts = {status: 0 for status in [None] + list(BqClient.DiffStatus)}
 
-    def _get_dependencies(self, sql_object: SqlObject) -> set[str]:
-        return SqlObjectReferences(sql_object).get_children
+    # Max number of objects being deployed at once within a level of the deployment plan
+    DEFAULT_MAX_IN_FLIGHT = 8
 
-    def deploy_files(self, files: list[str], operation: BqClient.Operation, handle_dependencies = False):
+    @property
+    def before_state(self) -> list[str]:
+        if self._before_state is None:
+            self._before_state = self.get_views_and_tables(use_cache = False)
+
+        return self._before_state
+
+    def _get_dependencies(self, sql_object: SqlObject) -> list[str]:
+        return SqlObjectReferences(sql_object, self._dependency_graph).get_children()
+
+    def _file_to_sql_object(self, file: str) -> SqlObject:
         """
-            (list[str], str) -> None
-            Orchestrator for deployment of provided list of objects
+            (str) -> SqlObject
+            Builds the SqlObject for a file path, which may be absolute or relative to the mono repo.
         """
-        if handle_dependencies:
-            self._processed_dependencies = list()
+        if file not in self._sql_objects:
+            file_path = file if os.path.isabs(file) else f"{get_mono_path()}/{file}"
+            self._sql_objects[file] = SqlObject(self.path_to_fully_qualified(file), file_path = file_path, source = self._source)
+
+        return self._sql_objects[file]
+
+    def filter_unchanged(self, files: list[str]) -> list[str]:
+        """
+            (list[str]) -> list[str]
+            Returns only the files whose rendered definition differs from what the deployment manifest says was last 
+                deployed to this project. Nothing is read from BQ.
+        """
+        changed = list()
         for file in files:
-            if handle_dependencies:                
-                sql_object = SqlObject(self.path_to_fully_qualified(file))
-
-                dependencies = self._get_dependencies(sql_object)
-                for dependency in dependencies:
-                    # Quick measure to avoid updating the same file multiple times if it appears as a dependency
-                    #   to multiple items
-                    if dependency in self._processed_dependencies:
-                        continue
-                    print_info(f"Dependency check: {self.manage_object(BqClient.Operation.MODIFIED, dependency)}")
-                    self._processed_dependencies.append(dependency)
-
-            if file not in self._processed_dependencies:
-                print_info(self.manage_object(operation, file))
+            sql_object = self._file_to_sql_object(file)
+            if self.manifest.is_unchanged(sql_object):
+                print_info(f"Skipping {sql_object.dataset}.{sql_object.object_name}, unchanged since it was last deployed.")
+                self.deployment_counts[BqClient.DiffStatus.UNCHANGED] += 1
             else:
-                print_info(f"Skipping {file}, already deployed as a dependency")
+                changed.append(file)
+
+        return changed
+
+    def _deploy_level(self, executor: ThreadPoolExecutor, level: list[SqlObject], operation: BqClient.Operation, 
+        operations: dict[SqlObject, BqClient.Operation], statuses: dict[SqlObject, BqClient.DiffStatus], 
+        failed: set[SqlObject], plan: DeploymentPlan) -> None:
+        """
+            Deploys every object in one level of the plan concurrently, printing results in plan order.
+            Objects depending on anything which has already failed are skipped.
+        """
+        to_deploy = list()
+        for sql_object in level:
+            name = f"{sql_object.dataset}.{sql_object.object_name}"
+            blocked_by = [x for x in failed if f"{x.dataset}.{x.object_name}" in plan.dependencies[name]]
+            if len(blocked_by) > 0:
+                print_fail(f"Skipping {name}, dependency {blocked_by[0].dataset}.{blocked_by[0].object_name} failed to deploy.")
+                failed.add(sql_object)
+            else:
+                to_deploy.append(sql_object)
+
+        futures = [
+            (sql_object, executor.submit(self.manage_object, operations.get(sql_object, operation), sql_object, statuses.get(sql_object)))
+            for sql_object in to_deploy
+        ]
+        for sql_object, future in futures:
+            try:
+                result = future.result()
+                print_info(f"Dependency check: {result}" if sql_object in operations else result)
+                self.deployment_counts[statuses.get(sql_object)] += 1
+                if operations.get(sql_object, operation) == BqClient.Operation.MODIFIED:
+                    self.manifest.record(sql_object)
+                else:
+                    self.manifest.forget(sql_object)
+            except Exception as e:
+                print_fail(f"{sql_object.dataset}.{sql_object.object_name} failed to deploy: {e}")
+                failed.add(sql_object)
+
+    def deploy_files(self, files: list[str], operation: BqClient.Operation, handle_dependencies = False, max_in_flight = DEFAULT_MAX_IN_FLIGHT):
+        """
+            (list[str], str, optional bool, optional int) -> None
+            Orchestrator for deployment of provided list of objects.
+            Objects are ordered by their references to each other and deployed level by level, 
+                with up to max_in_flight objects deployed concurrently within a level.
+        """
+        sql_objects = [self._file_to_sql_object(file) for file in files]
+
+        # Dependencies are always (re)deployed as modifications, regardless of the requested operation
+        dependency_operations = dict()
+        if handle_dependencies:
+            for sql_object in list(sql_objects):
+                for dependency in self._get_dependencies(sql_object):
+                    dependency = self._dependency_graph.get_object(dependency)
+                    # Avoid updating the same object multiple times if it appears as a dependency to multiple items
+                    if dependency not in sql_objects:
+                        sql_objects.append(dependency)
+                        dependency_operations[dependency] = BqClient.Operation.MODIFIED
+
+        if len(sql_objects) == 0:
+            return
+
+        # Make sure the pre-deployment state is captured before anything changes
+        self.before_state
+
+        # Deleted files no longer exist, so there are no definitions to order them by
+        plan = DeploymentPlan(sql_objects, resolve_references = operation != BqClient.Operation.DELETED)
+
+        # Create every dataset we need in one pass up front, rather than checking per object
+        to_modify = [x for x in sql_objects if dependency_operations.get(x, operation) == BqClient.Operation.MODIFIED]
+        for dataset in self.create_missing_datasets([x.dataset for x in to_modify]):
+            print_info(f"Dataset {dataset} has been created.")
+
+        # One bulk definition fetch per client so that only objects which actually differ need API calls.
+        #   Always fetched (fully or incrementally) rather than served from the cache, an object changed outside this tool
+        #   since the snapshot was taken must never be skipped as unchanged. The ttl only applies to read-only listings
+        statuses = dict()
+        if len(to_modify) > 0:
+            if not self._metadata_refreshed:
+                self.refresh_metadata()
+            statuses = self.diff_definitions(to_modify)
+
+        failed = set()
+        with ThreadPoolExecutor(max_workers = max_in_flight) as executor:
+            for level in plan.levels:
+                self._deploy_level(executor, level, operation, dependency_operations, statuses, failed, plan)
+
+        # Persist the snapshot with this deployment's changes applied so the next run can reuse it
+        if self._metadata is not None:
+            self._metadata.save()
+        self.manifest.save()
+
+        if len(failed) > 0:
+            raise Exception(f"{len(failed)} of {len(plan)} object(s) failed to deploy to {self.project_id}.")
 
     def verify_drops(self, deletions):
         """
             (list[str]) -> None
             Validates that all expected drops happened correctly.
         """
-        failed_deletions = self.check_objects_exist(deletions)
+        failed_deletions = self.check_objects_exist(deletions, use_cache = False)
         if len(failed_deletions) == 0:
             print_success("All deletions dropped.")
         else:
@@ -54,7 +174,7 @@ class BqDeploymentClient(BqClient):
             (list[str]) -> None
             Validates that all expected drops happened correctly.
         """
-        after_state = self.get_views_and_tables()
+        after_state = self.get_views_and_tables(use_cache = False)
         delta = (set(self.before_state) - set(after_state))
         deleted_set = set(deletions)
 
@@ -71,7 +191,7 @@ class BqDeploymentClient(BqClient):
         """
         if len(deletions) > 0:
             self.verify_drops(deletions)
-            self.verify_no_collateral(deletions)        
+            self._verify_no_collateral(deletions)        
         else:
             print_success("No deletions to validate.")
 
@@ -1,31 +1,102 @@
 import copy
+import datetime
+import random
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from google.api_core.exceptions import ResourceExhausted, TooManyRequests
 from google.cloud import bigquery_datatransfer
 from google.cloud.bigquery_datatransfer_v1.types.transfer import TransferConfig, UserInfo
 from google.cloud import bigquery_datatransfer_v1
 from google.protobuf import field_mask_pb2
 
 from clients.BqClient import *
+from domain.TransferConfigCollection import TransferConfigCollection
 from helpers.StaticMethods import *
+from helpers.TokenBucket import TokenBucket
 
 class BqTransferClient(BqClient):
     """Helper class (child of BqClient) designed to help with transferconfig operations."""
-    def __init__(self, client_name, project_name = None):
-        BqClient.__init__(self, client_name = client_name, project_name = project_name)
-        self.instance = bigquery_datatransfer.DataTransferServiceClient()
+    def __init__(self, client_name, project_id = None, instance: bigquery_datatransfer.DataTransferServiceClient = None):
+        # No BigQuery client is needed, instance is the transfer service client
+        BqClient.__init__(self, client_name = client_name, project_id = project_id, skip_instance = True)
+        # The transfer service isn't project bound, so one instance (and its transport) can be shared by many clients
+        self.instance = instance if instance else bigquery_datatransfer.DataTransferServiceClient()
         self.parent = self.instance.common_project_path(self.project_id)
-        self._transfer_configs = self.instance.list_transfer_configs(parent=self.parent)
+        # Listed on first use
+        self._transfer_configs = TransferConfigCollection(lambda: self.instance.list_transfer_configs(parent=self.parent))
+        # Configs fetched individually (with the fields list responses leave out), keyed by config name
+        self._full_configs: dict[str, TransferConfig] = dict()
 
-    def get_transfer_configs(self):
+    def __del__(self):
+        # The transfer service client manages its own transport, unlike bigquery.Client
+        pass
+
+    # Max number of get_transfer_config calls made at once when full configs are needed
+    DEFAULT_FETCH_WORKERS = 8
+
+    # Updates are spread over this many threads, the rate limiter decides how quickly they are actually sent
+    DEFAULT_UPDATE_WORKERS = 4
+    # Kept under the Data Transfer API's per project write quota, with a small burst allowance
+    DEFAULT_UPDATES_PER_SECOND = 2
+    DEFAULT_UPDATE_BURST = 4
+    # Quota errors are retried with full jitter exponential backoff, starting at 1s and capped at 32s
+    MAX_UPDATE_RETRIES = 5
+
+    # Fields of UpdateTransferConfigRequest itself, anything else being updated is a TransferConfig field
+    _request_fields = ['authorization_code', 'version_info', 'service_account_name']
+
+    # Fields which an update depends on, beyond those it sets, that list responses may not include
+    _required_fields = {'service_account_name': ['owner_info']}
+
+    def get_transfer_configs(self) -> TransferConfigCollection:
         return self._transfer_configs
 
+    def _fetch_transfer_config(self, name: str) -> TransferConfig:
+        return self.instance.get_transfer_config(
+            bigquery_datatransfer_v1.GetTransferConfigRequest(name=name)
+        )
+
+    def get_full_configs(self, configs: list[TransferConfig], fields: list[str]) -> list[TransferConfig]:
+        """
+            (list[TransferConfig], list[str]) -> list[TransferConfig]
+            Returns the configs with all of the given fields populated. Only configs missing one of the fields are fetched,
+                concurrently and at most once per client, so dry runs and the following update share the same fetches.
+        """
+        to_fetch = [config.name for config in configs 
+            if config.name not in self._full_configs and any(field not in config for field in fields)]
+
+        if len(to_fetch) > 0:
+            with ThreadPoolExecutor(max_workers = self.DEFAULT_FETCH_WORKERS) as executor:
+                for config in executor.map(self._fetch_transfer_config, to_fetch):
+                    self._full_configs[config.name] = config
+
+        return [self._full_configs.get(config.name, config) for config in configs]
+
+    def _start_manual_run(self, name: str) -> datetime.datetime:
+        requested_at = datetime.datetime.now(datetime.timezone.utc)
+        response = self.instance.start_manual_transfer_runs(
+            bigquery_datatransfer_v1.StartManualTransferRunsRequest(parent=name, requested_run_time=requested_at)
+        )
+        return response.runs[0].run_time if len(response.runs) > 0 else requested_at
+
+    def start_manual_runs(self, names: list[str]) -> dict[str, datetime.datetime]:
+        """
+            (list[str]) -> dict(str, datetime)
+            Starts a run of each of the given transfer configs now, concurrently, and returns each one's run time.
+            Only names are needed, so nothing is listed or fetched first.
+        """
+        with ThreadPoolExecutor(max_workers = self.DEFAULT_FETCH_WORKERS) as executor:
+            return dict(zip(names, executor.map(self._start_manual_run, names)))
+
     def delete_transfers(self, transfers):
         for transfer in transfers:
             self.instance.delete_transfer_config(
                 name = transfer.name
             )
 
-    def _validate_service_account_update(self, transfer_config: TransferConfig, service_account_name: str):
+    @staticmethod
+    def _validate_service_account_update(transfer_config: TransferConfig, service_account_name: str):
         email = transfer_config.owner_info.email
 
         if email == service_account_name:
@@ -39,22 +110,25 @@ class BqTransferClient(BqClient):
 
     # TODO: Support specifying different fields per SQ
     def get_config_updates(self, updates: dict[str,str]): 
-        configs = self._transfer_configs
+        configs = list(self._transfer_configs)
+        # Don't modify the caller's updates, they may be reused (e.g. a dry run followed by the real update)
+        updates = dict(updates)
 
         targeted_update = False
 
         # Handle display_name filtering
         if 'display_name' in updates:
             targeted_update = True
-            configs = list(filter(lambda config: config.display_name == updates['display_name'], configs))
+            configs = self._transfer_configs.find_by_display_name(updates['display_name'])
             updates.pop('display_name')
 
-        for config in configs:        
-            # Ensure we have all the data we need
-            config = self.instance.get_transfer_config(
-                bigquery_datatransfer_v1.GetTransferConfigRequest(name=config.name)
-            )
+        # Ensure we have all the data we need
+        fields = list()
+        for field in updates:
+            fields += self._required_fields.get(field, list())
+        configs = self.get_full_configs(configs, fields)
 
+        for config in configs:        
             # Handle Service account name
             config_updates = copy.deepcopy(updates)
             if not targeted_update and 'service_account_name' in config_updates:
@@ -64,7 +138,7 @@ class BqTransferClient(BqClient):
                     if len(config_updates) == 0:
                         continue 
 
-            paths = list(updates.keys())
+            paths = list(config_updates.keys())
             if len(paths) == 0:
                 continue
 
@@ -72,25 +146,75 @@ class BqTransferClient(BqClient):
                 "transfer_config": config,
                 "update_mask": field_mask_pb2.FieldMask(paths=paths)
             }
-            for field, value in updates.items():
+            for field, value in config_updates.items():
                 update_config[field] = value
 
             yield update_config
 
-    def update_config_fields(self, updates: dict[str, str]) -> None:
+    def _to_request(self, update: dict) -> dict:
+        """
+            (dict) -> dict
+            Moves TransferConfig fields from an update (as produced by get_config_updates) onto a copy of its config.
+        """
+        request = {"transfer_config": copy.deepcopy(update["transfer_config"]), "update_mask": update["update_mask"]}
+        for field, value in update.items():
+            if field in request:
+                continue
+            elif field in self._request_fields:
+                request[field] = value
+            else:
+                setattr(request["transfer_config"], field, value)
+
+        return request
+
+    def _apply_update(self, update: dict, rate_limiter: TokenBucket) -> TransferConfig:
+        request = self._to_request(update)
+        for attempt in range(self.MAX_UPDATE_RETRIES + 1):
+            rate_limiter.acquire()
+            try:
+                return self.instance.update_transfer_config(request)
+            except (ResourceExhausted, TooManyRequests) as error:
+                if attempt == self.MAX_UPDATE_RETRIES:
+                    raise Exception(f"Update of \"{update['transfer_config'].display_name}\" still over quota after {attempt} retries: {error}")
+                time.sleep(random.uniform(0, min(32, 2 ** attempt)))
+
+    def _patch_config(self, config: TransferConfig) -> None:
+        """
+            (TransferConfig) -> None
+            Replaces the cached copies of a config with an updated one, instead of listing every config again.
+        """
+        self._transfer_configs.replace(config)
+        if config.name in self._full_configs:
+            self._full_configs[config.name] = config
+
+    def update_config_fields(self, updates: dict[str, str], max_workers = DEFAULT_UPDATE_WORKERS,
+        updates_per_second = DEFAULT_UPDATES_PER_SECOND) -> None:
+        """
+            (dict(str, str), int, float) -> None
+            Applies the updates to every matching config concurrently, sending at most updates_per_second requests.
+            Every update is attempted, failures are reported together afterwards.
+        """
         to_update = list(self.get_config_updates(updates))
+        rate_limiter = TokenBucket(updates_per_second, self.DEFAULT_UPDATE_BURST)
 
-        for update in to_update:
-            self.instance.update_transfer_config(update)
+        failures = list()
+        with ThreadPoolExecutor(max_workers = max_workers) as executor:
+            futures = [(update, executor.submit(self._apply_update, update, rate_limiter)) for update in to_update]
+            for update, future in futures:
+                try:
+                    self._patch_config(future.result())
+                except Exception as error:
+                    print_fail(f"Failed to update \"{update['transfer_config'].display_name}\": {error}")
+                    failures.append(update['transfer_config'].display_name)
 
-        # Refresh _transfer_configs after an update
-        self._transfer_configs = self.instance.list_transfer_configs(parent=self.parent)
+        if len(failures) > 0:
+            raise Exception(f"{len(failures)} of {len(to_update)} transfer config updates failed")
 
     def _get_current_value(self, config: TransferConfig, key: str):
         if key == 'service_account_name':
             return config.owner_info.email
         elif hasattr(TransferConfig, key):
-            return getattr(TransferConfig, key)
+            return getattr(config, key)
         else:
             raise Exception(f"Provided key {key} not found in TransferConfig")
 
@@ -1,19 +1,42 @@
+import json
 import os
-from git import DiffIndex, Head, Repo, Commit
-from helpers.StaticMethods import get_mono_path
+import re
+import time
+from enum import Enum
+from git import DiffIndex, GitCommandError, Head, Repo, Commit
+from helpers.StaticMethods import get_cache_path, get_mono_path, print_info, print_warn
 
 class GitClient:
     """Helper class made to simplify git interaction"""
-    def __init__(self, base_path):
+    class FetchPolicy(Enum):
+        # Fetch everything from origin before every switch
+        ALWAYS = 1
+        # Fetch everything from origin on the first switch in this process only
+        ONCE = 2
+        # Fetch only the ref being switched to, once per ref in this process
+        TARGET_REF = 3
+        # Skip fetching if the repo was last fetched within max_fetch_age seconds (by any process)
+        FRESH = 4
+
+    DEFAULT_MAX_FETCH_AGE = 300
+
+    # Shared by every instance, so that e.g. a deploy's restore step doesn't fetch again. Keyed by git dir
+    _fetched: dict[str, set[str]] = dict()
+
+    def __init__(self, base_path, fetch_policy: FetchPolicy = FetchPolicy.ALWAYS, max_fetch_age: int = DEFAULT_MAX_FETCH_AGE):
         """
-            (str) -> GitClient
+            (str, FetchPolicy, int) -> GitClient
             Initialize the GitClient using the specified base path.
         """
         self.base_path = base_path
+        self.fetch_policy = fetch_policy
+        self.max_fetch_age = max_fetch_age
         self.repo = self._get_repo()
         self.original_head = self.repo.active_branch
         self.master = self.repo.heads.master
         self.origin = self._get_origin()
+        self._merge_base_file = f"{get_cache_path('git')}/merge_bases.json"
+        self._merge_bases = self._load_merge_bases()
 
     @property
     def original_branch(self):
@@ -32,17 +55,43 @@ class GitClient:
         assert not repo.bare
         return repo
 
-    def get_commit_by_sha(self, sha):
+    def _load_merge_bases(self) -> dict[str, str]:
+        if not os.path.exists(self._merge_base_file):
+            return dict()
+
+        try:
+            with open(self._merge_base_file, 'r') as f:
+                return json.load(f)
+        except ValueError:
+            return dict()
+
+    def get_commit_by_sha(self, sha, within: Commit = None):
         """
-            (str) -> Commit
-            Fetch the commit with the provided sha.
-            ** Note ** This currently only supports full length sha
+            (str, optional Commit) -> Commit
+            Fetch the commit with the provided full or abbreviated (min. 4 characters) sha.
+            The commit must be reachable from within (HEAD by default), as it was when history was searched commit by commit.
         """
-        for c in self.repo.iter_commits():
-            if c.hexsha == sha:
-                return c
-
-        raise Exception("Did not find the specified commit")    
+        sha = sha.strip()
+        if not re.fullmatch(r'[0-9a-fA-F]{4,40}', sha):
+            raise Exception(f"\"{sha}\" is not a valid commit sha")
+
+        # Resolved by git against its object (pack) indexes, rather than walking history
+        try:
+            full_sha = self.repo.git.rev_parse('--verify', '--quiet', f"{sha}^{{commit}}")
+        except GitCommandError:
+            full_sha = None
+
+        if not full_sha:
+            # rev-parse reports nothing useful with --quiet, so check for an ambiguous prefix separately
+            if len(sha) < 40 and len(self.repo.git.rev_parse('--disambiguate=' + sha).split()) > 1:
+                raise Exception(f"Sha \"{sha}\" is ambiguous, use more characters")
+            raise Exception("Did not find the specified commit")
+
+        commit = self.repo.commit(full_sha)
+        if not self.repo.is_ancestor(commit, self.repo.head.commit if within is None else within):
+            raise Exception("Did not find the specified commit")
+
+        return commit
     
     def _get_origin(self):
         """
@@ -51,35 +100,76 @@ class GitClient:
         """
         return list(filter(lambda r: r.name == 'origin', self.repo.remotes))[0]
 
-    def switch_to(self, head: Head):
+    @property
+    def last_fetched_at(self) -> float:
+        """
+            (None) -> float
+            Returns when the repo was last fetched (by any process) as a timestamp, or 0 if it never has been.
+        """
+        fetch_head = os.path.join(self.repo.git_dir, 'FETCH_HEAD')
+        return os.path.getmtime(fetch_head) if os.path.exists(fetch_head) else 0
+
+    def fetch(self, head: Head = None):
         """
             (Head) -> None
-            Switch to the provided head after fetching from origin.
+            Fetch from origin according to the fetch policy, head is the ref about to be switched to (if any).
         """
+        fetched = self._fetched.setdefault(self.repo.git_dir, set())
+
+        if self.fetch_policy == self.FetchPolicy.ONCE and 'all' in fetched:
+            return
+        elif self.fetch_policy == self.FetchPolicy.FRESH and time.time() - self.last_fetched_at < self.max_fetch_age:
+            print_info(f"Last fetched {int(time.time() - self.last_fetched_at)}s ago, skipping fetch.")
+            return
+        elif self.fetch_policy == self.FetchPolicy.TARGET_REF and head is not None:
+            if head.name not in fetched:
+                try:
+                    self.origin.fetch(f"refs/heads/{head.name}:refs/remotes/origin/{head.name}")
+                except GitCommandError:
+                    # e.g. a branch which has never been pushed
+                    print_warn(f"Could not fetch {head.name} from origin, using the local ref.")
+                fetched.add(head.name)
+            return
+
         self.origin.fetch()
-        head.checkout()
+        fetched.add('all')
 
-    # I'm sure i'm doing this the hard way but I can't find an easier one
-    def _get_branch_commits(self, ref_name: str) -> list[Commit]:
-        ref_name = ref_name.replace('refs/heads/','')
+    def switch_to(self, head: Head):
+        """
+            (Head) -> None
+            Switch to the provided head after fetching from origin, as allowed by the fetch policy.
+        """
+        self.fetch(head)
+        head.checkout()
 
-        commits = list()
-        commit = self.original_head.commit
+    def get_merge_base(self, commit: Commit, base: Head = None) -> Commit:
+        """
+            (Commit, Head) -> Commit
+            Returns the best common ancestor of the commit and base (master by default).
+            Merge bases never change for a given pair of commits, so they are cached on disk keyed by both shas.
+        """
+        base_commit = (self.master if base is None else base).commit
+        key = f"{commit.hexsha}:{base_commit.hexsha}"
+        if key not in self._merge_bases:
+            merge_bases = self.repo.merge_base(commit, base_commit)
+            if len(merge_bases) == 0:
+                raise Exception(f"{commit.hexsha} has no history in common with {base_commit.hexsha}")
 
-        while commit:
-            commits.append(commit)
-            candidates = [x for x in commit.parents if self.original_branch in x.name_rev]
-            if len(candidates) > 0:
-                commit = candidates[0]
-            else:
-                commit = None
+            self._merge_bases[key] = merge_bases[0].hexsha
+            with open(self._merge_base_file + '.tmp', 'w') as f:
+                json.dump(self._merge_bases, f, indent = 1)
+            os.replace(self._merge_base_file + '.tmp', self._merge_base_file)
 
-        return commits
+        return self.repo.commit(self._merge_bases[key])
 
     def get_active_branch_changes(self) -> DiffIndex:
-        return self.original_head.commit.diff(
-            f"HEAD~{len(self._get_branch_commits(self.repo.active_branch.path))}"
-        )
+        """
+            (None) -> DiffIndex
+            Returns everything changed on the original branch since it diverged from master, in a single diff.
+            Diffs are from the merge base to the branch, so files added on the branch are 'A' and renames have b_path as the new name.
+        """
+        head_commit = self.original_head.commit
+        return self.get_merge_base(head_commit).diff(head_commit)
 
     def revert_tracked_changes(self, to_revert: DiffIndex):
         self.repo.index.checkout([x.b_path for x in to_revert], force=True)
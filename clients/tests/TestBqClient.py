@@ -7,11 +7,14 @@ sys.path.insert(1, p)
 
 from typing import Sequence
 from domain.SqlObject import SqlObject
+from domain.MetadataSnapshot import MetadataSnapshot
 from helpers.StaticMethods import get_bq_path
 from helpers.TestHelpers import TempFile
 from clients.BqClient import BqClient
 from google.cloud import bigquery
 from google.cloud.exceptions import NotFound
+from types import SimpleNamespace
+from unittest import mock
 import unittest
 
 class TestBqClient(unittest.TestCase):
@@ -355,5 +358,153 @@ class TestBqClient(unittest.TestCase):
             except Exception as e:
                 self.assertTrue(type(e) == NotFound, "Function should not exist at this point")
 
+    def test_diff_definitions(self):
+        bq_client = BqClient('xyz', skip_instance=True)
+        snapshot = MetadataSnapshot(bq_client.project_id)
+        snapshot.add_view('ext.vw_unchanged', 'select 1 as num')
+        snapshot.add_view('ext.vw_changed', 'select 1 as num')
+        snapshot.add_routine('core.fn_clean', 'SCALAR FUNCTION', 'trim(x)')
+        snapshot.add_table('core.orders')
+        bq_client._metadata = snapshot
+
+        to_sql_object = lambda name, definition: SqlObject(f"`{bq_client.project_id}.{name}`", definition = definition)
+        unchanged = to_sql_object('ext.vw_unchanged', '-- Formatting only\nselect 1\n    as num;')
+        changed = to_sql_object('ext.vw_changed', 'select 2 as num')
+        new = to_sql_object('ext.vw_new', 'select 3 as num')
+        function = to_sql_object('core.fn_clean', 'trim(x)')
+        table = to_sql_object('core.orders', '[]')
+
+        statuses = bq_client.diff_definitions([unchanged, changed, new, function, table])
+        self.assertEqual(statuses, {
+            unchanged: BqClient.DiffStatus.UNCHANGED,
+            changed: BqClient.DiffStatus.CHANGED,
+            new: BqClient.DiffStatus.NEW,
+            function: BqClient.DiffStatus.UNCHANGED
+        })
+
+    def _mock_instance(self, bq_client: BqClient, results: dict[str, list[SimpleNamespace]]) -> list[str]:
+        """
+            (BqClient, dict(str, list<SimpleNamespace>)) -> list<str>
+            Replaces the client's BQ instance, each query returns the rows of the first key it contains.
+            Returns the list that every query run is appended to.
+        """
+        queries = list()
+        def query(sql):
+            queries.append(sql)
+            rows = [rows for key, rows in results.items() if key in sql][0]
+            return mock.Mock(result = mock.Mock(return_value = rows))
+
+        bq_client.instance = mock.Mock(query = mock.Mock(side_effect = query))
+        return queries
+
+    def test_build_modified_times_query(self):
+        bq_client = BqClient('xyz', skip_instance=True)
+        self._mock_instance(bq_client, {'SCHEMATA': [SimpleNamespace(schema_name = 'ext'), SimpleNamespace(schema_name = 'core')]})
+
+        query = bq_client._build_modified_times_query()
+        self.assertIn(f"FROM `{bq_client.project_id}.ext.__TABLES__`", query)
+        self.assertIn(f"FROM `{bq_client.project_id}.core.__TABLES__`", query)
+        self.assertIn("region-us.INFORMATION_SCHEMA.ROUTINES", query)
+
+        # A project without datasets still gets a valid query
+        self._mock_instance(bq_client, {'SCHEMATA': []})
+        self.assertNotIn("__TABLES__", bq_client._build_modified_times_query())
+
+    def test_refresh_metadata_incremental(self):
+        bq_client = BqClient('xyz', skip_instance=True)
+        snapshot = MetadataSnapshot(bq_client.project_id, 0)
+        snapshot.watermark = 1000
+        snapshot.add_view('ext.vw_same', 'select 1 as num')
+        snapshot.add_view('ext.vw_changed', 'select 1 as num')
+        snapshot.add_table('core.orders')
+        snapshot.add_routine('core.fn_dropped', 'SCALAR FUNCTION', 'trim(x)')
+
+        modified_times = [
+            ('view', 'ext.vw_same', 500),
+            ('view', 'ext.vw_changed', 1500),
+            # Added after the snapshot, with a modified time from before the watermark (e.g. restored)
+            ('view', 'ext.vw_new', 200),
+            ('table', 'core.orders', 1500),
+            ('table', 'core.items', 1500),
+            ('SCALAR FUNCTION', 'core.fn_new', 1000)
+        ]
+        queries = self._mock_instance(bq_client, {
+            'SCHEMATA': [SimpleNamespace(schema_name = 'ext'), SimpleNamespace(schema_name = 'core')],
+            '__TABLES__': [
+                SimpleNamespace(object_type = object_type, full_name = full_name, modified_at = modified_at, queried_at = 2000)
+                for object_type, full_name, modified_at in modified_times
+            ],
+            'INFORMATION_SCHEMA.VIEWS': [
+                SimpleNamespace(object_type = 'view', full_name = 'ext.vw_changed', definition = 'select 2 as num'),
+                SimpleNamespace(object_type = 'view', full_name = 'ext.vw_new', definition = 'select 3 as num'),
+                SimpleNamespace(object_type = 'SCALAR FUNCTION', full_name = 'core.fn_new', definition = 'lower(x)')
+            ]
+        })
+
+        refreshed = bq_client._refresh_metadata_incremental(snapshot)
+        self.assertEqual(refreshed.watermark, 2000)
+        self.assertGreater(refreshed.created_at, 0)
+        self.assertEqual(refreshed.views, {'ext.vw_same': 'select 1 as num', 'ext.vw_changed': 'select 2 as num', 'ext.vw_new': 'select 3 as num'})
+        self.assertEqual(refreshed.tables, {'core.orders', 'core.items'})
+        self.assertEqual(refreshed.routines, {'core.fn_new': ('SCALAR FUNCTION', 'lower(x)')})
+
+        # Only changed and new objects have their definitions fetched
+        definitions_query = queries[-1]
+        for name in ['ext.vw_changed', 'ext.vw_new', 'core.fn_new']:
+            self.assertIn(f"'{name}'", definitions_query)
+        self.assertNotIn("'ext.vw_same'", definitions_query)
+
+    def test_query_views_and_tables(self):
+        bq_client = BqClient('xyz', skip_instance=True)
+        rows = [
+            ('ext', 'vw_orders', 'VIEW', False),
+            ('core', 'orders', 'BASE TABLE', False),
+            ('core', 'fn_sum', 'AGGREGATE FUNCTION', True),
+            ('core', 'fn_new', 'SOMETHING NEW', True)
+        ]
+        self._mock_instance(bq_client, {'INFORMATION_SCHEMA.ROUTINES': [
+            SimpleNamespace(dataset = dataset, name = name, object_type = object_type, definition = None, is_routine = is_routine)
+            for dataset, name, object_type, is_routine in rows
+        ]})
+
+        self.assertEqual(bq_client.get_views_and_tables(use_cache = False), ['ext.vw_orders', 'core.orders'])
+
+    def test_refresh_metadata_incremental_unchanged(self):
+        bq_client = BqClient('xyz', skip_instance=True)
+        snapshot = MetadataSnapshot(bq_client.project_id, 0)
+        snapshot.watermark = 1000
+        snapshot.add_view('ext.vw_same', 'select 1 as num')
+        queries = self._mock_instance(bq_client, {
+            'SCHEMATA': [SimpleNamespace(schema_name = 'ext')],
+            '__TABLES__': [SimpleNamespace(object_type = 'view', full_name = 'ext.vw_same', modified_at = 500, queried_at = 2000)]
+        })
+
+        refreshed = bq_client._refresh_metadata_incremental(snapshot)
+        self.assertEqual(refreshed.views, {'ext.vw_same': 'select 1 as num'})
+        # No definitions are fetched when nothing changed
+        self.assertEqual(len(queries), 2)
+
+    def test_refresh_metadata_incremental_type_change(self):
+        bq_client = BqClient('xyz', skip_instance=True)
+        snapshot = MetadataSnapshot(bq_client.project_id, 0)
+        snapshot.watermark = 1000
+        snapshot.add_view('ext.vw_now_table', 'select 1 as num')
+        snapshot.add_table('ext.now_view')
+        # Modified times from before the watermark, only the type change gives them away
+        queries = self._mock_instance(bq_client, {
+            'SCHEMATA': [SimpleNamespace(schema_name = 'ext')],
+            '__TABLES__': [
+                SimpleNamespace(object_type = 'table', full_name = 'ext.vw_now_table', modified_at = 500, queried_at = 2000),
+                SimpleNamespace(object_type = 'view', full_name = 'ext.now_view', modified_at = 500, queried_at = 2000)
+            ],
+            'INFORMATION_SCHEMA.VIEWS': [SimpleNamespace(object_type = 'view', full_name = 'ext.now_view', definition = 'select 2 as num')]
+        })
+
+        refreshed = bq_client._refresh_metadata_incremental(snapshot)
+        self.assertEqual(refreshed.views, {'ext.now_view': 'select 2 as num'})
+        self.assertEqual(refreshed.tables, {'ext.vw_now_table'})
+        self.assertEqual(refreshed.views_and_tables, {'ext.vw_now_table', 'ext.now_view'})
+        self.assertNotIn("'ext.vw_now_table'", queries[-1])
+
 if __name__ == '__main__':
      unittest.main()
\ No newline at end of file
@@ -0,0 +1,74 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from clients.BqClient import BqClient
+from clients.BqDeploymentClient import BqDeploymentClient
+from domain.DefinitionSources.InMemoryDefinitionSource import InMemoryDefinitionSource
+from domain.MetadataSnapshot import MetadataSnapshot
+from helpers.Capturing import Capturing
+from types import SimpleNamespace
+from unittest import mock
+import tempfile
+import unittest
+
+class TestBqDeploymentClient(unittest.TestCase):
+    def setUp(self):
+        # get_cache_path is under the home folder, keep the real cache out of it
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.patches = [
+            mock.patch.dict(os.environ, {'HOME': self.temp_dir.name}),
+            mock.patch('clients.BqClient.bigquery.Client')
+        ]
+        for patch in self.patches:
+            patch.start()
+
+        self.client = BqDeploymentClient('xyz')
+        # Nothing is listed, every query returns no rows
+        self.client.instance.query.return_value.result.return_value = []
+
+    def tearDown(self):
+        for patch in reversed(self.patches):
+            patch.stop()
+        self.temp_dir.cleanup()
+
+    def test_deploy_deleted_view_without_file(self):
+        # A deleted file is gone from the working tree (and the commit's tree)
+        file_path = f"{self.temp_dir.name}/bq/ext/view/vw_gone.sql"
+
+        with Capturing() as output:
+            self.client.deploy_files([file_path], BqClient.Operation.DELETED)
+
+        deleted = self.client.instance.delete_table.call_args.kwargs['table']
+        self.assertEqual(deleted.reference.path, f"/projects/{self.client.project_id}/datasets/ext/tables/vw_gone")
+        self.assertIsNone(deleted.view_query)
+        self.assertIn('(view) ext.vw_gone has been deleted.', output[-1])
+
+    def test_deploy_diffs_against_fresh_definitions(self):
+        file_path = f"{self.temp_dir.name}/bq/ext/view/vw_a.sql"
+        self.client = BqDeploymentClient('xyz', source = InMemoryDefinitionSource({file_path: 'select 1 as num'}))
+        self.client.instance.list_datasets.return_value = [SimpleNamespace(dataset_id = 'ext')]
+
+        # A young cached snapshot says the view is up to date, but it has since been changed in BQ (e.g. in the console)
+        cached = MetadataSnapshot(self.client.project_id)
+        cached.watermark = 1
+        cached.add_view('ext.vw_a', 'select 1 as num')
+        cached.save()
+        metadata_rows = [SimpleNamespace(object_type = 'view', full_name = 'ext.vw_a', definition = 'select 2 as num', queried_at = 2)]
+        catalog_rows = [SimpleNamespace(dataset = 'ext', name = 'vw_a', object_type = 'VIEW', definition = None, is_routine = False)]
+        self.client.instance.query.side_effect = lambda sql: mock.Mock(result = mock.Mock(
+            return_value = catalog_rows if 'is_routine' in sql else metadata_rows
+        ))
+
+        with Capturing() as output:
+            self.client.deploy_files([file_path], BqClient.Operation.MODIFIED)
+
+        updated = self.client.instance.update_table.call_args.kwargs['table']
+        self.assertEqual(updated.view_query, 'select 1 as num')
+        self.assertIn('(view) ext.vw_a has been updated.', output[-1])
+        self.assertEqual(self.client.deployment_counts[BqClient.DiffStatus.CHANGED], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from clients.BqTransferClient import BqTransferClient
+from google.cloud.bigquery_datatransfer_v1.types.transfer import TransferConfig, UserInfo
+from unittest import mock
+import unittest
+
+class TestBqTransferClient(unittest.TestCase):
+    def setUp(self):
+        self.full_configs = {
+            f"projects/p/transferConfigs/{name}": TransferConfig(
+                name = f"projects/p/transferConfigs/{name}", display_name = name, owner_info = UserInfo(email = f"{name}@soundcommerce.com")
+            )
+            for name in ['a', 'b', 'c']
+        }
+        self.instance = mock.Mock()
+        self.instance.common_project_path.return_value = 'projects/p'
+        self.instance.get_transfer_config.side_effect = lambda request: self.full_configs[request.name]
+        self.client = BqTransferClient('xyz', instance = self.instance)
+
+    def _fetched_names(self) -> list[str]:
+        return sorted([call.args[0].name for call in self.instance.get_transfer_config.call_args_list])
+
+    def test_get_full_configs(self):
+        # List responses can leave out owner_info
+        listed = [
+            TransferConfig(name = 'projects/p/transferConfigs/a', display_name = 'a'),
+            self.full_configs['projects/p/transferConfigs/b'],
+            TransferConfig(name = 'projects/p/transferConfigs/c', display_name = 'c')
+        ]
+
+        configs = self.client.get_full_configs(listed, ['owner_info'])
+        self.assertEqual([config.owner_info.email for config in configs], ['a@soundcommerce.com', 'b@soundcommerce.com', 'c@soundcommerce.com'])
+        self.assertEqual(self._fetched_names(), ['projects/p/transferConfigs/a', 'projects/p/transferConfigs/c'])
+
+        # Fetched at most once per client, e.g. a dry run followed by the update
+        self.client.get_full_configs(listed, ['owner_info'])
+        self.assertEqual(self.instance.get_transfer_config.call_count, 2)
+
+    def test_get_full_configs_nothing_missing(self):
+        listed = list(self.full_configs.values())
+        self.assertEqual(self.client.get_full_configs(listed, ['owner_info']), listed)
+        self.assertEqual(self.client.get_full_configs(listed, []), listed)
+        self.instance.get_transfer_config.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from clients.GitClient import GitClient
+from helpers.TestHelpers import TempGitRepo
+from helpers.Capturing import Capturing
+from unittest import mock
+import unittest
+
+class TestGitClient(unittest.TestCase):
+    def setUp(self):
+        self.temp_repo = TempGitRepo()
+
+    def tearDown(self):
+        GitClient._fetched.pop(self.temp_repo.repo.git_dir, None)
+        self.temp_repo.__exit__(None, None, None)
+
+    def test_get_commit_by_sha_outside_head(self):
+        # A branch cut before a later merge to master, as in a no_checkout deploy which never leaves the branch
+        branch = self.temp_repo.repo.create_head('feature')
+        master_commit = self.temp_repo.commit('vw_b.sql', 'select 2 as num')
+        branch.checkout()
+        self.temp_repo.commit('vw_c.sql', 'select 3 as num')
+
+        git = GitClient(self.temp_repo.path)
+        with self.assertRaises(Exception):
+            git.get_commit_by_sha(master_commit.hexsha)
+        self.assertEqual(git.get_commit_by_sha(master_commit.hexsha[:8], git.master.commit), master_commit)
+        self.assertEqual(git.get_commit_by_sha(self.temp_repo.first_commit.hexsha), self.temp_repo.first_commit)
+
+        with self.assertRaises(Exception):
+            git.get_commit_by_sha('not a sha')
+
+    def _count_fetches(self, git: GitClient) -> mock.Mock:
+        """Wraps the client's origin fetch (so fetches still happen) to record how it was called"""
+        fetch = mock.Mock(wraps = git.origin.fetch)
+        git.origin = mock.Mock(fetch = fetch)
+        return fetch
+
+    def test_fetch_policy_always(self):
+        git = GitClient(self.temp_repo.path, GitClient.FetchPolicy.ALWAYS)
+        fetch = self._count_fetches(git)
+        git.fetch(git.master)
+        git.fetch(git.master)
+
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_fetch_policy_once(self):
+        git = GitClient(self.temp_repo.path, GitClient.FetchPolicy.ONCE)
+        fetch = self._count_fetches(git)
+        git.switch_to(git.master)
+        git.fetch()
+        self.assertEqual(fetch.call_count, 1)
+
+        # Shared across instances, e.g. a deploy's restore step
+        other = GitClient(self.temp_repo.path, GitClient.FetchPolicy.ONCE)
+        other_fetch = self._count_fetches(other)
+        other.fetch(other.master)
+        self.assertEqual(other_fetch.call_count, 0)
+
+    def test_fetch_policy_target_ref(self):
+        feature = self.temp_repo.repo.create_head('feature')
+        git = GitClient(self.temp_repo.path, GitClient.FetchPolicy.TARGET_REF)
+        fetch = self._count_fetches(git)
+
+        git.fetch(git.master)
+        git.fetch(git.master)
+        self.assertEqual(fetch.call_args_list, [mock.call('refs/heads/master:refs/remotes/origin/master')])
+
+        # Never pushed, so the local ref is used
+        with Capturing() as output:
+            git.fetch(feature)
+        self.assertIn('Could not fetch feature from origin', output[0])
+
+        # Without a ref everything is fetched
+        git.fetch()
+        self.assertEqual(fetch.call_args_list[-1], mock.call())
+
+    def test_fetch_policy_fresh(self):
+        git = GitClient(self.temp_repo.path, GitClient.FetchPolicy.FRESH, max_fetch_age = 60)
+        fetch = self._count_fetches(git)
+        self.assertEqual(git.last_fetched_at, 0)
+
+        git.fetch(git.master)
+        self.assertGreater(git.last_fetched_at, 0)
+        with Capturing() as output:
+            git.fetch(git.master)
+        self.assertEqual(fetch.call_count, 1)
+        self.assertIn('skipping fetch', output[0])
+
+        git.max_fetch_age = 0
+        git.fetch(git.master)
+        self.assertEqual(fetch.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import argparse
+from helpers.StaticMethods import *
+from clients.BqClient import BqClient
+from modules.DependencyAnalyzer import DependencyAnalyzer
+
+def prepare_args(parser):
+    parser.add_argument(
+        '-c', help='(Optional) Specify one or more Client(s), if not provided all clients will be analyzed (e.g. "bbb, pacsun"')
+    parser.add_argument(
+        '-ic', help='(Optional) Specify one or more Client(s) to ignore, this only works when running for all')
+    parser.add_argument(
+        '-v', help='(Optional) Specify one or more objects to find dependents of (e.g. "ext.vw_name, core.vw_core_thing"), defaults to every versioned view')
+    parser.add_argument(
+        '-o', default='dep_report.csv', help='(Optional) Report file to write (default dep_report.csv)')
+    parser.add_argument(
+        '-ttl', '--metadata_ttl', type=int, default=BqClient.DEFAULT_METADATA_TTL, help=f'(Optional) Max age in seconds of cached project metadata before it is re-fetched from BQ (default {BqClient.DEFAULT_METADATA_TTL}).')
+
+def validate_args(args):
+    if (not args.c):
+        response = input("No client specified. Run for all? (Y/n): ")
+        if not (response.strip().lower() == 'y' or response.strip().lower() == ''):            
+            raise Exception("Invalid response, exiting.")
+
+def main():
+    parser = argparse.ArgumentParser()
+    prepare_args(parser)
+    args = parser.parse_args()
+    validate_args(args)
+
+    clients = arg_to_list(args.c) if args.c else get_all_clients(args.ic)
+    objects = arg_to_list(args.v) if args.v else None
+    DependencyAnalyzer(sorted(clients), objects, args.o, args.metadata_ttl).execute()
+
+if __name__ == "__main__":
+    main()
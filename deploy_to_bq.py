@@ -1,7 +1,11 @@
 # pip install GitPython
 
 import argparse
+import sys
 from helpers.StaticMethods import print_info
+from clients.BqClient import BqClient
+from clients.BqDeploymentClient import BqDeploymentClient
+from clients.GitClient import GitClient
 from modules.BqDeployer import BqDeployer
 
 def prepare_args(parser):
@@ -19,6 +23,22 @@ def prepare_args(parser):
         '-d', '--dev', action='store_true', help='(Optional) If specified, changes will be deployed to dev projects only. If changes are only to non-client objects, -c/--clients is required.')
     parser.add_argument(
         '-p', '--project_id', help='(Optional) Specify an override project_id to deploy to. Used by Dev Mode when the project cannot be determined based on branch name.')
+    parser.add_argument(
+        '-ttl', '--metadata_ttl', type=int, default=BqClient.DEFAULT_METADATA_TTL, help=f'(Optional) Max age in seconds of cached project metadata before it is re-fetched from BQ for listings (default {BqClient.DEFAULT_METADATA_TTL}). Use 0 to always fetch. Definitions are always re-fetched before deploying.')
+    parser.add_argument(
+        '-im', '--incremental_metadata', action='store_true', help='(Optional) When re-fetching metadata (before deploying, or once cached metadata has expired), only re-fetch definitions for objects modified since it was cached.')
+    parser.add_argument(
+        '-w', '--workers', type=int, default=1, help='(Optional) Number of clients to deploy concurrently (default 1). Output is still grouped per client.')
+    parser.add_argument(
+        '-f', '--in_flight', type=int, default=BqDeploymentClient.DEFAULT_MAX_IN_FLIGHT, help=f'(Optional) Max number of objects deployed concurrently within a client (default {BqDeploymentClient.DEFAULT_MAX_IN_FLIGHT}). Objects are still deployed after anything they reference.')
+    parser.add_argument(
+        '-su', '--skip_unchanged', action='store_true', help='(Optional) Skip objects whose definition has not changed since they were last deployed to the project by this tool, without checking BQ.')
+    parser.add_argument(
+        '-fp', '--fetch_policy', default='once', choices=[x.name.lower() for x in GitClient.FetchPolicy], help='(Optional) When to fetch from origin before switching branches: always, once per run (default), target_ref (only the branch being switched to) or fresh (skip if fetched within -fa/--fetch_age seconds).')
+    parser.add_argument(
+        '-fa', '--fetch_age', type=int, default=GitClient.DEFAULT_MAX_FETCH_AGE, help=f'(Optional) Max age in seconds of the last fetch for the fresh fetch policy (default {GitClient.DEFAULT_MAX_FETCH_AGE}).')
+    parser.add_argument(
+        '-nc', '--no_checkout', action='store_true', help='(Optional) Read files to deploy from master\'s commit in git instead of checking out master, so the working tree is never touched.')
     # TODO: Development Mode Considerations
     #   - Do not globally apply core/ext updates DONE
     #   - Allow manual specification of project DONE
@@ -52,13 +72,16 @@ def main():
     elif args.sha:
         mode = BqDeployer.Mode.GIT
         fetch_files_from = args.sha
-    elif args.d or args.dev:
+    elif args.dev:
         mode = BqDeployer.Mode.DEVELOPMENT
     else:
         mode = BqDeployer.Mode.EXAMPLE
 
-    deployer = BqDeployer(mode, fetch_files_from, args.c, args.p)
-    deployer.execute(is_dry_run = not args.go)
+    metadata_refresh = BqClient.RefreshMode.INCREMENTAL if args.incremental_metadata else BqClient.RefreshMode.FULL
+    fetch_policy = GitClient.FetchPolicy[args.fetch_policy.upper()]
+    deployer = BqDeployer(mode, fetch_files_from, args.clients, args.project_id, args.metadata_ttl, metadata_refresh, args.workers, args.in_flight, args.skip_unchanged,
+        fetch_policy, args.fetch_age, args.no_checkout)
+    sys.exit(0 if deployer.execute(is_dry_run = not args.go) else 1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
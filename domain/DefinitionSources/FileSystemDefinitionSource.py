@@ -0,0 +1,7 @@
+from domain.abstracts.DefinitionSource import DefinitionSource
+
+class FileSystemDefinitionSource(DefinitionSource):
+    """Reads files from disk, i.e. whatever is currently checked out"""
+    def read(self, file_path: str) -> str:
+        with open(file_path, 'r') as f:
+            return f.read()
@@ -0,0 +1,69 @@
+import os
+import threading
+from git import Commit
+from domain.abstracts.DefinitionSource import DefinitionSource
+
+class GitTreeDefinitionSource(DefinitionSource):
+    """
+        Reads files from a commit's tree in the git object store, without touching the working tree.
+        Blob content is cached by blob sha across every instance, so a file which is identical in several commits
+            (or copied between clients) is only read from git once.
+        Sources are shared by worker threads, but a repo's object store is one git cat-file process, so every read from
+            git (listing included) is made under the lock.
+    """
+    _blobs: dict[str, str] = dict()
+    _lock = threading.Lock()
+
+    def __init__(self, commit: Commit, sub_path: str = ''):
+        """
+            (Commit, str) -> GitTreeDefinitionSource
+            sub_path (relative to the repo root) limits the tree listing, e.g. to the bq folder.
+        """
+        self.commit = commit
+        self._sub_path = sub_path
+        self._repo_path = commit.repo.working_tree_dir
+        # Path (relative to the repo root) -> blob sha, listed on first read
+        self._blob_shas = None
+
+    def _list_blobs(self) -> dict[str, str]:
+        # One ls-tree for the whole (sub)tree instead of walking tree objects per file
+        output = self.commit.repo.git.ls_tree('-r', '-z', self.commit.hexsha, '--', self._sub_path or '.')
+        blob_shas = dict()
+        for line in output.split('\0'):
+            if not line:
+                continue
+            # "<mode> <type> <sha>\t<path>"
+            info, path = line.split('\t', 1)
+            _, object_type, sha = info.split(' ')
+            if object_type == 'blob':
+                blob_shas[path] = sha
+
+        return blob_shas
+
+    def get_blob_sha(self, file_path: str) -> str:
+        """
+            (str) -> str
+            Returns the sha of the file's blob in the commit, the path may be absolute (within the repo) or relative to the repo root.
+        """
+        if self._blob_shas is None:
+            with self._lock:
+                if self._blob_shas is None:
+                    self._blob_shas = self._list_blobs()
+
+        if os.path.isabs(file_path):
+            file_path = os.path.relpath(file_path, self._repo_path)
+
+        sha = self._blob_shas.get(file_path.replace(os.sep, '/'))
+        if sha is None:
+            raise Exception(f"'{file_path}' does not exist in commit {self.commit.hexsha}")
+
+        return sha
+
+    def read(self, file_path: str) -> str:
+        sha = self.get_blob_sha(file_path)
+        if sha not in self._blobs:
+            with self._lock:
+                if sha not in self._blobs:
+                    self._blobs[sha] = self.commit.repo.odb.stream(bytes.fromhex(sha)).read().decode('utf-8')
+
+        return self._blobs[sha]
@@ -0,0 +1,12 @@
+from domain.abstracts.DefinitionSource import DefinitionSource
+
+class InMemoryDefinitionSource(DefinitionSource):
+    """Serves file content from a dictionary of file path to content, e.g. for generated or test definitions"""
+    def __init__(self, files: dict[str, str] = None):
+        self.files = dict() if files is None else files
+
+    def read(self, file_path: str) -> str:
+        if file_path not in self.files:
+            raise Exception(f"'{file_path}' does not exist in memory")
+
+        return self.files[file_path]
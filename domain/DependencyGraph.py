@@ -0,0 +1,97 @@
+from domain.abstracts.DefinitionSource import DefinitionSource
+from domain.SqlObject import SqlObject
+from parsers.SqlLexer import SqlLexer
+from helpers.StaticMethods import print_fail
+
+class DependencyGraph:
+    """
+        Memoized graph of references between SqlObjects, parsed from their definitions.
+        Each object is only constructed and read from disk once, however many objects reference it,
+            so one instance should be shared for a whole run against a project.
+    """
+    def __init__(self, source: DefinitionSource = None):
+        # Passed on to every SqlObject the graph constructs, None reads from disk
+        self._source = source
+        # Both keyed by fully qualified name (no backticks)
+        self._objects: dict[str, SqlObject] = dict()
+        self._references: dict[str, list[str]] = dict()
+
+    def add_object(self, sql_object: SqlObject) -> None:
+        """
+            (SqlObject) -> None
+            Registers an already constructed object (e.g. one with a known file_path) so it is used instead of a new one.
+        """
+        self._objects.setdefault(sql_object.fully_qualified_name, sql_object)
+
+    def get_object(self, name: str) -> SqlObject:
+        name = name.replace('`', '')
+        if name not in self._objects:
+            self._objects[name] = SqlObject(name, source = self._source)
+
+        return self._objects[name]
+
+    def _parse_references(self, sql_object: SqlObject) -> list[str]:
+        """
+            (SqlObject) -> list[str]
+            Extracts the fully qualified names of objects in the same project referenced by the object's definition.
+        """
+        # Schema files describe tables, which can't reference anything
+        if sql_object.object_type == 'schema':
+            return list()
+
+        try:
+            definition = sql_object.definition
+        except Exception:
+            print_fail(f"Definition for {sql_object.fully_qualified_name} could not be read. Dependency tree will be incomplete. Skipping...")
+            return list()
+
+        references = list()
+        for reference in SqlLexer(definition).references(sql_object.bq_project, {'${color}': 'blue'}):
+            if reference.split('.')[1] == 'temp' or reference == sql_object.fully_qualified_name or reference in references:
+                continue
+
+            references.append(reference)
+
+        return references
+
+    def get_references(self, name: str) -> list[str]:
+        """
+            (str) -> list[str]
+            Returns the objects directly referenced by the named object, parsing it only on first request.
+        """
+        name = name.replace('`', '')
+        if name not in self._references:
+            self._references[name] = self._parse_references(self.get_object(name))
+
+        return self._references[name]
+
+    def get_dependencies(self, name: str) -> list[str]:
+        """
+            (str) -> list[str]
+            Returns every direct and indirect dependency of the named object in topological order,
+                i.e. each object appears after everything it depends on. The object itself is not included.
+            Raises an exception describing the path if a circular reference is found.
+        """
+        name = name.replace('`', '')
+        ordered = list()
+        visited = set()
+        path = list()
+
+        def visit(current: str):
+            if current in path:
+                cycle = path[path.index(current):] + [current]
+                raise Exception(f"Circular reference detected: {' -> '.join(cycle)}")
+            if current in visited:
+                return
+
+            path.append(current)
+            for reference in self.get_references(current):
+                visit(reference)
+            path.pop()
+
+            visited.add(current)
+            ordered.append(current)
+
+        visit(name)
+        # The root is always last
+        return ordered[:-1]
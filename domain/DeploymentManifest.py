@@ -0,0 +1,38 @@
+import json
+import os
+from domain.SqlObject import SqlObject
+from helpers.StaticMethods import get_cache_path, print_warn
+
+class DeploymentManifest:
+    """Per-project record of the rendered definition hash of every object as of its last successful deploy"""
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.file_path = f"{get_cache_path('manifests')}/{project_id}.json"
+        self._hashes: dict[str, str] = dict()
+
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, 'r') as f:
+                    self._hashes = json.load(f)
+            # A corrupt manifest should never stop a deploy, everything is just deployed as changed and it is rewritten on save
+            except (OSError, ValueError):
+                print_warn(f"Deployment manifest {self.file_path} could not be read, starting with an empty one...")
+
+    def is_unchanged(self, sql_object: SqlObject) -> bool:
+        """
+            (SqlObject) -> bool
+            Returns True if the object's rendered definition matches what was last deployed.
+        """
+        return self._hashes.get(sql_object.fully_qualified_name) == sql_object.definition_hash
+
+    def record(self, sql_object: SqlObject) -> None:
+        self._hashes[sql_object.fully_qualified_name] = sql_object.definition_hash
+
+    def forget(self, sql_object: SqlObject) -> None:
+        self._hashes.pop(sql_object.fully_qualified_name, None)
+
+    def save(self) -> None:
+        # Write then rename so that an interrupted save never leaves a corrupt manifest
+        with open(self.file_path + '.tmp', 'w') as f:
+            json.dump(self._hashes, f, indent = 1, sort_keys = True)
+        os.replace(self.file_path + '.tmp', self.file_path)
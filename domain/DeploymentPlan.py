@@ -0,0 +1,73 @@
+import re
+from domain.SqlObject import SqlObject
+
+class DeploymentPlan:
+    """
+        Orders a set of SqlObjects into levels, where each object only references objects in earlier levels.
+        Everything within a level is independent and can be deployed concurrently.
+    """
+    # Within a level, tables/schemas go first, then views, then routines
+    TYPE_ORDER = {'schema': 0, 'table': 0, 'materialized view': 1, 'view': 2, 'function': 3, 'procedure': 4}
+
+    def __init__(self, sql_objects: list[SqlObject], resolve_references = True):
+        """
+            (list<SqlObject>, optional bool) -> DeploymentPlan
+            If resolve_references is False definitions are never read (e.g. deletions, whose files no longer exist)
+                and objects are only ordered by type.
+        """
+        # Keyed by "dataset.object_name" since rendered definitions reference objects that way
+        self._objects = {f"{o.dataset}.{o.object_name}": o for o in sql_objects}
+        self.dependencies = self._build_dependencies() if resolve_references else {name: set() for name in self._objects}
+        self.levels = self._build_levels()
+
+    def _build_dependencies(self) -> dict[str, set[str]]:
+        """
+            (None) -> dict(str, set<str>)
+            Maps each object to the other objects in this plan which its definition references.
+            Only objects in the plan matter here, anything else is assumed to already exist.
+        """
+        dependencies = {name: set() for name in self._objects}
+        if len(self._objects) < 2:
+            return dependencies
+
+        # One pattern for every object in the plan, longest first so e.g. vw_a_0 is never cut short to vw_a
+        names = sorted(self._objects.keys(), key = len, reverse = True)
+        pattern = re.compile(r'(?<![\w-])(' + '|'.join(re.escape(name) for name in names) + r')(?![\w-])')
+
+        for name, sql_object in self._objects.items():
+            # Tables are defined by schema files and can't reference anything
+            if sql_object.object_type == 'schema':
+                continue
+
+            for match in pattern.finditer(sql_object.definition):
+                if match.group(1) != name:
+                    dependencies[name].add(match.group(1))
+
+        return dependencies
+
+    def _build_levels(self) -> list[list[SqlObject]]:
+        """
+            (None) -> list<list<SqlObject>>
+            Kahn's algorithm, grouping objects by the depth at which all of their dependencies are satisfied.
+        """
+        remaining = {name: set(deps) for name, deps in self.dependencies.items()}
+        levels = list()
+
+        while len(remaining) > 0:
+            ready = [name for name, deps in remaining.items() if len(deps) == 0]
+            if len(ready) == 0:
+                raise Exception(f"Circular reference detected between: {', '.join(sorted(remaining.keys()))}")
+
+            for name in ready:
+                remaining.pop(name)
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+            level = [self._objects[name] for name in ready]
+            level.sort(key = lambda o: (self.TYPE_ORDER.get(o.object_type, len(self.TYPE_ORDER)), o.fully_qualified_name))
+            levels.append(level)
+
+        return levels
+
+    def __len__(self):
+        return len(self._objects)
@@ -0,0 +1,112 @@
+import glob
+import gzip
+import json
+import os
+import time
+from helpers.StaticMethods import get_cache_path
+
+class MetadataSnapshot:
+    """Point in time copy of a project's views, tables and routines (with definitions), persisted locally between runs"""
+    def __init__(self, project_id: str, created_at: float = None):
+        self.project_id = project_id
+        self.created_at = time.time() if created_at is None else created_at
+        # BQ time (epoch millis) at which this snapshot's contents were last queried, used for incremental refreshes
+        self.watermark: int = None
+
+        # All keys are "dataset.object_name", matching what INFORMATION_SCHEMA gives us
+        self.views: dict[str, str] = dict()
+        self.tables: set[str] = set()
+        # Values are (routine_type, definition)
+        self.routines: dict[str, tuple[str, str]] = dict()
+        self._views_and_tables = set()
+
+    @property
+    def views_and_tables(self) -> set[str]:
+        return self._views_and_tables
+
+    def add_view(self, full_name: str, definition: str) -> None:
+        self.views[full_name] = definition
+        self._views_and_tables.add(full_name)
+
+    def add_table(self, full_name: str) -> None:
+        self.tables.add(full_name)
+        self._views_and_tables.add(full_name)
+
+    def add_routine(self, full_name: str, routine_type: str, definition: str) -> None:
+        self.routines[full_name] = (routine_type, definition)
+
+    def remove(self, full_name: str) -> None:
+        self.views.pop(full_name, None)
+        self.routines.pop(full_name, None)
+        self.tables.discard(full_name)
+        self._views_and_tables.discard(full_name)
+
+    def is_expired(self, ttl: float) -> bool:
+        """
+            (float) -> bool
+            Returns True if this snapshot is older than the provided ttl (in seconds).
+        """
+        return (time.time() - self.created_at) >= ttl
+
+    @staticmethod
+    def _get_snapshot_files(project_id: str) -> list[str]:
+        """
+            (str) -> list[str]
+            Returns all snapshot files persisted for the provided project, newest first.
+        """
+        files = glob.glob(f"{get_cache_path('metadata')}/{project_id}.*.json.gz")
+        return sorted(files, key = lambda f: int(f.split('.')[-3]), reverse = True)
+
+    def save(self) -> str:
+        """
+            (None) -> str
+            Persists the snapshot to the local cache, keyed by project and timestamp, and removes any older snapshots.
+        """
+        file_path = f"{get_cache_path('metadata')}/{self.project_id}.{int(self.created_at)}.json.gz"
+        content = {
+            "project_id": self.project_id,
+            "created_at": self.created_at,
+            "watermark": self.watermark,
+            "views": self.views,
+            "tables": list(self.tables),
+            "routines": self.routines
+        }
+
+        # Write then rename so that a concurrent reader never sees a partial file
+        with gzip.open(file_path + '.tmp', 'wt', encoding = 'utf-8') as f:
+            json.dump(content, f, separators = (',', ':'))
+        os.replace(file_path + '.tmp', file_path)
+
+        for old_file in self._get_snapshot_files(self.project_id):
+            if old_file != file_path:
+                os.remove(old_file)
+
+        return file_path
+
+    @classmethod
+    def load(cls, project_id: str):
+        """
+            (str) -> MetadataSnapshot
+            Loads the most recent persisted snapshot for the provided project, returns None if there isn't one.
+        """
+        files = cls._get_snapshot_files(project_id)
+        if len(files) == 0:
+            return None
+
+        try:
+            with gzip.open(files[0], 'rt', encoding = 'utf-8') as f:
+                content = json.load(f)
+        # A corrupt cache file should never stop a deploy, just fetch fresh
+        except (OSError, ValueError):
+            return None
+
+        snapshot = cls(content['project_id'], content['created_at'])
+        snapshot.watermark = content.get('watermark')
+        for full_name, definition in content['views'].items():
+            snapshot.add_view(full_name, definition)
+        for full_name in content['tables']:
+            snapshot.add_table(full_name)
+        for full_name, (routine_type, definition) in content['routines'].items():
+            snapshot.add_routine(full_name, routine_type, definition)
+
+        return snapshot
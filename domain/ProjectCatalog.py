@@ -0,0 +1,146 @@
+from array import array
+from enum import Enum
+
+class ProjectCatalog:
+    """
+        Names, types and (optionally) definitions of every table, view and routine in a project, as returned by one
+            INFORMATION_SCHEMA query.
+        Stored as columns rather than an object per row: dataset names are kept once and referenced by position, and
+            types are one byte each, so a project with tens of thousands of objects stays small.
+        Routines are named separately from tables and views, so a routine can share a "dataset.object_name" with one.
+    """
+    class ObjectType(Enum):
+        TABLE = 0
+        VIEW = 1
+        MATERIALIZED_VIEW = 2
+        FUNCTION = 3
+        PROCEDURE = 4
+        # A table_type this catalog doesn't know
+        OTHER = 5
+        # A routine_type this catalog doesn't know, kept apart so it's never mistaken for a table
+        OTHER_ROUTINE = 6
+
+    ROUTINE_TYPES = [ObjectType.FUNCTION, ObjectType.PROCEDURE, ObjectType.OTHER_ROUTINE]
+
+    # INFORMATION_SCHEMA table_type values
+    _table_type_names = {
+        'BASE TABLE': ObjectType.TABLE,
+        'EXTERNAL': ObjectType.TABLE,
+        'SNAPSHOT': ObjectType.TABLE,
+        'CLONE': ObjectType.TABLE,
+        'VIEW': ObjectType.VIEW,
+        'MATERIALIZED VIEW': ObjectType.MATERIALIZED_VIEW
+    }
+
+    # INFORMATION_SCHEMA routine_type values
+    _routine_type_names = {
+        'SCALAR FUNCTION': ObjectType.FUNCTION,
+        'TABLE FUNCTION': ObjectType.FUNCTION,
+        'AGGREGATE FUNCTION': ObjectType.FUNCTION,
+        'FUNCTION': ObjectType.FUNCTION,
+        'PROCEDURE': ObjectType.PROCEDURE
+    }
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self._datasets: list[str] = list()
+        self._dataset_positions: dict[str, int] = dict()
+
+        # One entry per object, all in the same order
+        self._dataset_column = array('I')
+        self._name_column: list[str] = list()
+        self._type_column = bytearray()
+        self._definition_column: list[str] = list()
+
+        # "dataset.object_name" -> row for tables/views and for routines, also used to drop the duplicates
+        #   INFORMATION_SCHEMA sometimes gives
+        self._rows: dict[str, int] = dict()
+        self._routine_rows: dict[str, int] = dict()
+
+    @classmethod
+    def get_object_type(cls, type_name: str, is_routine = False):
+        """
+            (str, optional bool) -> ObjectType
+            Maps an INFORMATION_SCHEMA table_type, or routine_type when is_routine, to an ObjectType.
+        """
+        type_name = (type_name or '').upper()
+        if is_routine:
+            return cls._routine_type_names.get(type_name, cls.ObjectType.OTHER_ROUTINE)
+
+        return cls._table_type_names.get(type_name, cls.ObjectType.OTHER)
+
+    def add(self, dataset: str, name: str, object_type: ObjectType, definition: str = None) -> None:
+        full_name = f"{dataset}.{name}"
+        rows = self._routine_rows if object_type in self.ROUTINE_TYPES else self._rows
+        if full_name in rows:
+            return
+
+        if dataset not in self._dataset_positions:
+            self._dataset_positions[dataset] = len(self._datasets)
+            self._datasets.append(dataset)
+
+        rows[full_name] = len(self._name_column)
+        self._dataset_column.append(self._dataset_positions[dataset])
+        self._name_column.append(name)
+        self._type_column.append(object_type.value)
+        self._definition_column.append(definition)
+
+    def __len__(self) -> int:
+        return len(self._name_column)
+
+    def __contains__(self, full_name: str) -> bool:
+        return full_name in self._rows or full_name in self._routine_rows
+
+    @property
+    def datasets(self) -> list[str]:
+        """Datasets containing at least one object, in the order first seen"""
+        return list(self._datasets)
+
+    def _full_name(self, row: int) -> str:
+        return f"{self._datasets[self._dataset_column[row]]}.{self._name_column[row]}"
+
+    def _get_row(self, full_name: str) -> int:
+        # A table or view wins over a routine of the same name, as it's what a FROM clause refers to
+        return self._rows.get(full_name, self._routine_rows.get(full_name))
+
+    def get_type(self, full_name: str) -> ObjectType:
+        row = self._get_row(full_name)
+        return None if row is None else self.ObjectType(self._type_column[row])
+
+    def get_definition(self, full_name: str) -> str:
+        row = self._get_row(full_name)
+        return None if row is None else self._definition_column[row]
+
+    def _get_rows(self, object_types: list[ObjectType] = None, datasets: list[str] = None, prefix: str = '') -> list[int]:
+        type_values = None if object_types is None else set([object_type.value for object_type in object_types])
+        dataset_positions = None if datasets is None else \
+            set([self._dataset_positions[dataset] for dataset in datasets if dataset in self._dataset_positions])
+
+        rows = list()
+        for row, name in enumerate(self._name_column):
+            if type_values is not None and self._type_column[row] not in type_values:
+                continue
+            if dataset_positions is not None and self._dataset_column[row] not in dataset_positions:
+                continue
+            if name.startswith(prefix):
+                rows.append(row)
+
+        return rows
+
+    def get_names(self, object_types: list[ObjectType] = None, datasets: list[str] = None, prefix: str = '') -> list[str]:
+        """
+            (optional list[ObjectType], optional list[str], optional str) -> list[str]
+            Returns the "dataset.object_name" of every object matching all of the provided filters,
+                prefix applies to the object name (e.g. 'vvw').
+        """
+        return [self._full_name(row) for row in self._get_rows(object_types, datasets, prefix)]
+
+    def get_definitions(self, object_types: list[ObjectType] = None) -> dict[str, str]:
+        """
+            (optional list[ObjectType]) -> dict(str, str)
+            Returns "dataset.object_name" -> definition for every object of the provided types which has one.
+        """
+        return {
+            self._full_name(row): self._definition_column[row] for row in self._get_rows(object_types)
+            if self._definition_column[row] is not None
+        }
@@ -0,0 +1,149 @@
+import json
+import os
+from helpers.StaticMethods import get_bq_path, get_cache_path
+from parsers.SqlLexer import SqlLexer
+
+class ReferenceIndex:
+    """
+        Forward and reverse index of references between every object in the mono repo's bq folder, per client.
+        Built in one pass over the folder and persisted locally, later refreshes only re-read files whose mtime changed.
+        All object names are "dataset.object_name", as everything referenced via ${project} lives in the client's project.
+    """
+    # Client key for objects in the shared (core/ext) folders, which apply to every client unless overridden
+    GLOBAL = 'global'
+
+    def __init__(self, bq_path: str = None, cache_file: str = None):
+        self._bq_path = get_bq_path() if bq_path is None else bq_path
+        self._cache_file = f"{get_cache_path()}/reference_index.json" if cache_file is None else cache_file
+        # Keyed by path relative to the bq folder, values are {"mtime", "client", "name", "references"}
+        self._files: dict[str, dict] = dict()
+        # Per client (forward, reverse) indexes, built on first use
+        self._client_indexes: dict[str, tuple] = dict()
+        self.refresh()
+
+    def _load(self) -> dict[str, dict]:
+        if not os.path.exists(self._cache_file):
+            return dict()
+
+        try:
+            with open(self._cache_file, 'r') as f:
+                content = json.load(f)
+        # A corrupt cache just means a full rebuild
+        except ValueError:
+            return dict()
+
+        return content['files'] if content.get('bq_path') == self._bq_path else dict()
+
+    def _save(self) -> None:
+        with open(self._cache_file + '.tmp', 'w') as f:
+            json.dump({"bq_path": self._bq_path, "files": self._files}, f, separators = (',', ':'))
+        os.replace(self._cache_file + '.tmp', self._cache_file)
+
+    def _parse_references(self, definition: str, dataset: str, object_name: str) -> list[str]:
+        """
+            (str, str, str) -> list[str]
+            Extracts every ${project} reference from a raw (un-rendered) definition.
+        """
+        references = list()
+        lexer = SqlLexer(definition)
+        for qualified_reference in lexer.references('${project}', {'${dataset}': dataset, '${color}': 'blue'}):
+            # Drop the ${project} prefix, everything in the index is within the client's project
+            reference = qualified_reference.split('.', 1)[1]
+            if reference.split('.')[0] == 'temp' or reference == f"{dataset}.{object_name}" or reference in references:
+                continue
+            references.append(reference)
+
+        return references
+
+    def _parse_file(self, file_path: str, client: str, dataset: str, mtime: float) -> dict:
+        object_name = os.path.basename(file_path)[:-4]
+        with open(file_path, 'r') as f:
+            definition = f.read()
+
+        return {
+            "mtime": mtime,
+            "client": client,
+            "name": f"{dataset}.{object_name}",
+            "references": self._parse_references(definition, dataset, object_name)
+        }
+
+    def refresh(self) -> int:
+        """
+            (None) -> int
+            Walks the bq folder, re-parsing only new or modified files, and returns the number of files parsed.
+        """
+        cached = self._load()
+        files = dict()
+        parsed_count = 0
+
+        for root, _, file_names in os.walk(self._bq_path):
+            for file_name in file_names:
+                if file_name[-4:] != '.sql':
+                    continue
+
+                file_path = os.path.join(root, file_name)
+                relative_path = os.path.relpath(file_path, self._bq_path)
+                # Expected layouts: dataset/object type/file (global) or client/dataset/object type/file
+                parts = relative_path.split(os.sep)
+                if len(parts) == 3:
+                    client, dataset = self.GLOBAL, parts[0]
+                elif len(parts) == 4:
+                    client, dataset = parts[0], parts[1]
+                else:
+                    continue
+
+                mtime = os.stat(file_path).st_mtime
+                entry = cached.get(relative_path)
+                if entry is None or entry['mtime'] != mtime:
+                    entry = self._parse_file(file_path, client, dataset, mtime)
+                    parsed_count += 1
+                files[relative_path] = entry
+
+        is_changed = parsed_count > 0 or len(files) != len(cached)
+        self._files = files
+        self._client_indexes = dict()
+        if is_changed:
+            self._save()
+
+        return parsed_count
+
+    @property
+    def clients(self) -> set[str]:
+        return set([entry['client'] for entry in self._files.values()]) - {self.GLOBAL}
+
+    def _get_client_index(self, client: str) -> tuple:
+        """
+            (str) -> (dict(str, list<str>), dict(str, set<str>))
+            Returns (forward, reverse) references for the client, client files override global ones of the same name.
+        """
+        if client not in self._client_indexes:
+            forward = dict()
+            for entry in self._files.values():
+                if entry['client'] == self.GLOBAL:
+                    forward.setdefault(entry['name'], entry['references'])
+            for entry in self._files.values():
+                if entry['client'] == client and client != self.GLOBAL:
+                    forward[entry['name']] = entry['references']
+
+            reverse = dict()
+            for name, references in forward.items():
+                for reference in references:
+                    reverse.setdefault(reference, set()).add(name)
+
+            self._client_indexes[client] = (forward, reverse)
+
+        return self._client_indexes[client]
+
+    def get_references(self, client: str, name: str) -> list[str]:
+        """
+            (str, str) -> list[str]
+            Returns the objects directly referenced by the named object (dataset.object_name) for the client.
+        """
+        return self._get_client_index(client)[0].get(name, list())
+
+    def get_referenced_by(self, client: str, name: str) -> set[str]:
+        """
+            (str, str) -> set[str]
+            Returns the objects which directly reference the named object (dataset.object_name) for the client.
+        """
+        return self._get_client_index(client)[1].get(name, set())
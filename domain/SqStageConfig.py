@@ -0,0 +1,82 @@
+from enum import Enum
+
+class SqStageConfig:
+    """
+        The staged scheduled query config (which stage each scheduled query runs in, and its status), indexed by name
+            and by stage. Each stage keeps a count of its outstanding (pending or processing) scheduled queries, so
+            checking whether a stage is complete never scans the config.
+    """
+    class Status(Enum):
+        PENDING = 'pending'
+        PROCESSING = 'processing'
+        SUCCESS = 'success'
+        FAILED = 'failed'
+
+    _outstanding_statuses = [Status.PENDING, Status.PROCESSING]
+    # Rows are loaded per event when writing through, a dict lookup is much cheaper than Status(value)
+    _statuses_by_value = {status.value: status for status in Status}
+
+    def __init__(self, rows: list[tuple] = []):
+        """
+            (list<(str, int, str)>) -> SqStageConfig
+            rows are (transfer config name, stage, status).
+        """
+        self._stages: dict[str, int] = dict()
+        self._statuses: dict[str, SqStageConfig.Status] = dict()
+        self._names_by_stage: dict[int, list[str]] = dict()
+        self._outstanding: dict[int, int] = dict()
+        # Started but not finished, unlike pending
+        self._processing: dict[int, int] = dict()
+
+        for name, stage, status in rows:
+            self.add(name, stage, self._statuses_by_value[status] if status else self.Status.PENDING)
+
+    def add(self, name: str, stage: int, status: Status) -> None:
+        self._stages[name] = stage
+        self._statuses[name] = status
+        self._names_by_stage.setdefault(stage, list()).append(name)
+        self._outstanding.setdefault(stage, 0)
+        self._processing.setdefault(stage, 0)
+        if status in self._outstanding_statuses:
+            self._outstanding[stage] += 1
+        if status == self.Status.PROCESSING:
+            self._processing[stage] += 1
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._stages
+
+    def get_stage(self, name: str) -> int:
+        return self._stages[name]
+
+    def get_status(self, name: str) -> Status:
+        return self._statuses[name]
+
+    def get_names(self, stage: int) -> list[str]:
+        return list(self._names_by_stage.get(stage, list()))
+
+    def get_next_stage(self, stage: int) -> int:
+        """
+            (int) -> int
+            Returns the stage which runs after the provided one, or None if it's the last.
+        """
+        later = [x for x in self._names_by_stage if x > stage]
+        return min(later) if later else None
+
+    def is_stage_complete(self, stage: int) -> bool:
+        return self._outstanding.get(stage, 0) == 0
+
+    def get_running_stages(self) -> list[int]:
+        """
+            (None) -> list<int>
+            Returns the stages with any scheduled queries currently processing, pending ones haven't been started.
+        """
+        return sorted([stage for stage, processing in self._processing.items() if processing > 0])
+
+    def has_failures(self, stage: int) -> bool:
+        return any([self._statuses[name] == self.Status.FAILED for name in self._names_by_stage.get(stage, list())])
+
+    def set_status(self, name: str, status: Status) -> None:
+        stage = self._stages[name]
+        self._outstanding[stage] += int(status in self._outstanding_statuses) - int(self._statuses[name] in self._outstanding_statuses)
+        self._processing[stage] += int(status == self.Status.PROCESSING) - int(self._statuses[name] == self.Status.PROCESSING)
+        self._statuses[name] = status
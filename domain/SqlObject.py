@@ -5,14 +5,18 @@ from google.cloud.bigquery import RoutineType
 from google.cloud import bigquery, bigquery_v2
 
 from pyparsing import Generator
-from helpers.StaticMethods import get_bq_path
+from helpers.StaticMethods import get_bq_path, hash_sql
+from domain.abstracts.DefinitionSource import DefinitionSource
+from domain.DefinitionSources.FileSystemDefinitionSource import FileSystemDefinitionSource
 from google.cloud.bigquery import SchemaField
 
 class SqlObject:
     def __init__(
         self,
         fully_qualified_name: str,
-        definition: str = None
+        definition: str = None,
+        file_path: str = None,
+        source: DefinitionSource = None
     ):
         self.return_type = None
         self.args = list()
@@ -32,11 +36,14 @@ class SqlObject:
         if not (self.object_name[-2:] == '_0' or self.dataset == 'core'):
             client_root += '/' + self.client_name
 
-        self.file_path = \
+        # The path can't always be derived from the name (e.g. dev projects), so allow callers who know it to provide it
+        self.file_path = file_path if file_path else \
             f"{client_root}/{self.dataset}/{self.object_type}/{self.object_name}"+ \
             f"{'.json' if self.object_type =='schema' else '.sql'}"
 
         self._definition = '' if definition is None else definition
+        # Where the file is read from, e.g. a git commit rather than the working tree
+        self.source = FileSystemDefinitionSource() if source is None else source
 
     def __eq__(self, obj):
         if not(isinstance(obj, SqlObject)):
@@ -75,8 +82,7 @@ class SqlObject:
 
     def _init_definition(self):
         try:
-            with open(self.file_path, 'r') as f:
-                self._definition = f.read()                    
+            self._definition = self.source.read(self.file_path)
                 
             self._definition = self._definition.replace("${project}", self.bq_project)\
                 .replace("${dataset}", self.dataset)
@@ -119,6 +125,11 @@ class SqlObject:
         doc="The definition property."
     )
 
+    @property
+    def definition_hash(self) -> str:
+        """Content hash of the rendered (templates substituted) definition, ignoring formatting and comments"""
+        return hash_sql(self.definition)
+
     def __hash__(self):
         return hash(self.fully_qualified_name)
 
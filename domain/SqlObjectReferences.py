@@ -1,75 +1,53 @@
-from email import generator
-import re
 from anytree import Node, RenderTree
 
 from helpers.StaticMethods import *
 from helpers.PrintColors import *
+from domain.DependencyGraph import DependencyGraph
+from domain.ReferenceIndex import ReferenceIndex
 from domain.SqlObject import *
 
 class SqlObjectReferences:
-    def __init__(self, root_object: SqlObject):
-        self.refs = dict()
+    def __init__(self, root_object: SqlObject, graph: DependencyGraph = None, index: ReferenceIndex = None):
         self._root_object = root_object
+        # Pass in a shared graph so that common dependencies are only parsed once per run
+        self._graph = DependencyGraph() if graph is None else graph
+        self._graph.add_object(self._root_object)
+        # Only built (or loaded from disk) when parents are requested
+        self._index = index
 
-        self._children = Node(self._root_object.fully_qualified_name)
-        self._parse_children(self._children)
-
-    # TODO: implement this
-    def _parse_parents(self, object_name: str, definition: str) -> None:
-        raise Exception("Not Implemented Yet")
-
-    def _parse_children(self, base_node: Node) -> None:
-        if self._children.name == '':
-            self._children = Node(self._root_object.fully_qualified_name)
+    def _parse_parents(self) -> list[str]:
+        '''
+            Returns the fully qualified names of all objects in the repo which directly reference the root object
+        '''
+        if self._index is None:
+            self._index = ReferenceIndex()
+
+        project = self._root_object.bq_project
+        name = f"{self._root_object.dataset}.{self._root_object.object_name}"
+        return [f"{project}.{parent}" for parent in sorted(self._index.get_referenced_by(self._root_object.client_name, name))]
+
+    def _build_tree(self, name: str, parent: Node = None) -> Node:
+        node = Node(name, parent = parent)
+        for reference in self._graph.get_references(name):
+            # Don't follow circular references, get_children reports them
+            if reference in [ancestor.name for ancestor in node.path]:
+                continue
+            self._build_tree(reference, node)
 
-        references = list(self._get_referenced_objects(base_node.name))
-        for reference in references:
-            child_node = Node(reference, parent = base_node)
-            self._parse_children(child_node)
+        return node
 
     def print_children(self) -> None:
-        for pre, fill, node in RenderTree(self._children):
+        for pre, fill, node in RenderTree(self._build_tree(self._root_object.fully_qualified_name)):
             print("%s%s" % (pre, node.name))
 
-    def _add_reference(self, reference, referencee) -> None:
-        if reference not in self.refs:
-            self.refs[reference] = list()
-
-        self.refs[reference].append(referencee)
-
-    def _get_referenced_objects(self, object_name: str) -> generator:
-        obj = SqlObject(f"{object_name}")
-        try:
-            words = obj.definition.split(' ')
-        except:
-            print_fail(f"Definition for {object_name} could not be read. Dependency tree will be incomplete. Skipping...")
-            return
-
-        object_references = list(filter(lambda w: '${project}' in w and 'temp.' not in w, words))
-        for ref in object_references:
-            reference = ref.replace('${dataset}', obj.dataset). \
-                replace('`','').replace('${color}', 'blue'). \
-                    replace("${project}", f"souncommerce-client-{self._root_object.client_name}").\
-                        replace('\n', '')
-
-            reference = re.sub(r'([a-zA-Z_0-9\.\-\*]+).*', r'\1', reference)
-
-            if reference == object_name:
-                continue
-
-            yield reference
-
-    def _flatten_tree(self, tree: Node) -> list:
-        depth = tree.height
-        while depth >= 0:
-            descendants = list(filter(lambda d: d.depth == depth, tree.descendants))
-            for descendant in descendants:
-                yield descendant.name
-
-            depth -= 1
+    def get_children(self) -> list[str]:
+        '''
+            Returns all dependencies of the root object, ordered so that each appears after everything it depends on
+        '''
+        return self._graph.get_dependencies(self._root_object.fully_qualified_name)
 
-    def get_children(self) -> set[str]:
+    def get_parents(self) -> list[str]:
         '''
-            Parses Children to return a set of dependencies, ordered by depth in the dependency order
+            Returns all objects which directly reference the root object
         '''
-        return set(self._flatten_tree(self._children))
\ No newline at end of file
+        return self._parse_parents()
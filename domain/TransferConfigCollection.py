@@ -0,0 +1,108 @@
+from typing import Callable, Iterable
+from google.cloud.bigquery_datatransfer_v1.types.transfer import TransferConfig
+
+class TransferConfigCollection:
+    """
+        Lazily listed collection of a project's transfer configs.
+        Nothing is requested until first use, iterating pulls pages only as far as it gets, and everything is kept
+            once listed so it's never requested twice. Lookups use indexes built (once) over the full list.
+    """
+    # Functions giving each indexed value of a config
+    _index_keys = {
+        'name': lambda config: config.name,
+        'display_name': lambda config: config.display_name,
+        'data_source_id': lambda config: config.data_source_id,
+        'state': lambda config: config.state,
+        # List responses don't include owner_info, so this is '' for configs which haven't been fetched individually
+        'owner': lambda config: config.owner_info.email
+    }
+
+    def __init__(self, list_configs: Callable[[], Iterable[TransferConfig]]):
+        """
+            (() -> Iterable[TransferConfig]) -> TransferConfigCollection
+            list_configs is only called on first use, e.g. lambda: instance.list_transfer_configs(parent=parent)
+        """
+        self._list_configs = list_configs
+        self._configs: list[TransferConfig] = list()
+        self._pager = None
+        self._is_materialized = False
+        # Index name -> indexed value -> configs, built on first lookup
+        self._indexes: dict[str, dict] = None
+
+    def __iter__(self):
+        i = 0
+        while True:
+            if i < len(self._configs):
+                yield self._configs[i]
+                i += 1
+                continue
+            elif self._is_materialized:
+                return
+
+            if self._pager is None:
+                self._pager = iter(self._list_configs())
+            try:
+                self._configs.append(next(self._pager))
+            except StopIteration:
+                self._pager = None
+                self._is_materialized = True
+
+    def __len__(self) -> int:
+        self._materialize()
+        return len(self._configs)
+
+    def _materialize(self) -> None:
+        if not self._is_materialized:
+            for _ in self:
+                pass
+
+    def _get_index(self, index_name: str) -> dict:
+        if self._indexes is None:
+            self._materialize()
+            self._indexes = {name: dict() for name in self._index_keys}
+            for config in self._configs:
+                for name, get_key in self._index_keys.items():
+                    self._indexes[name].setdefault(get_key(config), list()).append(config)
+
+        return self._indexes[index_name]
+
+    def _find(self, index_name: str, values: tuple) -> list[TransferConfig]:
+        """
+            (str, tuple) -> list[TransferConfig]
+            Returns the configs with any of the values, in the order of the values. A repeated value (e.g. the same
+                display name twice in a schedule file) only returns its configs once.
+        """
+        index = self._get_index(index_name)
+        return [config for value in dict.fromkeys(values) for config in index.get(value, list())]
+
+    def get(self, name: str) -> TransferConfig:
+        """
+            (str) -> TransferConfig
+            Returns the config with the given resource name, or None.
+        """
+        configs = self._get_index('name').get(name)
+        return configs[0] if configs else None
+
+    def find_by_display_name(self, *display_names: str) -> list[TransferConfig]:
+        return self._find('display_name', display_names)
+
+    def find_by_data_source(self, *data_source_ids: str) -> list[TransferConfig]:
+        return self._find('data_source_id', data_source_ids)
+
+    def find_by_state(self, *states) -> list[TransferConfig]:
+        return self._find('state', states)
+
+    def find_by_owner(self, *emails: str) -> list[TransferConfig]:
+        return self._find('owner', emails)
+
+    def replace(self, config: TransferConfig) -> None:
+        """
+            (TransferConfig) -> None
+            Replaces the listed config of the same name (e.g. with its updated version), indexes are rebuilt on next lookup.
+        """
+        self._materialize()
+        for i, existing in enumerate(self._configs):
+            if existing.name == config.name:
+                self._configs[i] = config
+                self._indexes = None
+                return
@@ -0,0 +1,11 @@
+import abc
+
+class DefinitionSource(metaclass=abc.ABCMeta):
+    """Where SqlObjects read the raw (un-rendered) content of their files from"""
+    @abc.abstractmethod
+    def read(self, file_path: str) -> str:
+        """
+            (str) -> str
+            Returns the raw content of the file, raising an exception if it does not exist.
+        """
+        pass
@@ -0,0 +1,73 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from domain.DefinitionSources.GitTreeDefinitionSource import GitTreeDefinitionSource
+from domain.DefinitionSources.InMemoryDefinitionSource import InMemoryDefinitionSource
+from domain.SqlObject import SqlObject
+from git import Repo
+import tempfile
+import threading
+import unittest
+
+class TestDefinitionSources(unittest.TestCase):
+    def test_in_memory_definition_is_rendered(self):
+        source = InMemoryDefinitionSource({'/bq/ext/view/vw_a.sql': "select * from `${project}.${dataset}.vw_b`"})
+        sql_object = SqlObject('soundcommerce-client-unittest.ext.vw_a', file_path = '/bq/ext/view/vw_a.sql', source = source)
+
+        self.assertEqual(sql_object.definition, "select * from `soundcommerce-client-unittest.ext.vw_b`")
+
+    def test_git_tree_reads_commit_not_working_tree(self):
+        with tempfile.TemporaryDirectory() as repo_path:
+            repo = Repo.init(repo_path)
+            os.makedirs(f"{repo_path}/bq/ext/view")
+            for file_name in ['vw_a.sql', 'vw_b.sql']:
+                with open(f"{repo_path}/bq/ext/view/{file_name}", 'w') as f:
+                    f.write("select 1 as num")
+            repo.index.add(['bq/ext/view/vw_a.sql', 'bq/ext/view/vw_b.sql'])
+            commit = repo.index.commit('initial')
+
+            with open(f"{repo_path}/bq/ext/view/vw_a.sql", 'w') as f:
+                f.write("select 2 as num")
+            source = GitTreeDefinitionSource(commit, 'bq')
+
+            self.assertEqual(source.read(f"{repo_path}/bq/ext/view/vw_a.sql"), "select 1 as num")
+            # Identical files share a blob
+            self.assertEqual(source.get_blob_sha('bq/ext/view/vw_a.sql'), source.get_blob_sha('bq/ext/view/vw_b.sql'))
+            with self.assertRaises(Exception):
+                source.read('bq/ext/view/vw_missing.sql')
+
+    def test_git_tree_concurrent_reads(self):
+        with tempfile.TemporaryDirectory() as repo_path:
+            repo = Repo.init(repo_path)
+            os.makedirs(f"{repo_path}/bq/ext/view")
+            file_paths = [f"bq/ext/view/vw_{i}.sql" for i in range(200)]
+            for i, file_path in enumerate(file_paths):
+                with open(f"{repo_path}/{file_path}", 'w') as f:
+                    f.write(f"select {i} as num, 'concurrent' as test")
+            repo.index.add(file_paths)
+            source = GitTreeDefinitionSource(repo.index.commit('initial'), 'bq')
+
+            # Shared by worker threads as in a no_checkout deploy, the threads are daemons so a hang fails rather than blocks
+            results, errors = dict(), list()
+            def read(thread_number: int):
+                try:
+                    for file_path in file_paths[thread_number::8]:
+                        results[file_path] = source.read(file_path)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target = read, args = (i,), daemon = True) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout = 30)
+
+            self.assertFalse(any([thread.is_alive() for thread in threads]), "Concurrent reads did not finish")
+            self.assertEqual(errors, [])
+            self.assertEqual([results[file_path] for file_path in file_paths], [f"select {i} as num, 'concurrent' as test" for i in range(200)])
+
+if __name__ == '__main__':
+    unittest.main()
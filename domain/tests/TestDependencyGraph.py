@@ -0,0 +1,69 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from domain.DependencyGraph import DependencyGraph
+from domain.SqlObject import SqlObject
+import unittest
+from unittest import mock
+
+class TestDependencyGraph(unittest.TestCase):
+    project = 'soundcommerce-client-unittest'
+
+    def _graph(self, definitions: dict[str, str]) -> DependencyGraph:
+        graph = DependencyGraph()
+        for name, definition in definitions.items():
+            graph.add_object(SqlObject(f"{self.project}.{name}", definition = definition))
+        return graph
+
+    def _name(self, name: str) -> str:
+        return f"{self.project}.{name}"
+
+    def test_dependencies_are_topologically_ordered(self):
+        graph = self._graph({
+            'ext.vw_top': f"select * from `{self.project}.ext.vw_middle` join `{self.project}.core.vw_shared`",
+            'ext.vw_middle': f"select * from `{self.project}.core.vw_shared`",
+            'core.vw_shared': "select 1 as num"
+        })
+
+        self.assertEqual(graph.get_dependencies(self._name('ext.vw_top')), [
+            self._name('core.vw_shared'),
+            self._name('ext.vw_middle')
+        ])
+
+    def test_shared_dependencies_are_parsed_once(self):
+        graph = self._graph({
+            'ext.vw_a': f"select * from `{self.project}.core.vw_shared`",
+            'ext.vw_b': f"select * from `{self.project}.core.vw_shared`",
+            'core.vw_shared': "select 1 as num"
+        })
+
+        with mock.patch.object(graph, '_parse_references', wraps = graph._parse_references) as parse:
+            graph.get_dependencies(self._name('ext.vw_a'))
+            graph.get_dependencies(self._name('ext.vw_b'))
+
+        parsed = [call.args[0].fully_qualified_name for call in parse.call_args_list]
+        self.assertEqual(parsed.count(self._name('core.vw_shared')), 1)
+        self.assertEqual(len(parsed), 3)
+
+    def test_temp_and_self_references_are_ignored(self):
+        graph = self._graph({
+            'ext.vw_a': f"select * from `{self.project}.temp.scratch` union all select * from `{self.project}.ext.vw_a`"
+        })
+
+        self.assertEqual(graph.get_references(self._name('ext.vw_a')), [])
+
+    def test_circular_reference_reports_path(self):
+        graph = self._graph({
+            'ext.vw_a': f"select * from `{self.project}.ext.vw_b`",
+            'ext.vw_b': f"select * from `{self.project}.ext.vw_a`"
+        })
+
+        with self.assertRaises(Exception) as context:
+            graph.get_dependencies(self._name('ext.vw_a'))
+        self.assertIn(f"{self._name('ext.vw_a')} -> {self._name('ext.vw_b')} -> {self._name('ext.vw_a')}", str(context.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from domain.DeploymentManifest import DeploymentManifest
+from domain.SqlObject import SqlObject
+from unittest import mock
+import tempfile
+import unittest
+
+class TestDeploymentManifest(unittest.TestCase):
+    def setUp(self):
+        # get_cache_path is under the home folder, keep the real cache out of it
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.home = mock.patch.dict(os.environ, {'HOME': self.temp_dir.name})
+        self.home.start()
+
+    def tearDown(self):
+        self.home.stop()
+        self.temp_dir.cleanup()
+
+    def test_round_trip(self):
+        view = SqlObject('`project.ext.vw_orders`', definition = 'select * from core.orders')
+        function = SqlObject('`project.core.fn_clean`', definition = 'trim(x)')
+
+        manifest = DeploymentManifest('project')
+        self.assertFalse(manifest.is_unchanged(view))
+        manifest.record(view)
+        manifest.record(function)
+        manifest.forget(function)
+        manifest.save()
+
+        loaded = DeploymentManifest('project')
+        self.assertTrue(loaded.is_unchanged(view))
+        self.assertFalse(loaded.is_unchanged(function))
+        # Formatting changes don't count, anything else does
+        self.assertTrue(loaded.is_unchanged(SqlObject('`project.ext.vw_orders`', definition = 'select *\n  from core.orders;')))
+        self.assertFalse(loaded.is_unchanged(SqlObject('`project.ext.vw_orders`', definition = 'select id from core.orders')))
+        # Manifests are per project
+        self.assertFalse(DeploymentManifest('other_project').is_unchanged(view))
+        self.assertEqual(os.listdir(os.path.dirname(loaded.file_path)), ['project.json'])
+
+    def test_corrupt_manifest_starts_empty(self):
+        view = SqlObject('`project.ext.vw_orders`', definition = 'select * from core.orders')
+        manifest = DeploymentManifest('project')
+        with open(manifest.file_path, 'w') as f:
+            f.write('{"project.ext.vw_orders": "abc')
+
+        with mock.patch('domain.DeploymentManifest.print_warn') as warn:
+            loaded = DeploymentManifest('project')
+        warn.assert_called_once()
+        self.assertFalse(loaded.is_unchanged(view))
+
+        loaded.record(view)
+        loaded.save()
+        self.assertTrue(DeploymentManifest('project').is_unchanged(view))
+        self.assertEqual(os.listdir(os.path.dirname(loaded.file_path)), ['project.json'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from domain.DeploymentPlan import DeploymentPlan
+from domain.SqlObject import SqlObject
+import unittest
+
+class TestDeploymentPlan(unittest.TestCase):
+    project = 'soundcommerce-data-sandbox'
+
+    def _sql_object(self, name: str, definition: str) -> SqlObject:
+        return SqlObject(f"{self.project}.{name}", definition = definition)
+
+    def _level_names(self, plan: DeploymentPlan) -> list[list[str]]:
+        return [[f"{o.dataset}.{o.object_name}" for o in level] for level in plan.levels]
+
+    def test_levels_follow_references(self):
+        plan = DeploymentPlan([
+            self._sql_object('ext.vw_top', f"select * from `{self.project}.ext.vw_middle`"),
+            self._sql_object('ext.vw_middle', f"select * from `{self.project}.ext.vw_base` join `{self.project}.core.base_table`"),
+            self._sql_object('ext.vw_base', "select 1 as num"),
+            self._sql_object('core.base_table', '{"mode": "NULLABLE", "name": "num", "type": "INTEGER"}')
+        ])
+
+        self.assertEqual(self._level_names(plan), [
+            ['core.base_table', 'ext.vw_base'],
+            ['ext.vw_middle'],
+            ['ext.vw_top']
+        ])
+
+    def test_similar_names_are_not_dependencies(self):
+        plan = DeploymentPlan([
+            self._sql_object('ext.vw_orders', f"select * from `{self.project}.ext.vvw_orders_0`"),
+            self._sql_object('ext.vw_orders_0', "select 1 as num"),
+            self._sql_object('ext.vvw_orders_0', "select 1 as num")
+        ])
+
+        self.assertEqual(plan.dependencies['ext.vw_orders'], {'ext.vvw_orders_0'})
+        self.assertEqual(len(plan.levels), 2)
+
+    def test_circular_reference(self):
+        with self.assertRaises(Exception):
+            DeploymentPlan([
+                self._sql_object('ext.vw_a', f"select * from `{self.project}.ext.vw_b`"),
+                self._sql_object('ext.vw_b', f"select * from `{self.project}.ext.vw_a`")
+            ])
+
+    def test_unresolved_references(self):
+        plan = DeploymentPlan([
+            self._sql_object('ext.vw_a', None),
+            self._sql_object('ext.vw_b', None)
+        ], resolve_references = False)
+
+        self.assertEqual(len(plan.levels), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from domain.MetadataSnapshot import MetadataSnapshot
+from helpers.StaticMethods import get_cache_path
+from unittest import mock
+import tempfile
+import time
+import unittest
+
+class TestMetadataSnapshot(unittest.TestCase):
+    def setUp(self):
+        # get_cache_path is under the home folder, keep the real cache out of it
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.home = mock.patch.dict(os.environ, {'HOME': self.temp_dir.name})
+        self.home.start()
+
+    def tearDown(self):
+        self.home.stop()
+        self.temp_dir.cleanup()
+
+    def _build_snapshot(self, created_at = None) -> MetadataSnapshot:
+        snapshot = MetadataSnapshot('project', created_at)
+        snapshot.watermark = 1700000000000
+        snapshot.add_view('ext.vw_orders', 'select * from core.orders')
+        snapshot.add_table('core.orders')
+        snapshot.add_routine('core.fn_clean', 'SCALAR FUNCTION', 'trim(x)')
+        return snapshot
+
+    def test_get_cache_path(self):
+        cache_path = get_cache_path('metadata')
+        self.assertEqual(cache_path, f"{self.temp_dir.name}/.al_py_utils/cache/metadata")
+        self.assertTrue(os.path.isdir(cache_path))
+
+    def test_save_and_load(self):
+        self.assertIsNone(MetadataSnapshot.load('project'))
+
+        file_path = self._build_snapshot().save()
+        self.assertTrue(file_path.startswith(get_cache_path('metadata')))
+
+        loaded = MetadataSnapshot.load('project')
+        self.assertEqual(loaded.watermark, 1700000000000)
+        self.assertEqual(loaded.views, {'ext.vw_orders': 'select * from core.orders'})
+        self.assertEqual(loaded.tables, {'core.orders'})
+        self.assertEqual(loaded.routines, {'core.fn_clean': ('SCALAR FUNCTION', 'trim(x)')})
+        self.assertEqual(loaded.views_and_tables, {'ext.vw_orders', 'core.orders'})
+        self.assertIsNone(MetadataSnapshot.load('other_project'))
+
+    def test_save_replaces_older_snapshots(self):
+        self._build_snapshot(time.time() - 100).save()
+        newer = self._build_snapshot()
+        newer.remove('core.orders')
+        newer.save()
+
+        self.assertEqual(len(os.listdir(get_cache_path('metadata'))), 1)
+        self.assertEqual(MetadataSnapshot.load('project').views_and_tables, {'ext.vw_orders'})
+
+    def test_load_corrupt_file(self):
+        with open(f"{get_cache_path('metadata')}/project.{int(time.time())}.json.gz", 'w') as f:
+            f.write('not gzip')
+
+        self.assertIsNone(MetadataSnapshot.load('project'))
+
+    def test_is_expired(self):
+        snapshot = self._build_snapshot(time.time() - 60)
+        self.assertFalse(snapshot.is_expired(120))
+        self.assertTrue(snapshot.is_expired(60))
+        # A ttl of 0 always fetches
+        self.assertTrue(self._build_snapshot().is_expired(0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from domain.ProjectCatalog import ProjectCatalog
+import unittest
+
+class TestProjectCatalog(unittest.TestCase):
+    def setUp(self):
+        self.catalog = ProjectCatalog('project')
+        rows = [
+            ('ext', 'vvw_orders_1', 'VIEW', 'select * from core.orders', False),
+            ('ext', 'vw_orders', 'VIEW', 'select * from ext.vvw_orders_1', False),
+            ('core', 'orders', 'BASE TABLE', None, False),
+            ('core', 'fn_clean', 'SCALAR FUNCTION', 'trim(x)', True),
+            # INFORMATION_SCHEMA sometimes repeats rows
+            ('core', 'orders', 'BASE TABLE', None, False)
+        ]
+        for dataset, name, type_name, definition, is_routine in rows:
+            self.catalog.add(dataset, name, ProjectCatalog.get_object_type(type_name, is_routine), definition)
+
+    def test_add(self):
+        self.assertEqual(len(self.catalog), 4)
+        self.assertEqual(self.catalog.datasets, ['ext', 'core'])
+        self.assertIn('core.orders', self.catalog)
+        self.assertEqual(self.catalog.get_type('core.fn_clean'), ProjectCatalog.ObjectType.FUNCTION)
+        self.assertEqual(self.catalog.get_definition('ext.vw_orders'), 'select * from ext.vvw_orders_1')
+        self.assertIsNone(self.catalog.get_type('core.missing'))
+        self.assertEqual(ProjectCatalog.get_object_type('something new'), ProjectCatalog.ObjectType.OTHER)
+
+    def test_routine_types(self):
+        self.assertEqual(ProjectCatalog.get_object_type('AGGREGATE FUNCTION', True), ProjectCatalog.ObjectType.FUNCTION)
+        self.assertEqual(ProjectCatalog.get_object_type('PROCEDURE', True), ProjectCatalog.ObjectType.PROCEDURE)
+        # Unknown routine types are still routines, never tables
+        self.assertEqual(ProjectCatalog.get_object_type('something new', True), ProjectCatalog.ObjectType.OTHER_ROUTINE)
+        self.assertIn(ProjectCatalog.ObjectType.OTHER_ROUTINE, ProjectCatalog.ROUTINE_TYPES)
+
+    def test_routines_have_their_own_names(self):
+        self.catalog.add('core', 'orders', ProjectCatalog.ObjectType.FUNCTION, 'upper(x)')
+        self.catalog.add('core', 'fn_clean', ProjectCatalog.ObjectType.FUNCTION, 'lower(x)')
+
+        self.assertEqual(len(self.catalog), 5)
+        self.assertEqual(self.catalog.get_names([ProjectCatalog.ObjectType.FUNCTION]), ['core.fn_clean', 'core.orders'])
+        self.assertEqual(self.catalog.get_type('core.orders'), ProjectCatalog.ObjectType.TABLE)
+        self.assertEqual(self.catalog.get_definitions(ProjectCatalog.ROUTINE_TYPES), {'core.fn_clean': 'trim(x)', 'core.orders': 'upper(x)'})
+
+    def test_get_names(self):
+        self.assertEqual(self.catalog.get_names([ProjectCatalog.ObjectType.VIEW], prefix = 'vvw'), ['ext.vvw_orders_1'])
+        self.assertEqual(self.catalog.get_names(datasets = ['core', 'missing']), ['core.orders', 'core.fn_clean'])
+        self.assertEqual(
+            self.catalog.get_definitions([ProjectCatalog.ObjectType.VIEW, ProjectCatalog.ObjectType.TABLE]),
+            {'ext.vvw_orders_1': 'select * from core.orders', 'ext.vw_orders': 'select * from ext.vvw_orders_1'}
+        )
+
+if __name__ == '__main__':
+    unittest.main()
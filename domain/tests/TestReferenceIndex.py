@@ -0,0 +1,59 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from domain.ReferenceIndex import ReferenceIndex
+import tempfile
+import unittest
+
+class TestReferenceIndex(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.bq_path = f"{self._temp_dir.name}/bq"
+        self.cache_file = f"{self._temp_dir.name}/reference_index.json"
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _write(self, relative_path: str, definition: str) -> None:
+        file_path = f"{self.bq_path}/{relative_path}"
+        os.makedirs(os.path.dirname(file_path), exist_ok = True)
+        with open(file_path, 'w') as f:
+            f.write(definition)
+
+    def _index(self) -> ReferenceIndex:
+        return ReferenceIndex(self.bq_path, self.cache_file)
+
+    def test_templates_are_resolved(self):
+        self._write('ext/view/vw_a.sql', "select * from `${project}.${dataset}.vw_b` join `${project}.core.vw_c_${color}`")
+        index = self._index()
+
+        self.assertEqual(index.get_references(ReferenceIndex.GLOBAL, 'ext.vw_a'), ['ext.vw_b', 'core.vw_c_blue'])
+        self.assertEqual(index.get_referenced_by(ReferenceIndex.GLOBAL, 'ext.vw_b'), {'ext.vw_a'})
+
+    def test_client_files_override_global(self):
+        self._write('ext/view/vw_a.sql', "select * from `${project}.core.vw_global`")
+        self._write('unittest/ext/view/vw_a.sql', "select * from `${project}.core.vw_client`")
+        index = self._index()
+
+        self.assertEqual(index.clients, {'unittest'})
+        self.assertEqual(index.get_references('unittest', 'ext.vw_a'), ['core.vw_client'])
+        self.assertEqual(index.get_referenced_by('unittest', 'core.vw_global'), set())
+        self.assertEqual(index.get_references('other', 'ext.vw_a'), ['core.vw_global'])
+
+    def test_only_modified_files_are_reparsed(self):
+        self._write('ext/view/vw_a.sql', "select * from `${project}.core.vw_b`")
+        self._write('ext/view/vw_c.sql', "select 1 as num")
+        self._index()
+
+        self._write('ext/view/vw_c.sql', "select * from `${project}.core.vw_b`")
+        os.utime(f"{self.bq_path}/ext/view/vw_c.sql", (0, 0))
+        index = self._index()
+
+        self.assertEqual(index.refresh(), 0)
+        self.assertEqual(index.get_referenced_by(ReferenceIndex.GLOBAL, 'core.vw_b'), {'ext.vw_a', 'ext.vw_c'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from domain.TransferConfigCollection import TransferConfigCollection
+from google.cloud.bigquery_datatransfer_v1.types.transfer import TransferConfig, TransferState
+import unittest
+
+class TestTransferConfigCollection(unittest.TestCase):
+    def setUp(self):
+        self.list_calls = 0
+        self.pulled = 0
+
+    def _list_configs(self):
+        self.list_calls += 1
+        for i in range(5):
+            self.pulled += 1
+            yield TransferConfig(name = f"configs/{i}", display_name = f"Materialize {i % 2}", state = TransferState.SUCCEEDED)
+
+    def test_listing_is_lazy_and_only_happens_once(self):
+        collection = TransferConfigCollection(self._list_configs)
+        self.assertEqual(self.list_calls, 0)
+
+        first = next(iter(collection))
+        self.assertEqual((first.name, self.pulled), ('configs/0', 1))
+
+        self.assertEqual(len(list(collection)), 5)
+        self.assertEqual(len(collection), 5)
+        self.assertEqual((self.list_calls, self.pulled), (1, 5))
+
+    def test_lookups(self):
+        collection = TransferConfigCollection(self._list_configs)
+
+        self.assertEqual([x.name for x in collection.find_by_display_name('Materialize 1', 'Missing')], ['configs/1', 'configs/3'])
+        self.assertEqual(collection.get('configs/4').display_name, 'Materialize 0')
+        self.assertIsNone(collection.get('configs/9'))
+        self.assertEqual(len(collection.find_by_state(TransferState.SUCCEEDED)), 5)
+
+    def test_find_repeated_values(self):
+        collection = TransferConfigCollection(self._list_configs)
+
+        configs = collection.find_by_display_name('Materialize 0', 'Materialize 1', 'Materialize 0')
+        self.assertEqual([x.name for x in configs], ['configs/0', 'configs/2', 'configs/4', 'configs/1', 'configs/3'])
+
+    def test_replace_updates_indexes(self):
+        collection = TransferConfigCollection(self._list_configs)
+        collection.find_by_display_name('Materialize 0')
+
+        collection.replace(TransferConfig(name = 'configs/0', display_name = 'Renamed', state = TransferState.FAILED))
+
+        self.assertEqual([x.name for x in collection.find_by_display_name('Renamed')], ['configs/0'])
+        self.assertEqual([x.name for x in collection.find_by_state(TransferState.FAILED)], ['configs/0'])
+        self.assertEqual(len(collection), 5)
+
+if __name__ == '__main__':
+    unittest.main()
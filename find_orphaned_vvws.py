@@ -0,0 +1,42 @@
+import argparse
+import sys
+from helpers.StaticMethods import *
+from clients.BqClient import BqClient
+from modules.OrphanedVvwFinder import OrphanedVvwFinder
+
+def prepare_args(parser):
+    parser.add_argument(
+        '-c', help='(Optional) Specify one or more Client(s), if not provided all clients will be analyzed (e.g. "bbb, pacsun"')
+    parser.add_argument(
+        '-ic', help='(Optional) Specify one or more Client(s) to ignore, this only works when running for all')
+    parser.add_argument(
+        '-o', default='orphaned_vvw_report.csv', help='(Optional) Report file to write (default orphaned_vvw_report.csv)')
+    parser.add_argument(
+        '-w', '--workers', type=int, default=OrphanedVvwFinder.DEFAULT_MAX_WORKERS, help=f'(Optional) Number of clients to analyze concurrently (default {OrphanedVvwFinder.DEFAULT_MAX_WORKERS}).')
+    parser.add_argument(
+        '-r', '--resume', action='store_true', help='(Optional) Continue an interrupted (or partly failed) run, skipping the clients already completed (recorded in a .checkpoint file next to the report).')
+    parser.add_argument(
+        '-cl', '--clean_local', action='store_true', help='(Optional) Delete orphaned views from the local mono bq folder.')
+    parser.add_argument(
+        '-ttl', '--metadata_ttl', type=int, default=BqClient.DEFAULT_METADATA_TTL, help=f'(Optional) Max age in seconds of cached project metadata before it is re-fetched from BQ (default {BqClient.DEFAULT_METADATA_TTL}).')
+
+def validate_args(args):
+    if (not args.c):
+        response = input("No client specified. Run for all? (Y/n): ")
+        if not (response.strip().lower() == 'y' or response.strip().lower() == ''):
+            raise Exception("Invalid response, exiting.")
+    if args.workers < 1:
+        raise Exception("-w/--workers must be at least 1.")
+
+def main():
+    parser = argparse.ArgumentParser()
+    prepare_args(parser)
+    args = parser.parse_args()
+    validate_args(args)
+
+    clients = arg_to_list(args.c) if args.c else get_all_clients(args.ic)
+    finder = OrphanedVvwFinder(sorted(clients), args.o, args.workers, args.resume, args.clean_local, args.metadata_ttl)
+    sys.exit(0 if finder.execute() else 1)
+
+if __name__ == "__main__":
+    main()
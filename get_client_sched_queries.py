@@ -14,9 +14,8 @@ def main(argv):
     
     if (args.c):
         output = BqTransferClient(args.c).get_transfer_configs()
-        for i in output:
-            if i.display_name == "etl_sku_mappings":
-                print(i)
+        for i in output.find_by_display_name("etl_sku_mappings"):
+            print(i)
             # if(i['dataSourceId'] == 'scheduled_query'):
             #     if(not args.sq or args.sq == i['displayName']):
             #         print(f'{i["displayName"]}, {i["name"]}')
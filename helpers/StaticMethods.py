@@ -1,5 +1,8 @@
 
+import hashlib
 import json
+import os
+import re
 from pathlib import Path
 from helpers.PrintColors import *
 
@@ -24,6 +27,18 @@ def get_dev_tools_path():
     """
     return get_mono_path()+'/tools/src/dev'
 
+def get_cache_path(sub_folder = ''):
+    """
+        (Str(optional)) -> Str
+        Returns the local cache folder used to persist data between runs (optionally a sub folder of it), creating it if needed
+    """
+    cache_path = str(Path.home()) + '/.al_py_utils/cache'
+    if sub_folder:
+        cache_path += '/' + sub_folder
+
+    os.makedirs(cache_path, exist_ok = True)
+    return cache_path
+
 def get_all_clients(ignore_clients_string = ''):
     """
         (Str(optional)) -> list<str>
@@ -115,6 +130,31 @@ def object_name_to_type(name):
 def is_quoted(text):
     return text[0] == "'" and text[-1] == "'"
 
+# Matches string literals and quoted identifiers (kept as is), or runs of whitespace and comments (collapsed to one space)
+_sql_normalize_pattern = re.compile(
+    r"""('(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*"|`[^`]*`)|((?:\s|--[^\n]*|#[^\n]*|/\*.*?\*/)+)""",
+    re.S
+)
+
+def normalize_sql(sql: str) -> str:
+    """
+        (str) -> str
+        Strips comments, collapses whitespace and drops any trailing semicolon, leaving string literals untouched.
+        Used to compare definitions on substance rather than formatting.
+    """
+    def replace(match):
+        return match.group(1) if match.group(1) is not None else ' '
+
+    normalized = _sql_normalize_pattern.sub(replace, sql).strip()
+    return normalized[:-1].rstrip() if normalized[-1:] == ';' else normalized
+
+def hash_sql(sql: str) -> str:
+    """
+        (str) -> str
+        Returns a content hash of the normalized form of the provided SQL.
+    """
+    return hashlib.sha256(normalize_sql(sql).encode('utf-8')).hexdigest()
+
 def extract_client_from_path(path: Path) -> str:
     try:
         client = str(path.parts[path.parts.index('bq')+1])
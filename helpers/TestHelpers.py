@@ -1,5 +1,7 @@
 import os
 import shutil
+import tempfile
+from git import Commit, Repo
 from helpers.StaticMethods import get_bq_path
 
 class TempFile:
@@ -38,4 +40,35 @@ class TempFile:
             to_delete = '/'.join(self._path_parts[:len(self._deepest_existing.split('/'))+1])
             shutil.rmtree(to_delete)
         else:
-            os.remove(self._file_path)
\ No newline at end of file
+            os.remove(self._file_path)
+
+class TempGitRepo:
+    """Throwaway repo on master with one commit and an origin remote (a local bare repo), removed on exit"""
+    def __init__(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.path = f"{self._temp_dir.name}/repo"
+        self.repo = Repo.init(self.path, initial_branch = 'master')
+        self.repo.config_writer().set_value('user', 'name', 'unittest').set_value('user', 'email', 'unittest@example.com').release()
+        self.first_commit = self.commit('README.md', 'unittest')
+
+        origin = Repo.init(f"{self._temp_dir.name}/origin.git", bare = True)
+        self.repo.create_remote('origin', origin.working_dir)
+        self.repo.remotes.origin.push('master')
+
+    def commit(self, file_path: str, content: str) -> Commit:
+        """
+            (str, str) -> Commit
+            Writes the file (relative to the repo root) and commits it on the current branch.
+        """
+        full_path = f"{self.path}/{file_path}"
+        os.makedirs(os.path.dirname(full_path), exist_ok = True)
+        with open(full_path, 'w') as f:
+            f.write(content)
+        self.repo.index.add([file_path])
+        return self.repo.index.commit(f"update {file_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._temp_dir.cleanup()
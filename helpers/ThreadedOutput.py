@@ -0,0 +1,37 @@
+from io import StringIO
+import sys
+import threading
+
+class ThreadedOutput:
+    """
+        Replaces stdout so that each worker thread can buffer its own output and have it printed as one block later.
+        Threads which have not started a buffer (e.g. the main thread) print straight through.
+    """
+    def __enter__(self):
+        self._stdout = sys.stdout
+        self._local = threading.local()
+        sys.stdout = self
+        return self
+
+    def __exit__(self, *args):
+        sys.stdout = self._stdout
+
+    def start_buffer(self) -> None:
+        self._local.buffer = StringIO()
+
+    def end_buffer(self) -> str:
+        """
+            (None) -> str
+            Stops buffering for the current thread and returns everything it printed.
+        """
+        output = self._local.buffer.getvalue()
+        del self._local.buffer
+        return output
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self._stdout).write(text)
+
+    def flush(self) -> None:
+        if getattr(self._local, 'buffer', None) is None:
+            self._stdout.flush()
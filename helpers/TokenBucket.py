@@ -0,0 +1,33 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+        Thread safe token bucket rate limiter: allows bursts of up to capacity calls, then rate calls per second.
+        Call acquire() before each rate limited call.
+    """
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+            (None) -> None
+            Blocks until a token is available, then takes it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            # Sleep outside the lock so other threads can refill/check in the meantime
+            time.sleep(wait)
@@ -0,0 +1,33 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from helpers.StaticMethods import hash_sql, normalize_sql
+import unittest
+
+class TestStaticMethods(unittest.TestCase):
+    def test_normalize_sql(self):
+        sql = """
+            -- Orders with their items
+            select o.id, /* all of them */ i.*
+            from core.orders o   # inline comment
+                join core.items i using (id);
+        """
+        self.assertEqual(normalize_sql(sql), "select o.id, i.* from core.orders o join core.items i using (id)")
+
+    def test_normalize_sql_keeps_literals(self):
+        sql = "select '--  not a comment', \"a  #b\", `my  table`.id from `p.d.t` where x = 'it\\'s  ;'"
+        self.assertEqual(normalize_sql(sql), sql)
+        self.assertEqual(normalize_sql("select ';'  ; "), "select ';'")
+        self.assertEqual(normalize_sql(''), '')
+
+    def test_hash_sql(self):
+        self.assertEqual(hash_sql("select 1 as num"), hash_sql("select 1\n  as num -- comment\n;"))
+        self.assertNotEqual(hash_sql("select 1 as num"), hash_sql("select 2 as num"))
+        # Whitespace inside literals is part of the definition
+        self.assertNotEqual(hash_sql("select 'a b'"), hash_sql("select 'a  b'"))
+
+if __name__ == '__main__':
+    unittest.main()
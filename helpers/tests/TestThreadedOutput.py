@@ -0,0 +1,46 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from helpers.Capturing import Capturing
+from helpers.ThreadedOutput import ThreadedOutput
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import unittest
+
+class TestThreadedOutput(unittest.TestCase):
+    def test_buffers_per_thread(self):
+        # Both workers print at the same time, each must only get its own lines back
+        barrier = threading.Barrier(2)
+        def work(name: str, output: ThreadedOutput) -> str:
+            output.start_buffer()
+            for i in range(3):
+                print(f"{name} {i}")
+                if i == 0:
+                    barrier.wait()
+            return output.end_buffer()
+
+        with Capturing() as printed:
+            with ThreadedOutput() as output, ThreadPoolExecutor(max_workers = 2) as executor:
+                futures = [executor.submit(work, name, output) for name in ['a', 'b']]
+                print('main thread')
+                results = [future.result() for future in futures]
+
+        self.assertEqual(results, ['a 0\na 1\na 2\n', 'b 0\nb 1\nb 2\n'])
+        # Unbuffered threads print straight through
+        self.assertEqual(printed, ['main thread'])
+
+    def test_restores_stdout(self):
+        stdout = sys.stdout
+        with ThreadedOutput() as output:
+            self.assertIs(sys.stdout, output)
+            output.start_buffer()
+            print('buffered')
+            self.assertEqual(output.end_buffer(), 'buffered\n')
+
+        self.assertIs(sys.stdout, stdout)
+
+if __name__ == '__main__':
+    unittest.main()
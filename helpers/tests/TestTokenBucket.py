@@ -0,0 +1,81 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from helpers.TokenBucket import TokenBucket
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import time
+import unittest
+
+class FakeClock:
+    """Stands in for time.monotonic and time.sleep, sleeping moves the clock forward instantly"""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = list()
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.patches = [
+            mock.patch('helpers.TokenBucket.time.monotonic', self.clock.monotonic),
+            mock.patch('helpers.TokenBucket.time.sleep', self.clock.sleep)
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate = 2, capacity = 3)
+        for _ in range(3):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+        # Once the burst is used up, each call waits for the next token
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [0.5, 0.5])
+        self.assertEqual(self.clock.now, 1.0)
+
+    def test_refill_is_capped(self):
+        bucket = TokenBucket(rate = 2, capacity = 2)
+        bucket.acquire()
+        bucket.acquire()
+
+        # Idle for long enough to refill far more than the capacity
+        self.clock.now += 60
+        for _ in range(3):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [0.5])
+
+    def test_partial_refill(self):
+        bucket = TokenBucket(rate = 4)
+        bucket.acquire()
+        self.clock.now += 0.1
+        bucket.acquire()
+        self.assertAlmostEqual(sum(self.clock.sleeps), 0.15)
+
+class TestTokenBucketThreads(unittest.TestCase):
+    def test_blocks_across_threads(self):
+        # Real clock, 1 token up front then one every 20ms
+        bucket = TokenBucket(rate = 50)
+        started_at = time.monotonic()
+        with ThreadPoolExecutor(max_workers = 4) as executor:
+            list(executor.map(lambda _: bucket.acquire(), range(6)))
+
+        self.assertGreaterEqual(time.monotonic() - started_at, 5 / 50 * 0.9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import argparse
+from helpers.StaticMethods import *
+from modules.ReferenceMigrator import ReferenceMigrator
+
+def prepare_args(parser):
+    parser.add_argument(
+        '-m', help='(Optional) Specify one or more old:new object names (e.g. "ext.vw_orders:core.vw_orders, ext.vw_items:core.vw_items")')
+    parser.add_argument(
+        '-mf', help='(Optional) Specify a csv file of moved objects, one "old_name", "new_name" per line (a header row is allowed)')
+    parser.add_argument(
+        '-go', action='store_true', help='(Optional) Write the updated files, otherwise a diff of every change is printed')
+    parser.add_argument(
+        '-w', '--workers', type=int, help='(Optional) Number of worker processes (default one per cpu).')
+    parser.add_argument(
+        '-p', '--path', help='(Optional) Folder to migrate, defaults to the mono repo\'s bq folder')
+
+def validate_args(args):
+    if (not (args.m or args.mf)):
+        raise Exception("One of -m or -mf is required.")
+    if args.workers is not None and args.workers < 1:
+        raise Exception("-w/--workers must be at least 1.")
+
+def read_mapping(args) -> dict[str, str]:
+    lines = arg_to_list(args.m) if args.m else list()
+    if args.mf:
+        with open(args.mf, 'r') as f:
+            lines += [line.replace('"', '').replace(',', ':', 1) for line in f if line.strip()]
+
+    mapping = dict()
+    for line in lines:
+        old_name, new_name = [part.strip() for part in line.split(':')]
+        if old_name == 'old_name':
+            continue
+        if old_name in mapping and mapping[old_name] != new_name:
+            raise Exception(f"{old_name} is mapped to both {mapping[old_name]} and {new_name}.")
+        mapping[old_name] = new_name
+
+    return mapping
+
+def main():
+    parser = argparse.ArgumentParser()
+    prepare_args(parser)
+    args = parser.parse_args()
+    validate_args(args)
+
+    ReferenceMigrator(read_mapping(args), args.path, args.workers).execute(is_dry_run = not args.go)
+
+if __name__ == "__main__":
+    main()
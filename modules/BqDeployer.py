@@ -8,6 +8,9 @@ from clients.GitClient import *
 from helpers.PrintColors import *
 from clients.BqDeploymentClient import *
 from helpers.StaticMethods import *
+from helpers.ThreadedOutput import ThreadedOutput
+from domain.DefinitionSources.GitTreeDefinitionSource import GitTreeDefinitionSource
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 
 class BqDeployer(DevToolsModule):
@@ -17,21 +20,44 @@ class BqDeployer(DevToolsModule):
         FILE = 3
         DEVELOPMENT = 4
 
-    def __init__(self, mode: Mode, fetch_files_from: str, client_list = '', project_id = None):
+    def __init__(self, mode: Mode, fetch_files_from: str, client_list = '', project_id = None, 
+        metadata_ttl = BqClient.DEFAULT_METADATA_TTL, metadata_refresh = BqClient.RefreshMode.FULL, max_workers = 1,
+        max_in_flight = BqDeploymentClient.DEFAULT_MAX_IN_FLIGHT, skip_unchanged = False,
+        fetch_policy = GitClient.FetchPolicy.ONCE, max_fetch_age = GitClient.DEFAULT_MAX_FETCH_AGE, no_checkout = False):
         self._mode = mode
-        self._git = GitClient(get_mono_path())
+        # Skip objects whose rendered definition matches the last successful deploy, without checking BQ
+        self._skip_unchanged = skip_unchanged
+        # Number of objects to deploy concurrently within each client
+        self._max_in_flight = max_in_flight
+        # Number of clients to deploy concurrently
+        self._max_workers = max_workers
+        self._metadata_ttl = metadata_ttl
+        self._metadata_refresh = metadata_refresh
+        # Switching to master and back again only needs one fetch with the default policy
+        self._git = GitClient(get_mono_path(), fetch_policy, max_fetch_age)
         # If Project id is specified, this deployer will only run against one project
         self._project_format = project_id if project_id else "soundcommerce-client-{client}"
         
+        # Where files are read from instead of the working tree, only set in no_checkout mode
+        self._source = None
+        self._is_switched = False
+
         # Use master in all but development mode
         if self._mode not in [self.Mode.DEVELOPMENT, self.Mode.EXAMPLE]:
-            self._git.switch_to(self._git.master)
+            if no_checkout:
+                # Read master's files straight from git, leaving the working tree (and editors watching it) alone
+                self._git.fetch(self._git.master)
+                self._source = GitTreeDefinitionSource(self._git.master.commit, get_bq_path().replace(get_mono_path() + '/', ''))
+            else:
+                self._git.switch_to(self._git.master)
+                self._is_switched = True
 
         if mode == self.Mode.EXAMPLE:
             CsvFileParser('').print_example_file()
             return
         elif mode == self.Mode.GIT:
-            merge_commit = self._git.get_commit_by_sha(fetch_files_from)
+            # Master may not be checked out (no_checkout), so look for the commit in master's history rather than HEAD's
+            merge_commit = self._git.get_commit_by_sha(fetch_files_from, self._git.master.commit)
             self._parser = CommitFileParser(merge_commit)
         elif mode == self.Mode.FILE:
             self._parser = CsvFileParser(fetch_files_from)   
@@ -91,35 +117,110 @@ class BqDeployer(DevToolsModule):
 
         print(f"Total files to be deployed: {file_count}")
 
-    def _deploy_changes(self):
+    def _deploy_client(self, client: str, operation: dict) -> dict:
         """
-            Orchestrates deployment of all identified BQ modifications in the commit.
+            (str, dict(Operation, list<str>)) -> dict(DiffStatus, int)
+            Deploys and validates all changes for a single client, returns counts of deployed objects by DiffStatus.
         """
-        for client, operation in self._parser.files_by_client.items():
-            if len(self._clients) > 0 and client not in self._clients:
-                continue
+        print(f"Deploying {client}...")
+        bq_instance = BqDeploymentClient(client, self._project_format.replace("{client}", client), self._metadata_ttl, self._metadata_refresh,
+            self._source)
+
+        modified = operation[BqClient.Operation.MODIFIED]
+        if self._skip_unchanged:
+            modified = bq_instance.filter_unchanged(modified)
 
-            print(f"Deploying {client}...")
-            bq_instance = BqDeploymentClient(client, self._project_format.replace("{client}", client))
+        bq_instance.deploy_files(modified, BqClient.Operation.MODIFIED, max_in_flight = self._max_in_flight)
+        bq_instance.deploy_files(operation[BqClient.Operation.DELETED], BqClient.Operation.DELETED, max_in_flight = self._max_in_flight)
 
-            bq_instance.deploy_files(operation[BqClient.Operation.MODIFIED], BqClient.Operation.MODIFIED)
-            bq_instance.deploy_files(operation[BqClient.Operation.DELETED], BqClient.Operation.DELETED)
+        bq_instance.validate_deployment(operation[BqClient.Operation.DELETED], modified)
+        return bq_instance.deployment_counts
 
-            bq_instance.validate_deployment(operation[BqClient.Operation.DELETED], operation[BqClient.Operation.MODIFIED])
+    def _deploy_client_isolated(self, client: str, operation: dict, output: ThreadedOutput = None):
+        """
+            (str, dict(Operation, list<str>), optional ThreadedOutput) -> (bool, str, dict(DiffStatus, int), str)
+            Wraps _deploy_client so that one client's failure never stops the others.
+            If output is provided, everything printed for this client is buffered and returned rather than printed.
+            Returns (success, error message, deployment counts, buffered output).
+        """
+        if output:
+            output.start_buffer()
+
+        success, error, counts = True, None, dict()
+        try:
+            counts = self._deploy_client(client, operation)
+        except Exception as e:
+            success, error = False, f"{type(e).__name__}: {e}"
+            print_fail(f"Deployment of {client} failed: {error}")
+        finally:
+            buffered = output.end_buffer() if output else ''
+
+        return success, error, counts, buffered
+
+    def _report_summary(self, results: dict[str, tuple]) -> bool:
+        """
+            (dict(str, (bool, str, dict(DiffStatus, int)))) -> bool
+            Prints an aggregated summary of the deployment across clients, returns True if every client succeeded.
+        """
+        failures = {client: error for client, (success, error, _) in results.items() if not success}
+        print(f"Deployment summary: {len(results) - len(failures)} of {len(results)} client(s) succeeded.")
+
+        totals = {status: 0 for status in [None] + list(BqClient.DiffStatus)}
+        for _, _, counts in results.values():
+            for status, count in counts.items():
+                totals[status] += count
+        print_info(
+            f"{totals[BqClient.DiffStatus.NEW]} object(s) created, {totals[BqClient.DiffStatus.CHANGED]} updated, " + \
+            f"{totals[BqClient.DiffStatus.UNCHANGED]} skipped as unchanged, {totals[None]} other (tables/deletions).", 1
+        )
+
+        for client, error in failures.items():
+            print_fail(f"{client}: {error}", 1)
+
+        return len(failures) == 0
+
+    def _deploy_changes(self) -> bool:
+        """
+            Orchestrates deployment of all identified BQ modifications in the commit.
+            Clients are deployed concurrently (up to max_workers at a time), each client's output is printed as one block 
+                in client order as soon as it and the clients before it have finished.
+        """
+        to_deploy = [
+            (client, operation) for client, operation in self._parser.files_by_client.items()
+            if len(self._clients) == 0 or client in self._clients
+        ]
+        results = dict()
+
+        if self._max_workers <= 1:
+            for client, operation in to_deploy:
+                success, error, counts, _ = self._deploy_client_isolated(client, operation)
+                results[client] = (success, error, counts)
+        else:
+            with ThreadedOutput() as output, ThreadPoolExecutor(max_workers = self._max_workers) as executor:
+                futures = [
+                    (client, executor.submit(self._deploy_client_isolated, client, operation, output))
+                    for client, operation in to_deploy
+                ]
+                for client, future in futures:
+                    success, error, counts, buffered = future.result()
+                    print(buffered, end='')
+                    results[client] = (success, error, counts)
+
+        return self._report_summary(results)
 
     def execute(self, is_dry_run = True) -> bool:
         if self._mode == self.Mode.EXAMPLE:
-            return
+            return True
             
         self._report_files()
         if not is_dry_run:
-            self._deploy_changes()
+            is_success = self._deploy_changes()
         else:
             print_info(f"BqDeployer.deploy received is_dry_run, no changes will be made, exiting...")
             return True
 
         # Restore original state
-        if self._mode != self.Mode.DEVELOPMENT:
+        if self._is_switched:
             self._git.switch_to(self._git.original_head)
 
-        return True
+        return is_success
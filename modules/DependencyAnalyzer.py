@@ -0,0 +1,99 @@
+import threading
+import time
+from google.cloud import bigquery_datatransfer
+from modules.abstracts.DevToolsModule import DevToolsModule
+from clients.BqClient import BqClient
+from clients.BqTransferClient import BqTransferClient
+from parsers.MultiPatternMatcher import MultiPatternMatcher
+from helpers.StaticMethods import *
+
+class DependencyAnalyzer(DevToolsModule):
+    """
+        Finds the views, routines and scheduled queries which reference a set of objects (by default every versioned view)
+            in each client, and writes them to a csv report.
+        Each definition is scanned once for all of the objects, using a matcher compiled once per client.
+    """
+    def __init__(self, clients: list[str], objects: list[str] = None, report_file = 'dep_report.csv',
+        metadata_ttl = BqClient.DEFAULT_METADATA_TTL):
+        super().__init__()
+        self._clients = clients
+        # "dataset.object_name", None means every versioned view in each client
+        self._objects = objects
+        self._report_file = report_file
+        self._metadata_ttl = metadata_ttl
+        # Shared by every client analyzed (including from several threads), created on first use
+        self._transfer_instance = None
+        self._transfer_instance_lock = threading.Lock()
+
+    def _get_transfer_instance(self) -> bigquery_datatransfer.DataTransferServiceClient:
+        with self._transfer_instance_lock:
+            if self._transfer_instance is None:
+                self._transfer_instance = bigquery_datatransfer.DataTransferServiceClient()
+            return self._transfer_instance
+
+    def _print_timing(self, message: str, started_at: float) -> None:
+        print_info(f"{message} (client elapsed: {time.time() - started_at:.2f}s)", 1)
+
+    def _add_dependents(self, dependencies: dict[str, list[str]], matcher: MultiPatternMatcher, dependent: str, definition: str) -> None:
+        for dependency in matcher.find_all(definition):
+            if dependency != dependent:
+                dependencies.setdefault(dependency, list()).append(dependent)
+
+    def analyze_client(self, client: str) -> dict[str, list[str]]:
+        """
+            (str) -> dict(str, list<str>)
+            Returns the dependents of each object in the client which has any. Views and routines are "dataset.object_name",
+                scheduled queries are their display name.
+        """
+        return self.find_dependents(client)[1]
+
+    def find_dependents(self, client: str) -> tuple:
+        """
+            (str) -> (list<str>, dict(str, list<str>))
+            Same as analyze_client, but also returns the objects which were searched for (e.g. every versioned view),
+                so that those without dependents can be found.
+        """
+        started_at = time.time()
+        bq_client = BqClient(client, metadata_ttl = self._metadata_ttl)
+        metadata = bq_client.metadata
+        self._print_timing(f"metadata loaded", started_at)
+
+        objects = self._objects
+        if objects is None:
+            objects = [name for name in metadata.views if name.split('.')[1][0:3] == 'vvw']
+        matcher = MultiPatternMatcher(objects, whole_words = True)
+        self._print_timing(f"matcher compiled for {len(objects)} objects", started_at)
+
+        dependencies = dict()
+        for name, definition in metadata.views.items():
+            self._add_dependents(dependencies, matcher, name, definition or '')
+        for name, (_, definition) in metadata.routines.items():
+            self._add_dependents(dependencies, matcher, name, definition or '')
+        self._print_timing(f"{len(metadata.views)} views and {len(metadata.routines)} routines scanned", started_at)
+
+        transfer_configs = BqTransferClient(client, instance = self._get_transfer_instance()).get_transfer_configs()
+        for transfer in transfer_configs.find_by_data_source('scheduled_query'):
+            if 'query' in transfer.params:
+                self._add_dependents(dependencies, matcher, transfer.display_name, transfer.params['query'])
+        self._print_timing(f"scheduled queries scanned", started_at)
+
+        return objects, dependencies
+
+    def execute(self) -> bool:
+        with open(self._report_file, 'w') as f:
+            f.write("client_name, dependent_name, dependency_name\n")
+
+        started_at = time.time()
+        for client in self._clients:
+            client_started_at = time.time()
+            print_info(f"Analyzing {client}...")
+            dependencies = self.analyze_client(client)
+
+            with open(self._report_file, 'a') as f:
+                for dependency, dependents in sorted(dependencies.items()):
+                    for dependent in dependents:
+                        f.write(f"\"{client}\", \"{dependent}\", \"{dependency}\"\n")
+            print_info(f"Completed {client} in {time.time() - client_started_at:.2f}s, {len(dependencies)} objects have dependents")
+
+        print_success(f"Analyzed {len(self._clients)} clients in {time.time() - started_at:.2f}s, report written to {self._report_file}")
+        return True
@@ -0,0 +1,155 @@
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from modules.abstracts.DevToolsModule import DevToolsModule
+from modules.DependencyAnalyzer import DependencyAnalyzer
+from clients.BqClient import BqClient
+from helpers.StaticMethods import *
+from helpers.ThreadedOutput import ThreadedOutput
+
+class OrphanedVvwFinder(DevToolsModule):
+    """
+        Finds the versioned views in each client which nothing (views, routines or scheduled queries) depends on.
+        Clients are analyzed concurrently, and each client's orphans are appended to the report as soon as it finishes.
+        Finished clients are recorded in a checkpoint file next to the report, so an interrupted run can be resumed
+            without analyzing them again.
+    """
+    REPORT_HEADER = "client_name, versioned_view_name\n"
+
+    # Number of clients analyzed at once
+    DEFAULT_MAX_WORKERS = 4
+
+    def __init__(self, clients: list[str], report_file = 'orphaned_vvw_report.csv', max_workers = DEFAULT_MAX_WORKERS,
+        resume = False, clean_local = False, metadata_ttl = BqClient.DEFAULT_METADATA_TTL):
+        super().__init__()
+        self._clients = clients
+        self._report_file = report_file
+        self._checkpoint_file = report_file + '.checkpoint'
+        self._max_workers = max_workers
+        self._resume = resume
+        # Delete each orphan's file from the client's local mono bq folder
+        self._clean_local = clean_local
+        self._analyzer = DependencyAnalyzer(clients, metadata_ttl = metadata_ttl)
+
+    @staticmethod
+    def get_orphans(objects: list[str], dependencies: dict[str, list[str]]) -> list[str]:
+        """
+            (list<str>, dict(str, list<str>)) -> list<str>
+            Returns the objects without any dependents, sorted.
+        """
+        return sorted([name for name in objects if name not in dependencies])
+
+    def get_completed_clients(self) -> set[str]:
+        """
+            (None) -> set<str>
+            Returns the clients recorded in the checkpoint file by a previous run.
+        """
+        if not os.path.exists(self._checkpoint_file):
+            return set()
+
+        with open(self._checkpoint_file, 'r') as f:
+            return set([line.strip() for line in f if line.strip()])
+
+    def _prepare_files(self) -> set[str]:
+        """
+            (None) -> set<str>
+            Starts a new report and checkpoint, or when resuming keeps both and returns the clients already completed.
+        """
+        if self._resume and os.path.exists(self._report_file):
+            completed = self.get_completed_clients()
+            self._drop_incomplete_rows(completed)
+            return completed
+
+        with open(self._report_file, 'w') as f:
+            f.write(self.REPORT_HEADER)
+        with open(self._checkpoint_file, 'w'):
+            pass
+
+        return set()
+
+    def _drop_incomplete_rows(self, completed: set[str]) -> None:
+        """
+            (set<str>) -> None
+            Removes report rows of clients missing from the checkpoint (e.g. a run stopped between writing a client's rows
+                and its checkpoint, or the checkpoint was deleted), they're analyzed again and would otherwise be repeated.
+        """
+        with open(self._report_file, 'r', newline = '') as f:
+            lines = f.readlines()
+
+        rows = [line for line in lines[1:] if line.strip()]
+        kept = [line for line in rows if next(csv.reader([line], skipinitialspace = True))[0] in completed]
+        if len(kept) == len(rows):
+            return
+
+        print_warn(f"Removing {len(rows) - len(kept)} rows of clients without a checkpoint from {self._report_file}, they'll be analyzed again")
+        # Write then rename so that an interrupted resume never loses completed clients' rows
+        with open(self._report_file + '.tmp', 'w', newline = '') as f:
+            f.write(self.REPORT_HEADER)
+            f.writelines(kept)
+        os.replace(self._report_file + '.tmp', self._report_file)
+
+    def _record_client(self, client: str, orphans: list[str]) -> None:
+        # Rows are flushed before the checkpoint, so a completed client's orphans are never missing from the report
+        with open(self._report_file, 'a') as f:
+            for orphan in orphans:
+                f.write(f"\"{client}\", \"{orphan}\"\n")
+        with open(self._checkpoint_file, 'a') as f:
+            f.write(f"{client}\n")
+
+    def _clean_local_files(self, client: str, orphans: list[str]) -> None:
+        for orphan in orphans:
+            dataset, name = orphan.split('.')
+            to_clean = f"{get_bq_path()}/{client}/{dataset}/view/{name}.sql"
+            if os.path.exists(to_clean):
+                os.remove(to_clean)
+
+    def _find_orphans_isolated(self, client: str, output: ThreadedOutput) -> tuple:
+        """
+            (str, ThreadedOutput) -> (list<str>, str, str)
+            Returns the client's orphans, any error and everything printed while analyzing it, so that one failing client
+                doesn't stop the rest.
+        """
+        output.start_buffer()
+        orphans, error = list(), None
+        try:
+            started_at = time.time()
+            print_info(f"Analyzing {client}...")
+            objects, dependencies = self._analyzer.find_dependents(client)
+            orphans = self.get_orphans(objects, dependencies)
+            print_info(f"Completed {client} in {time.time() - started_at:.2f}s, {len(orphans)} of {len(objects)} versioned views are orphaned")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print_fail(f"Analysis of {client} failed: {error}")
+        finally:
+            buffered = output.end_buffer()
+
+        return orphans, error, buffered
+
+    def execute(self) -> bool:
+        completed = self._prepare_files()
+        to_analyze = [client for client in self._clients if client not in completed]
+        if len(completed) > 0:
+            print_info(f"Resuming, {len(self._clients) - len(to_analyze)} clients already completed in {self._report_file}")
+
+        started_at = time.time()
+        failed = list()
+        with ThreadedOutput() as output, ThreadPoolExecutor(max_workers = self._max_workers) as executor:
+            futures = {executor.submit(self._find_orphans_isolated, client, output): client for client in to_analyze}
+            for future in as_completed(futures):
+                client = futures[future]
+                orphans, error, buffered = future.result()
+                print(buffered, end='')
+                if error:
+                    failed.append(client)
+                    continue
+
+                self._record_client(client, orphans)
+                if self._clean_local:
+                    self._clean_local_files(client, orphans)
+
+        print_info(f"Analyzed {len(to_analyze) - len(failed)} of {len(to_analyze)} clients in {time.time() - started_at:.2f}s, report written to {self._report_file}")
+        if len(failed) > 0:
+            print_fail(f"Failed clients (rerun with --resume to retry only these): {', '.join(sorted(failed))}")
+
+        return len(failed) == 0
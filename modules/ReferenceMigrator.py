@@ -0,0 +1,101 @@
+import difflib
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from modules.abstracts.DevToolsModule import DevToolsModule
+from parsers.ReferenceRewriter import ReferenceRewriter
+from helpers.StaticMethods import *
+
+class ReferenceMigrator(DevToolsModule):
+    """
+        Rewrites references across every .sql file in the mono repo's bq folder for a set of moved or renamed objects
+            (e.g. views moved from ext to core).
+        Files are rewritten in a pool of processes, each compiling the mapping into one matcher, and only files which
+            actually change are written (atomically). Dry runs print a diff of each change instead.
+    """
+    # Files handed to a worker process at a time
+    DEFAULT_CHUNK_SIZE = 64
+
+    # Set in each worker process by _init_worker
+    _rewriter: ReferenceRewriter = None
+
+    def __init__(self, mapping: dict[str, str], bq_path: str = None, max_workers: int = None, chunk_size = DEFAULT_CHUNK_SIZE):
+        super().__init__()
+        # Validated here so that a bad mapping fails before any workers start
+        ReferenceRewriter(mapping)
+        self._mapping = mapping
+        self._bq_path = get_bq_path() if bq_path is None else bq_path
+        # None is one process per cpu
+        self._max_workers = max_workers
+        self._chunk_size = chunk_size
+
+    @staticmethod
+    def _init_worker(mapping: dict[str, str]) -> None:
+        ReferenceMigrator._rewriter = ReferenceRewriter(mapping)
+
+    @staticmethod
+    def _migrate_file(task: tuple) -> tuple:
+        """
+            ((str, str, str, bool)) -> (str, bool, str)
+            Rewrites one file, returning its relative path, whether it changed and (for dry runs) the diff.
+        """
+        file_path, relative_path, dataset, is_dry_run = task
+        # newline='' keeps line endings as they are (e.g. CRLF), only references should change
+        with open(file_path, 'r', newline = '') as f:
+            content = f.read()
+
+        rewritten = ReferenceMigrator._rewriter.rewrite(content, dataset)
+        if rewritten == content:
+            return relative_path, False, ''
+
+        if is_dry_run:
+            # A last line without a newline would otherwise run into the next line of the diff
+            before, after = [(x if x.endswith('\n') else x + '\n').splitlines(keepends = True) for x in (content, rewritten)]
+            diff = difflib.unified_diff(before, after, f"a/{relative_path}", f"b/{relative_path}")
+            return relative_path, True, ''.join(diff)
+
+        # Write then rename so that an interrupted run never leaves a partial file, keeping the original's permissions
+        with open(file_path + '.tmp', 'w', newline = '') as f:
+            f.write(rewritten)
+        shutil.copymode(file_path, file_path + '.tmp')
+        os.replace(file_path + '.tmp', file_path)
+        return relative_path, True, ''
+
+    def _get_tasks(self, is_dry_run: bool) -> list[tuple]:
+        tasks = list()
+        for root, _, file_names in os.walk(self._bq_path):
+            for file_name in file_names:
+                if not file_name.endswith('.sql'):
+                    continue
+
+                file_path = f"{root}/{file_name}"
+                relative_path = os.path.relpath(file_path, self._bq_path)
+                parts = relative_path.split(os.sep)
+                # Layout is [client/]dataset/object_type/file
+                dataset = parts[-3] if len(parts) >= 3 else None
+                tasks.append((file_path, relative_path, dataset, is_dry_run))
+
+        return tasks
+
+    def execute(self, is_dry_run = True) -> bool:
+        started_at = time.time()
+        tasks = self._get_tasks(is_dry_run)
+        print_info(f"Migrating references to {len(self._mapping)} objects in {len(tasks)} files under {self._bq_path}...")
+
+        changed = list()
+        with ProcessPoolExecutor(max_workers = self._max_workers, initializer = self._init_worker, initargs = (self._mapping,)) as executor:
+            for relative_path, is_changed, diff in executor.map(self._migrate_file, tasks, chunksize = self._chunk_size):
+                if not is_changed:
+                    continue
+                changed.append(relative_path)
+                if is_dry_run:
+                    print(diff, end = '' if diff.endswith('\n') else '\n')
+
+        elapsed = time.time() - started_at
+        if is_dry_run:
+            print_info(f"Dry run, {len(changed)} of {len(tasks)} files would be updated ({elapsed:.2f}s), use -go to write them.")
+        else:
+            print_success(f"Updated {len(changed)} of {len(tasks)} files in {elapsed:.2f}s.")
+
+        return True
@@ -0,0 +1,112 @@
+import asyncio
+import random
+from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+from google.cloud import bigquery_datatransfer
+from google.cloud.bigquery_datatransfer_v1.types.transfer import TransferConfig
+from google.protobuf import field_mask_pb2
+
+from modules.abstracts.DevToolsModule import DevToolsModule
+from clients.BqClient import BqClient
+from clients.BqTransferClient import BqTransferClient
+from helpers.StaticMethods import *
+
+class ServiceAccountSweeper(DevToolsModule):
+    """
+        Checks (and optionally fixes) the service account of every scheduled query across many clients at once.
+        One async transfer service client (so one transport and set of credentials) is shared by every project,
+            and each client's report is printed as soon as that client is done.
+    """
+    SERVICE_ACCOUNT_FORMAT = "bq-scheduled-query-runner@{project_id}.iam.gserviceaccount.com"
+
+    # Max number of transfer API calls in flight at once, across all clients
+    DEFAULT_MAX_CONCURRENCY = 16
+
+    def __init__(self, clients: list[str], max_concurrency = DEFAULT_MAX_CONCURRENCY,
+        updates_per_second = BqTransferClient.DEFAULT_UPDATES_PER_SECOND):
+        super().__init__()
+        self._clients = clients
+        self._max_concurrency = max_concurrency
+        # Write quota is per project, so each client is limited separately
+        self._update_interval = 1 / updates_per_second
+        self._instance = None
+        self._semaphore = None
+
+    async def _call(self, method, *args, **kwargs):
+        async with self._semaphore:
+            return await method(*args, **kwargs)
+
+    async def _list_configs(self, project_id: str) -> list[TransferConfig]:
+        async with self._semaphore:
+            pager = await self._instance.list_transfer_configs(parent = self._instance.common_project_path(project_id))
+            configs = [config async for config in pager]
+
+        # List responses don't include owner_info, only fetch the configs which are missing it
+        missing = [config.name for config in configs if 'owner_info' not in config]
+        fetched = await asyncio.gather(*[self._call(self._instance.get_transfer_config, name = name) for name in missing])
+        fetched = {config.name: config for config in fetched}
+
+        return [fetched.get(config.name, config) for config in configs]
+
+    async def _update_config(self, config: TransferConfig, service_account_name: str) -> None:
+        request = {
+            "transfer_config": config,
+            "update_mask": field_mask_pb2.FieldMask(paths = ['service_account_name']),
+            "service_account_name": service_account_name
+        }
+
+        for attempt in range(BqTransferClient.MAX_UPDATE_RETRIES + 1):
+            try:
+                await self._call(self._instance.update_transfer_config, request = request)
+                return
+            except (ResourceExhausted, TooManyRequests):
+                if attempt == BqTransferClient.MAX_UPDATE_RETRIES:
+                    raise
+                await asyncio.sleep(random.uniform(0, min(32, 2 ** attempt)))
+
+    async def _sweep_client(self, client: str, is_dry_run: bool) -> tuple:
+        """
+            (str, bool) -> (str, list<str>, Exception)
+            Returns the client, the lines of its report and any error, so that one failing client doesn't stop the rest.
+        """
+        report = list()
+        try:
+            project_id = BqClient(client, skip_instance = True).project_id
+            service_account_name = self.SERVICE_ACCOUNT_FORMAT.format(project_id = project_id)
+
+            for config in await self._list_configs(project_id):
+                is_update_valid, _ = BqTransferClient._validate_service_account_update(config, service_account_name)
+                if not is_update_valid:
+                    continue
+
+                report.append(f"Updates for {config.display_name}:\n\t\tservice_account_name: {config.owner_info.email} -> {service_account_name}")
+                if not is_dry_run:
+                    await self._update_config(config, service_account_name)
+                    await asyncio.sleep(self._update_interval)
+        except Exception as error:
+            return client, report, error
+
+        return client, report, None
+
+    async def _sweep(self, is_dry_run: bool) -> bool:
+        self._instance = bigquery_datatransfer.DataTransferServiceAsyncClient()
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        failed = list()
+        tasks = [asyncio.create_task(self._sweep_client(client, is_dry_run)) for client in self._clients]
+        try:
+            for task in asyncio.as_completed(tasks):
+                client, report, error = await task
+                print_info(f"Checked client {client}, {len(report)} scheduled queries {'to update' if is_dry_run else 'updated'}")
+                for line in report:
+                    print_info(line, 1)
+                if error:
+                    print_fail(f"{client} failed: {error}")
+                    failed.append(client)
+        finally:
+            await self._instance.transport.close()
+
+        print_info(f"{len(self._clients) - len(failed)} of {len(self._clients)} clients checked successfully")
+        return len(failed) == 0
+
+    def execute(self, is_dry_run = True) -> bool:
+        return asyncio.run(self._sweep(is_dry_run))
@@ -0,0 +1,233 @@
+import base64
+import datetime
+import json
+import time
+from typing import Callable, Iterable
+from modules.abstracts.DevToolsModule import DevToolsModule
+from clients.BqClient import BqClient
+from clients.BqTransferClient import BqTransferClient
+from domain.SqStageConfig import SqStageConfig
+from helpers.StaticMethods import *
+
+class SqStageScheduler(DevToolsModule):
+    """
+        Runs staged scheduled queries: once every scheduled query in a stage has finished, the next stage is started.
+        Driven by transfer run completion events (one execute per Pub/Sub message). Each finished run is written as it
+            arrives and the config is then read back from the table to decide whether its stage is complete, so several
+            instances (e.g. of a cloud function) can share the config table. A stage transition writes every run it starts
+            with one MERGE. Two instances finishing a stage's last runs at the same moment can both start the next stage.
+        If handling an event fails (e.g. starting the next stage's runs), its status changes are undone in memory and in the
+            table and the error is raised, so that the redelivered event is handled again rather than seen as a repeat.
+        With batch_updates, the config is loaded once and kept in memory (re-loaded after config_ttl), and finished runs
+            are buffered until their stage's transition. Buffered statuses only live in this instance, so it must be the
+            only scheduler for the table and live as long as the pipeline (e.g. local runs, not a cloud function).
+    """
+    # Stage whose completion is signalled by events which aren't scheduled queries (e.g. the upstream kubernetes job)
+    FIRST_STAGE = 1
+
+    # Seconds before the config is re-loaded, picking up scheduled queries added or moved between stages
+    DEFAULT_CONFIG_TTL = 5 * 60
+
+    def __init__(self, load_config: Callable[[], Iterable[tuple]], merge_updates: Callable[[list[tuple]], None],
+        start_runs: Callable[[list[str]], dict], config_ttl = DEFAULT_CONFIG_TTL, batch_updates = False):
+        """
+            (() -> Iterable<(str, int, str)>, (list<(str, str, datetime|str, datetime|str)>) -> None, (list<str>) -> dict(str, datetime)) -> SqStageScheduler
+            load_config returns (name, stage, status) rows, merge_updates writes (name, status, start_time, end_time) rows
+                and start_runs starts the named transfer configs, returning when each run starts.
+        """
+        super().__init__()
+        self._load_config = load_config
+        self._merge_updates = merge_updates
+        self._start_runs = start_runs
+        self._config_ttl = config_ttl
+        self._batch_updates = batch_updates
+
+        self._config: SqStageConfig = None
+        self._config_loaded_at = 0
+        # Name -> (status, start_time, end_time) not yet written
+        self._pending_updates: dict[str, tuple] = dict()
+        # Status changes made while handling the current event, [name, previous status, previous pending update, is written]
+        self._changes: list[list] = list()
+
+    @classmethod
+    def for_project(cls, project_id: str, config_table: str, config_ttl = DEFAULT_CONFIG_TTL, batch_updates = False):
+        """
+            (str, str, optional int, optional bool) -> SqStageScheduler
+            Returns a scheduler reading and writing the config table in BQ and starting runs in the project.
+        """
+        bq_client = BqClient(project_id, project_id = project_id)
+        transfer_client = BqTransferClient(project_id, project_id = project_id)
+        return cls(
+            lambda: [(row.name, row.stage, row.status) for row in bq_client.instance.query(cls.build_config_query(config_table)).result()],
+            lambda updates: bq_client.instance.query(cls.build_merge_query(config_table, updates)).result(),
+            transfer_client.start_manual_runs,
+            config_ttl,
+            batch_updates
+        )
+
+    @staticmethod
+    def build_config_query(config_table: str) -> str:
+        return f"SELECT name, stage, status FROM {config_table} where enabled"
+
+    @staticmethod
+    def _to_sql_timestamp(value) -> str:
+        if value is None:
+            return 'cast(null as timestamp)'
+        if isinstance(value, datetime.datetime):
+            value = value.isoformat()
+        return f"timestamp('{value}')"
+
+    @classmethod
+    def build_merge_query(cls, config_table: str, updates: list[tuple]) -> str:
+        """
+            (str, list<(str, str, datetime|str, datetime|str)>) -> str
+            Builds a single MERGE applying every (name, status, start_time, end_time) update, a start_time of None keeps
+                the current value, and starting a run clears its end_time.
+        """
+        rows = '\n                union all\n                '.join([
+            f"select '{name}' as name, '{status}' as status, {cls._to_sql_timestamp(start_time)} as start_time, " + \
+                f"{cls._to_sql_timestamp(end_time)} as end_time"
+            for name, status, start_time, end_time in updates
+        ])
+        return f"""
+            MERGE {config_table} t
+            USING (
+                {rows}
+            ) u
+            ON t.name = u.name
+            WHEN MATCHED THEN UPDATE SET
+                status = u.status,
+                start_time = coalesce(u.start_time, t.start_time),
+                end_time = if(u.status = '{SqStageConfig.Status.PROCESSING.value}', null, coalesce(u.end_time, t.end_time))
+        """
+
+    def _get_config(self, name: str = None, is_fresh = False) -> SqStageConfig:
+        """
+            (optional str, optional bool) -> SqStageConfig
+            Returns the in memory config, re-loading it when expired, when it doesn't contain the provided name or when
+                is_fresh (e.g. other instances may have changed it).
+        """
+        is_expired = time.time() - self._config_loaded_at >= self._config_ttl
+        if self._config is None or is_fresh or is_expired or (name is not None and name not in self._config):
+            self._config = SqStageConfig(self._load_config())
+            self._config_loaded_at = time.time()
+            # The table doesn't have these yet
+            for pending_name, (status, _, _) in self._pending_updates.items():
+                if pending_name in self._config:
+                    self._config.set_status(pending_name, status)
+
+        return self._config
+
+    def _set_status(self, name: str, status: SqStageConfig.Status, start_time = None, end_time = None) -> None:
+        self._changes.append([name, self._config.get_status(name), self._pending_updates.get(name), False])
+        self._config.set_status(name, status)
+        self._pending_updates[name] = (status, start_time, end_time)
+
+    def flush(self) -> None:
+        """Writes every buffered status change with one MERGE"""
+        if len(self._pending_updates) == 0:
+            return
+
+        updates = [(name, status.value, start_time, end_time) for name, (status, start_time, end_time) in self._pending_updates.items()]
+        self._merge_updates(updates)
+        self._pending_updates = dict()
+        for change in self._changes:
+            change[3] = True
+
+    def _rollback(self) -> None:
+        """Undoes the current event's status changes, latest first, in memory and (where already written) in the table"""
+        changes, self._changes = self._changes, list()
+        written = dict()
+        for name, previous_status, previous_update, is_written in reversed(changes):
+            if self._config is not None and name in self._config:
+                self._config.set_status(name, previous_status)
+            if previous_update is None:
+                self._pending_updates.pop(name, None)
+            else:
+                self._pending_updates[name] = previous_update
+            if is_written:
+                written[name] = previous_status
+
+        if len(written) == 0:
+            return
+
+        try:
+            # A start_time of None keeps the current one, and processing clears the end_time again
+            self._merge_updates([(name, status.value, None, None) for name, status in written.items()])
+        except Exception as e:
+            # The table is ahead of the config, so re-load it on the next event
+            self._config = None
+            print_fail(f"Could not undo the status changes of {', '.join(written)}: {e}")
+
+    def _advance(self, stage: int) -> None:
+        """Starts the stage after the provided one if it has completed, writing the transition"""
+        config = self._config
+        if not config.is_stage_complete(stage):
+            return
+
+        next_stage = config.get_next_stage(stage)
+        if config.has_failures(stage):
+            print_fail(f"Stage {stage} has failed scheduled queries, stage {next_stage} will not be started.")
+        # A repeated trigger mustn't restart the stages while later ones are still processing (pending ones never started)
+        elif next_stage is not None and not any([x > stage for x in config.get_running_stages()]):
+            names = config.get_names(next_stage)
+            print_info(f"Stage {stage} complete, starting {len(names)} scheduled queries in stage {next_stage}")
+            for name, start_time in self._start_runs(names).items():
+                self._set_status(name, SqStageConfig.Status.PROCESSING, start_time = start_time)
+
+        self.flush()
+
+    def _handle_run(self, name: str, state: str = None, end_time = None) -> bool:
+        if 'transferConfigs' not in name:
+            # Other instances may have started later stages, which the repeated trigger guard needs to see
+            self._get_config(is_fresh = not self._batch_updates)
+            self._advance(self.FIRST_STAGE)
+            return True
+
+        # Run names are {config name}/runs/{run id}
+        config_name = name.split('/runs/')[0]
+        config = self._get_config(config_name)
+        if config_name not in config:
+            print_warn(f"{config_name} is not in the scheduled query config, ignoring.")
+            return False
+
+        # Pub/Sub delivers at least once, a repeated event must not count twice
+        if config.get_status(config_name) not in [SqStageConfig.Status.PENDING, SqStageConfig.Status.PROCESSING]:
+            return True
+
+        status = SqStageConfig.Status.SUCCESS if state in [None, 'SUCCEEDED'] else SqStageConfig.Status.FAILED
+        self._set_status(config_name, status, end_time = end_time)
+        if not self._batch_updates:
+            # Other instances may have handled the rest of the stage, so its progress is read back from the table
+            self.flush()
+            self._get_config(is_fresh = True)
+
+        self._advance(config.get_stage(config_name))
+        return True
+
+    def handle_run(self, name: str, state: str = None, end_time = None) -> bool:
+        """
+            (str, optional str, optional datetime|str) -> bool
+            Handles one finished run, name is the transfer run (or config) name, or anything else to signal that the
+                first stage is complete. Returns False if the run isn't in the config.
+            If anything fails the run's status changes are undone and the error is raised, so it can be handled again.
+        """
+        try:
+            return self._handle_run(name, state, end_time)
+        except Exception:
+            self._rollback()
+            raise
+        finally:
+            self._changes = list()
+
+    def execute(self, event: dict) -> bool:
+        """
+            (dict) -> bool
+            Handles one Pub/Sub transfer run notification.
+        """
+        if 'data' not in event:
+            print_warn(f"Event has no data, ignoring.")
+            return False
+
+        run = json.loads(base64.b64decode(event['data']).decode('utf-8'))
+        return self.handle_run(run.get('name', ''), run.get('state'), run.get('updateTime'))
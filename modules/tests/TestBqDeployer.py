@@ -6,10 +6,13 @@ p = f"{str(Path.home())}/Projects/mono/infrastructure/gcloud/client/bq/tools/src
 p = f"{str(Path.home())}/util/al_py_utils"
 sys.path.insert(1, p)
 
+from clients.BqClient import BqClient
 from clients.GitClient import GitClient
 from helpers.StaticMethods import get_mono_path
 import unittest
+from unittest import mock
 from helpers.Capturing import Capturing
+from helpers.TestHelpers import TempGitRepo
 from modules.BqDeployer import BqDeployer
 from parsers.CommitFileParser import CommitFileParser
 from parsers.CsvFileParser import CsvFileParser
@@ -33,6 +36,24 @@ class TestBqDeployer(unittest.TestCase):
             self.assertIsInstance(deployer._parser, CommitFileParser)
             self.assertEqual(deployer._project_format, "soundcommerce-client-{client}")
 
+    def test_init_git_no_checkout(self):
+        bq_folder = 'infrastructure/gcloud/client/bq'
+        with TempGitRepo() as temp_repo:
+            # Merged to master after the branch being worked on was cut
+            branch = temp_repo.repo.create_head('ACC-1234-test-branch')
+            merge_commit = temp_repo.commit(f"{bq_folder}/truthbar/ext/view/vw_a.sql", 'select 1 as num')
+            branch.checkout()
+
+            with mock.patch('modules.BqDeployer.get_mono_path', return_value = temp_repo.path), \
+                mock.patch('modules.BqDeployer.get_bq_path', return_value = f"{temp_repo.path}/{bq_folder}"), \
+                mock.patch('parsers.CommitFileParser.get_all_clients', return_value = ['truthbar']):
+                deployer = BqDeployer(BqDeployer.Mode.GIT, merge_commit.hexsha, no_checkout = True)
+
+            self.assertEqual(temp_repo.repo.active_branch.name, 'ACC-1234-test-branch')
+            self.assertEqual(deployer._parser.files_by_client['truthbar'][BqClient.Operation.MODIFIED], [f"{bq_folder}/truthbar/ext/view/vw_a.sql"])
+            self.assertEqual(deployer._source.read(f"{bq_folder}/truthbar/ext/view/vw_a.sql"), 'select 1 as num')
+            GitClient._fetched.pop(temp_repo.repo.git_dir, None)
+
     def test_init_csv(self):
         file_name = 'test_file.csv'
         with open(file_name, 'w') as f:
@@ -0,0 +1,64 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from modules.OrphanedVvwFinder import OrphanedVvwFinder
+from helpers.Capturing import Capturing
+import tempfile
+import unittest
+
+class TestOrphanedVvwFinder(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.report_file = f"{self.temp_dir.name}/report.csv"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_orphans(self):
+        objects = ['ext.vvw_b_1', 'ext.vvw_a_1', 'ext.vvw_a_2']
+        dependencies = {'ext.vvw_a_2': ['ext.vw_a'], 'ext.vw_other': ['sq_name']}
+        self.assertEqual(OrphanedVvwFinder.get_orphans(objects, dependencies), ['ext.vvw_a_1', 'ext.vvw_b_1'])
+
+    def test_resume_keeps_completed_clients(self):
+        finder = OrphanedVvwFinder(['bbb', 'pacsun'], self.report_file)
+        self.assertEqual(finder._prepare_files(), set())
+        finder._record_client('bbb', ['ext.vvw_a_1'])
+
+        resumed = OrphanedVvwFinder(['bbb', 'pacsun'], self.report_file, resume = True)
+        self.assertEqual(resumed._prepare_files(), {'bbb'})
+        with open(self.report_file) as f:
+            self.assertEqual(f.read(), OrphanedVvwFinder.REPORT_HEADER + '"bbb", "ext.vvw_a_1"\n')
+
+    def test_resume_drops_rows_without_checkpoint(self):
+        finder = OrphanedVvwFinder(['bbb', 'pacsun'], self.report_file)
+        finder._prepare_files()
+        finder._record_client('bbb', ['ext.vvw_a_1'])
+        # Stopped after writing pacsun's rows, before its checkpoint
+        with open(self.report_file, 'a') as f:
+            f.write('"pacsun", "ext.vvw_b_1"\n')
+
+        with Capturing():
+            self.assertEqual(OrphanedVvwFinder(['bbb', 'pacsun'], self.report_file, resume = True)._prepare_files(), {'bbb'})
+        with open(self.report_file) as f:
+            self.assertEqual(f.read(), OrphanedVvwFinder.REPORT_HEADER + '"bbb", "ext.vvw_a_1"\n')
+
+        # Without a checkpoint nothing is completed, so no rows are kept
+        os.remove(finder._checkpoint_file)
+        with Capturing():
+            self.assertEqual(OrphanedVvwFinder(['bbb', 'pacsun'], self.report_file, resume = True)._prepare_files(), set())
+        with open(self.report_file) as f:
+            self.assertEqual(f.read(), OrphanedVvwFinder.REPORT_HEADER)
+
+    def test_new_run_clears_checkpoint(self):
+        finder = OrphanedVvwFinder(['bbb'], self.report_file)
+        finder._prepare_files()
+        finder._record_client('bbb', [])
+
+        self.assertEqual(OrphanedVvwFinder(['bbb'], self.report_file)._prepare_files(), set())
+        self.assertEqual(finder.get_completed_clients(), set())
+
+if __name__ == '__main__':
+    unittest.main()
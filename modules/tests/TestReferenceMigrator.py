@@ -0,0 +1,58 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from modules.ReferenceMigrator import ReferenceMigrator
+from helpers.Capturing import Capturing
+import tempfile
+import unittest
+
+class TestReferenceMigrator(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.bq_path = self.temp_dir.name
+        self.files = {
+            'core/view/vw_orders.sql': 'select *\r\nfrom ext.vw_a\r\n',
+            'ext/view/vw_a.sql': 'select * from ${dataset}.vw_b',
+            'ext/view/vw_unrelated.sql': 'select 1 as num'
+        }
+        for relative_path, content in self.files.items():
+            os.makedirs(os.path.dirname(f"{self.bq_path}/{relative_path}"), exist_ok = True)
+            with open(f"{self.bq_path}/{relative_path}", 'w', newline = '') as f:
+                f.write(content)
+        os.chmod(f"{self.bq_path}/core/view/vw_orders.sql", 0o640)
+
+        self.migrator = ReferenceMigrator({'ext.vw_a': 'core.vw_a', 'ext.vw_b': 'core.vw_b'}, self.bq_path, max_workers = 1)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _read(self, relative_path: str) -> str:
+        with open(f"{self.bq_path}/{relative_path}", 'r', newline = '') as f:
+            return f.read()
+
+    def test_dry_run(self):
+        with Capturing() as output:
+            self.assertTrue(self.migrator.execute(is_dry_run = True))
+
+        for relative_path, content in self.files.items():
+            self.assertEqual(self._read(relative_path), content)
+        self.assertIn('-from ext.vw_a', output)
+        self.assertIn('+from core.vw_a', output)
+        self.assertIn('+select * from core.vw_b', output)
+
+    def test_go(self):
+        with Capturing():
+            self.assertTrue(self.migrator.execute(is_dry_run = False))
+
+        # Line endings and permissions are left as they were
+        self.assertEqual(self._read('core/view/vw_orders.sql'), 'select *\r\nfrom core.vw_a\r\n')
+        self.assertEqual(os.stat(f"{self.bq_path}/core/view/vw_orders.sql").st_mode & 0o777, 0o640)
+        self.assertEqual(self._read('ext/view/vw_a.sql'), 'select * from core.vw_b')
+        self.assertEqual(self._read('ext/view/vw_unrelated.sql'), 'select 1 as num')
+        self.assertEqual(sorted(os.listdir(f"{self.bq_path}/core/view")), ['vw_orders.sql'])
+
+if __name__ == '__main__':
+    unittest.main()
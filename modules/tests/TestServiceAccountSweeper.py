@@ -0,0 +1,107 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from modules.ServiceAccountSweeper import ServiceAccountSweeper
+from helpers.Capturing import Capturing
+from google.api_core.exceptions import ResourceExhausted
+from google.cloud.bigquery_datatransfer_v1.types.transfer import TransferConfig, UserInfo
+from unittest import mock
+import unittest
+
+class FakePager:
+    def __init__(self, configs: list[TransferConfig]):
+        self._configs = configs
+
+    async def __aiter__(self):
+        for config in self._configs:
+            yield config
+
+class FakeTransport:
+    def __init__(self):
+        self.is_closed = False
+
+    async def close(self):
+        self.is_closed = True
+
+class FakeTransferClient:
+    """Stands in for DataTransferServiceAsyncClient, list responses leave out owner_info like the real API can"""
+    def __init__(self, configs_by_project: dict[str, list[TransferConfig]], throttled_updates = 0):
+        self._configs_by_project = configs_by_project
+        self._throttled_updates = throttled_updates
+        self.fetched, self.updated = list(), list()
+        self.transport = FakeTransport()
+
+    def common_project_path(self, project_id: str) -> str:
+        return f"projects/{project_id}"
+
+    async def list_transfer_configs(self, parent: str) -> FakePager:
+        project_id = parent.split('/')[-1]
+        if project_id not in self._configs_by_project:
+            raise Exception(f"{project_id} not found")
+
+        return FakePager([TransferConfig(name = config.name, display_name = config.display_name) for config in self._configs_by_project[project_id]])
+
+    async def get_transfer_config(self, name: str) -> TransferConfig:
+        self.fetched.append(name)
+        return [config for configs in self._configs_by_project.values() for config in configs if config.name == name][0]
+
+    async def update_transfer_config(self, request: dict) -> TransferConfig:
+        if self._throttled_updates > 0:
+            self._throttled_updates -= 1
+            raise ResourceExhausted('Quota exceeded')
+
+        self.updated.append((request['transfer_config'].display_name, request['service_account_name']))
+        return request['transfer_config']
+
+class TestServiceAccountSweeper(unittest.TestCase):
+    def setUp(self):
+        project_id = 'soundcommerce-client-a'
+        service_account = ServiceAccountSweeper.SERVICE_ACCOUNT_FORMAT.format(project_id = project_id)
+        owners = [('sq_user', 'person@soundcommerce.com'), ('sq_service_account', service_account), ('sq_external', 'person@example.com')]
+        self.configs_by_project = {
+            project_id: [
+                TransferConfig(name = f"projects/{project_id}/transferConfigs/{name}", display_name = name, owner_info = UserInfo(email = email))
+                for name, email in owners
+            ]
+        }
+        self.service_account = service_account
+
+    def _sweep(self, clients: list[str], is_dry_run: bool, throttled_updates = 0) -> tuple:
+        instance = FakeTransferClient(self.configs_by_project, throttled_updates)
+        with mock.patch('modules.ServiceAccountSweeper.bigquery_datatransfer.DataTransferServiceAsyncClient', return_value = instance), \
+            mock.patch('modules.ServiceAccountSweeper.random.uniform', return_value = 0), Capturing() as output:
+            is_success = ServiceAccountSweeper(clients, updates_per_second = 1000).execute(is_dry_run = is_dry_run)
+
+        return is_success, instance, output
+
+    def test_dry_run(self):
+        is_success, instance, output = self._sweep(['a'], is_dry_run = True)
+
+        self.assertTrue(is_success)
+        # Every listed config was missing owner_info
+        self.assertEqual(len(instance.fetched), 3)
+        self.assertEqual(instance.updated, [])
+        self.assertIn("Checked client a, 1 scheduled queries to update", output[0])
+        self.assertTrue(instance.transport.is_closed)
+
+    def test_go(self):
+        is_success, instance, _ = self._sweep(['a'], is_dry_run = False, throttled_updates = 2)
+
+        self.assertTrue(is_success)
+        # Throttled updates are retried
+        self.assertEqual(instance.updated, [('sq_user', self.service_account)])
+
+    def test_failing_client(self):
+        is_success, instance, output = self._sweep(['missing', 'a'], is_dry_run = False)
+
+        self.assertFalse(is_success)
+        self.assertEqual(instance.updated, [('sq_user', self.service_account)])
+        self.assertTrue(any(["missing failed" in line for line in output]))
+        self.assertIn("1 of 2 clients checked successfully", output[-1])
+        self.assertTrue(instance.transport.is_closed)
+
+if __name__ == '__main__':
+    unittest.main()
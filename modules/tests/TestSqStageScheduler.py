@@ -0,0 +1,142 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from modules.SqStageScheduler import SqStageScheduler
+from domain.SqStageConfig import SqStageConfig
+from helpers.Capturing import Capturing
+import unittest
+
+class TestSqStageScheduler(unittest.TestCase):
+    def setUp(self):
+        # The config table, shared by every scheduler in a test: name -> [stage, status]
+        self.table = {f"projects/p/transferConfigs/{name}": [stage, 'success'] for name, stage in [('a', 2), ('b', 2), ('c', 3)]}
+        self.loads, self.merges, self.started = 0, list(), list()
+        # Number of start_runs calls to fail, after the first
+        self.failing_starts = 0
+        self.scheduler = self._build_scheduler()
+
+    def _build_scheduler(self, batch_updates = False) -> SqStageScheduler:
+        return SqStageScheduler(self._load_config, self._merge_updates, self._start_runs, batch_updates = batch_updates)
+
+    def _load_config(self):
+        self.loads += 1
+        return [(name, stage, status) for name, (stage, status) in self.table.items()]
+
+    def _merge_updates(self, updates):
+        self.merges.append(updates)
+        for name, status, _, _ in updates:
+            self.table[name][1] = status
+
+    def _start_runs(self, names):
+        if len(self.started) > 0 and self.failing_starts > 0:
+            self.failing_starts -= 1
+            raise Exception('Transfer service unavailable')
+        self.started.append(names)
+        return {name: '2024-01-01T00:00:00Z' for name in names}
+
+    def _run(self, name, state = 'SUCCEEDED', scheduler = None):
+        return (scheduler or self.scheduler).handle_run(f"projects/p/transferConfigs/{name}/runs/1", state)
+
+    def test_stage_transitions(self):
+        with Capturing():
+            self.scheduler.handle_run('projects/p/upstream_job')
+            # Repeated trigger while stage 2 is running
+            self.scheduler.handle_run('projects/p/upstream_job')
+            self.assertEqual(self.started, [['projects/p/transferConfigs/a', 'projects/p/transferConfigs/b']])
+
+            self._run('a')
+            self._run('a')
+            self.assertEqual(len(self.started), 1)
+            self._run('b')
+            self.assertEqual(self.started[-1], ['projects/p/transferConfigs/c'])
+
+        # Each finished run is written as it arrives, then the runs it starts
+        self.assertEqual(
+            [[(name.split('/')[-1], status) for name, status, _, _ in merge] for merge in self.merges],
+            [[('a', 'processing'), ('b', 'processing')], [('a', 'success')], [('b', 'success')], [('c', 'processing')]]
+        )
+
+    def test_instances_share_the_table(self):
+        # e.g. a cloud function scaled out, each event may go to a different instance
+        other = self._build_scheduler()
+        with Capturing():
+            self.scheduler.handle_run('projects/p/upstream_job')
+            self._run('a', scheduler = other)
+            self._run('b')
+
+        self.assertEqual(self.started[-1], ['projects/p/transferConfigs/c'])
+        self.assertEqual(self.table['projects/p/transferConfigs/c'][1], 'processing')
+
+        # The other instance sees stage 3 running, so a repeated trigger doesn't restart stage 2
+        with Capturing():
+            other.handle_run('projects/p/upstream_job')
+        self.assertEqual(len(self.started), 2)
+
+    def test_batch_updates(self):
+        self.scheduler = self._build_scheduler(batch_updates = True)
+        with Capturing():
+            self.scheduler.handle_run('projects/p/upstream_job')
+            self._run('a')
+            self._run('b')
+
+        self.assertEqual(self.loads, 1)
+        # One write per transition, with every status change in it
+        self.assertEqual(len(self.merges), 2)
+        self.assertEqual(
+            [(name.split('/')[-1], status) for name, status, _, _ in self.merges[1]],
+            [('a', 'success'), ('b', 'success'), ('c', 'processing')]
+        )
+
+    def _assert_failed_start_is_retried(self, batch_updates: bool):
+        self.scheduler = self._build_scheduler(batch_updates)
+        self.failing_starts = 1
+        with Capturing():
+            self.scheduler.handle_run('projects/p/upstream_job')
+            self._run('a')
+            with self.assertRaises(Exception):
+                self._run('b')
+
+            self.assertEqual(self.table['projects/p/transferConfigs/b'][1], 'processing')
+            self.assertEqual(self.scheduler._get_config().get_status('projects/p/transferConfigs/b'), SqStageConfig.Status.PROCESSING)
+            # Pub/Sub redelivers the failed event, which mustn't be taken for a repeat
+            self._run('b')
+
+        self.assertEqual(self.started[-1], ['projects/p/transferConfigs/c'])
+        self.assertEqual(self.table['projects/p/transferConfigs/b'][1], 'success')
+        self.assertEqual(self.table['projects/p/transferConfigs/c'][1], 'processing')
+
+    def test_failed_start_is_retried(self):
+        self._assert_failed_start_is_retried(batch_updates = False)
+
+    def test_failed_start_is_retried_batch_updates(self):
+        self._assert_failed_start_is_retried(batch_updates = True)
+
+    def test_failure_stops_next_stage(self):
+        with Capturing():
+            self.scheduler.handle_run('projects/p/upstream_job')
+            self._run('a', 'FAILED')
+            self._run('b')
+
+        self.assertEqual(len(self.started), 1)
+        self.assertEqual([status for merge in self.merges[1:] for _, status, _, _ in merge], ['failed', 'success'])
+        self.assertEqual(self.table['projects/p/transferConfigs/c'][1], 'success')
+
+    def test_pending_stages_are_started(self):
+        # e.g. newly added scheduled queries, which have never run
+        self.table = {'projects/p/transferConfigs/a': [2, 'pending'], 'projects/p/transferConfigs/b': [3, None]}
+        with Capturing():
+            self.scheduler.handle_run('projects/p/upstream_job')
+            self._run('a')
+
+        self.assertEqual(self.started, [['projects/p/transferConfigs/a'], ['projects/p/transferConfigs/b']])
+
+    def test_merge_query(self):
+        query = SqStageScheduler.build_merge_query('ds.sq_config', [('configs/a', 'success', None, '2024-01-01T00:00:00Z')])
+        self.assertIn("select 'configs/a' as name, 'success' as status, cast(null as timestamp) as start_time, timestamp('2024-01-01T00:00:00Z') as end_time", query)
+        self.assertIn("MERGE ds.sq_config t", query)
+
+if __name__ == '__main__':
+    unittest.main()
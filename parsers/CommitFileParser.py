@@ -8,22 +8,53 @@ class CommitFileParser(FileParser):
         self._commit = commit
         super().__init__()
 
+    # Only deployable files in the bq folder are of interest, filtered by git so nothing else is diffed
+    _pathspecs = [f":(glob)infrastructure/gcloud/client/bq/**/*.{extension}" for extension in ['sql', 'json']]
+
+    def get_name_status(self) -> list[tuple]:
+        """
+            (None) -> list<(str, str, str)>
+            Returns (status letter, old path, new path) for every bq file changed by the commit, compared
+                to its first parent as commit.stats is. Old path is None unless the file was renamed or copied.
+        """
+        if self._commit.parents:
+            revisions = [self._commit.parents[0].hexsha, self._commit.hexsha]
+        else:
+            revisions = ['--root', self._commit.hexsha]
+
+        # -z keeps paths verbatim, each record is "status\0path\0" or "status\0old path\0new path\0" for renames/copies
+        output = self._commit.repo.git.diff_tree('-r', '--no-commit-id', '--name-status', '-M', '-z', *revisions, '--', *self._pathspecs)
+        fields = output.split('\0')
+        changes = list()
+        i = 0
+        while i < len(fields) and fields[i]:
+            status = fields[i][0]
+            if status in ['R', 'C']:
+                changes.append((status, fields[i + 1], fields[i + 2]))
+                i += 3
+            else:
+                changes.append((status, None, fields[i + 1]))
+                i += 2
+
+        return changes
+
     def _parse_changed_files(self):
         """
             (Commit) -> dict<string, list<string>>
-            Parses files modified by the provided merge_commit and returns all SQL files.
+            Parses files modified by the provided merge_commit and returns all SQL and schema files.
         """
         changed_files = {BqClient.Operation.MODIFIED: list(), BqClient.Operation.DELETED: list()}
 
-        for file, detail in self._commit.stats.files.items():
-            if file[-4:] != '.sql':
+        for status, old_path, path in self.get_name_status():
+            if status == 'D':
+                changed_files[BqClient.Operation.DELETED].append(path)
                 continue
 
-            if detail["lines"] == detail["deletions"] and detail["insertions"] == 0:
-                changed_files[BqClient.Operation.DELETED].append(file)
-            # We don't care whether the file was added or updated, it makes no functional difference 
-            else:
-                changed_files[BqClient.Operation.MODIFIED].append(file)
+            # Renames should clean up after themselves, copies leave the original in place
+            if status == 'R':
+                changed_files[BqClient.Operation.DELETED].append(old_path)
+            # We don't care whether the file was added or updated, it makes no functional difference
+            changed_files[BqClient.Operation.MODIFIED].append(path)
 
         return changed_files
 
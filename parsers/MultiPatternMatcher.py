@@ -0,0 +1,99 @@
+import re
+
+class MultiPatternMatcher:
+    """
+        Finds every one of a fixed set of patterns occurring in a text in a single pass.
+        The patterns are compiled once into a trie shaped regex (each character is only compared once per position,
+            however many patterns share it), so the scan itself runs in the regex engine rather than in Python.
+        With whole_words, a match only counts if it isn't part of a longer identifier (e.g. ext.vvw_a_1 in ext.vvw_a_10).
+    """
+    _word_characters = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+
+    def __init__(self, patterns: list[str], whole_words: bool = False):
+        self.whole_words = whole_words
+        self.patterns = set([pattern for pattern in patterns if len(pattern) > 0])
+
+        trie = dict()
+        for pattern in self.patterns:
+            node = trie
+            for character in pattern:
+                node = node.setdefault(character, dict())
+            node[''] = pattern
+
+        # The regex only reports the longest pattern at each position, any shorter ones there must be its prefixes
+        self._prefixes = {pattern: self._get_prefixes(trie, pattern) for pattern in self.patterns}
+        # Zero width, so that matches starting inside another match (e.g. overlapping names) are still found
+        self._pattern = re.compile(f"(?=({self._trie_to_regex(trie)}))") if self.patterns else None
+        # Consuming, for replacing, where matches must not overlap
+        self._replace_pattern = re.compile(self._trie_to_regex(trie)) if self.patterns else None
+
+    def _trie_to_regex(self, node: dict) -> str:
+        alternatives = [re.escape(character) + self._trie_to_regex(child) for character, child in sorted(node.items()) if character != '']
+        if len(alternatives) == 0:
+            return ''
+
+        group = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+        # A pattern ending here makes the rest optional, greedily so the longest pattern wins
+        return f"(?:{group})?" if '' in node else group
+
+    def _get_prefixes(self, trie: dict, pattern: str) -> list[str]:
+        prefixes = list()
+        node = trie
+        for character in pattern[:-1]:
+            node = node[character]
+            if '' in node:
+                prefixes.append(node[''])
+
+        return prefixes
+
+    def _is_boundary(self, text: str, start: int, end: int) -> bool:
+        return (start == 0 or text[start - 1] not in self._word_characters) and \
+            (end == len(text) or text[end] not in self._word_characters)
+
+    def find_all(self, text: str) -> set[str]:
+        """
+            (str) -> set[str]
+            Returns every pattern which occurs in the text.
+        """
+        found = set()
+        if self._pattern is None:
+            return found
+
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            for pattern in [match.group(1)] + self._prefixes[match.group(1)]:
+                if pattern in found:
+                    continue
+                if not self.whole_words or self._is_boundary(text, start, start + len(pattern)):
+                    found.add(pattern)
+
+        return found
+
+    def replace_all(self, text: str, replacements: dict[str, str]) -> str:
+        """
+            (str, dict(str, str)) -> str
+            Returns the text with every occurrence of a pattern replaced by its value in replacements, in one pass.
+            Where patterns overlap the leftmost wins, then the longest (so a replacement is never itself replaced).
+        """
+        if self._replace_pattern is None:
+            return text
+
+        parts = list()
+        position = 0
+        match = self._replace_pattern.search(text, position)
+        while match is not None:
+            start = match.start()
+            # Longest first, shorter patterns at the same position may still be whole words when the longest isn't
+            candidates = [match.group(0)] + self._prefixes[match.group(0)][::-1]
+            pattern = next((c for c in candidates if not self.whole_words or self._is_boundary(text, start, start + len(c))), None)
+            if pattern is None:
+                match = self._replace_pattern.search(text, start + 1)
+                continue
+
+            parts.append(text[position:start])
+            parts.append(replacements[pattern])
+            position = start + len(pattern)
+            match = self._replace_pattern.search(text, position)
+
+        parts.append(text[position:])
+        return ''.join(parts)
@@ -0,0 +1,45 @@
+from parsers.MultiPatternMatcher import MultiPatternMatcher
+
+class ReferenceRewriter:
+    """
+        Rewrites references to moved or renamed objects in raw (un-rendered) definitions.
+        Names are "dataset.object_name", as every ${project} reference is within the client's project, so
+            `${project}.ext.vw_a` is rewritten by an ext.vw_a mapping.
+        Within a file of the old object's dataset, ${dataset}.object_name references are rewritten too, keeping the
+            template when the object stays in that dataset.
+    """
+    DATASET_TEMPLATE = '${dataset}'
+
+    def __init__(self, mapping: dict[str, str]):
+        for old_name, new_name in mapping.items():
+            if len(old_name.split('.')) != 2 or len(new_name.split('.')) != 2:
+                raise Exception(f"Invalid mapping {old_name} -> {new_name}, names must be \"dataset.object_name\".")
+
+        self.mapping = mapping
+        # Dataset of the file being rewritten -> (matcher, replacements), built on first use
+        self._rewriters: dict[str, tuple] = dict()
+
+    def _get_replacements(self, dataset: str) -> dict[str, str]:
+        replacements = dict(self.mapping)
+        for old_name, new_name in self.mapping.items():
+            old_dataset, old_object = old_name.split('.')
+            if old_dataset != dataset:
+                continue
+
+            new_dataset, new_object = new_name.split('.')
+            new_reference = f"{self.DATASET_TEMPLATE}.{new_object}" if new_dataset == dataset else new_name
+            replacements[f"{self.DATASET_TEMPLATE}.{old_object}"] = new_reference
+
+        return replacements
+
+    def rewrite(self, definition: str, dataset: str = None) -> str:
+        """
+            (str, optional str) -> str
+            Returns the definition with every mapped reference rewritten, dataset is that of the file it came from.
+        """
+        if dataset not in self._rewriters:
+            replacements = self._get_replacements(dataset)
+            self._rewriters[dataset] = (MultiPatternMatcher(list(replacements.keys()), whole_words = True), replacements)
+
+        matcher, replacements = self._rewriters[dataset]
+        return matcher.replace_all(definition, replacements)
@@ -0,0 +1,61 @@
+import re
+from typing import Iterator
+
+class SqlLexer:
+    """
+        Single pass lexer for BigQuery SQL, which only distinguishes what's needed to find object references:
+            comments and string literals (skipped) and dotted paths of backtick or bare identifiers (incl. ${...} placeholders).
+        e.g. `${project}`.core.vw_x and `${project}.core.vw_x` both lex to ['${project}', 'core', 'vw_x']
+        Everything else (keywords, single identifiers, operators, whitespace) is skipped by the regex engine itself.
+    """
+    # Dashes are allowed between word characters for unquoted project names, but never start or end one
+    _identifier = r"(?:`[^`]*`|(?:\$\{\w+\}|\w)+(?:-(?:\$\{\w+\}|\w)+)*)"
+    _identifier_pattern = re.compile(_identifier)
+
+    # Order matters: comments and strings must be matched before anything that could start inside them
+    # The leading lookahead lets the engine reject characters which can't start any token without trying each branch
+    _token_pattern = re.compile(r"(?=[-#/'\"`\w$])(?:" + '|'.join([
+        r"(?P<COMMENT>--[^\n]*|#[^\n]*|/\*.*?(?:\*/|$))",
+        r"(?P<STRING>'''.*?(?:'''|$)|\"\"\".*?(?:\"\"\"|$)|'(?:\\.|[^'\\\n])*'?|\"(?:\\.|[^\"\\\n])*\"?)",
+        # A single backtick identifier can hold the whole path, bare identifiers are only of interest with a dot
+        # The lookbehind stops failed bare matches being retried from every character within the same word
+        rf"(?P<PATH>`[^`]*`(?:\s*\.\s*{_identifier})*|(?<![\w$}}-]){_identifier}(?:\s*\.\s*{_identifier})+)"
+    ]) + ")", re.DOTALL)
+
+    def __init__(self, definition: str):
+        self._definition = definition
+
+    def paths(self) -> Iterator[list[str]]:
+        """
+            (None) -> Iterator[list[str]]
+            Lazily yields every dotted identifier path outside of comments and strings, with backticks removed.
+        """
+        for match in self._token_pattern.finditer(self._definition):
+            if match.lastgroup != 'PATH':
+                continue
+
+            path = list()
+            for part in self._identifier_pattern.findall(match.group()):
+                path.extend(part[1:-1].split('.') if part[0] == '`' else [part])
+            yield path
+
+    def references(self, project: str, templates: dict[str, str] = dict()) -> Iterator[str]:
+        """
+            (str, dict(str, str)) -> Iterator[str]
+            Lazily yields the fully qualified name of every object in the project referenced by the definition.
+            The project may appear literally or as ${project}, other placeholders are substituted from templates.
+        """
+        # Nothing to lex for, e.g. tables or functions without references
+        if project not in self._definition and '${project}' not in self._definition:
+            return
+
+        for path in self.paths():
+            if len(path) < 3 or path[0] not in [project, '${project}']:
+                continue
+
+            dataset, object_name = path[1], path[2]
+            for placeholder, value in templates.items():
+                dataset = dataset.replace(placeholder, value)
+                object_name = object_name.replace(placeholder, value)
+
+            yield f"{project}.{dataset}.{object_name}"
@@ -0,0 +1,43 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from parsers.MultiPatternMatcher import MultiPatternMatcher
+import random
+import unittest
+
+class TestMultiPatternMatcher(unittest.TestCase):
+    def test_overlapping_patterns(self):
+        matcher = MultiPatternMatcher(['he', 'she', 'his', 'hers'])
+
+        self.assertEqual(matcher.find_all('ushers'), {'he', 'she', 'hers'})
+        self.assertEqual(matcher.find_all('nothing'), set())
+
+    def test_whole_words(self):
+        matcher = MultiPatternMatcher(['ext.vvw_a_1', 'ext.vvw_b'], whole_words = True)
+        definition = "select * from `project.ext.vvw_a_10` join project.ext.vvw_b using (id)"
+
+        self.assertEqual(matcher.find_all(definition), {'ext.vvw_b'})
+
+    def test_matches_naive_search(self):
+        random.seed(3879)
+        patterns = [''.join(random.choices('ab.', k = random.randint(1, 5))) for _ in range(30)]
+        matcher = MultiPatternMatcher(patterns)
+        for _ in range(50):
+            text = ''.join(random.choices('ab.c', k = 40))
+            self.assertEqual(matcher.find_all(text), {pattern for pattern in patterns if pattern in text})
+
+    def test_replace_all(self):
+        matcher = MultiPatternMatcher(['ext.vw_a', 'ext.vw_a_1', 'core.vw_a'], whole_words = True)
+        replacements = {'ext.vw_a': 'core.vw_a', 'ext.vw_a_1': 'core.vw_a_1', 'core.vw_a': 'never'}
+        definition = "select * from `project.ext.vw_a` join ext.vw_a_1 using (id) join ext.vw_a_10 using (id)"
+
+        self.assertEqual(
+            matcher.replace_all(definition, replacements),
+            "select * from `project.core.vw_a` join core.vw_a_1 using (id) join ext.vw_a_10 using (id)"
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from parsers.ReferenceRewriter import ReferenceRewriter
+import unittest
+
+class TestReferenceRewriter(unittest.TestCase):
+    def setUp(self):
+        self.rewriter = ReferenceRewriter({'ext.vw_a': 'core.vw_a', 'ext.vw_b': 'ext.vw_b_renamed'})
+
+    def test_rewrite(self):
+        definition = "select * from `${project}.ext.vw_a` join `${project}.ext.vw_a_1` using (id)"
+        self.assertEqual(self.rewriter.rewrite(definition), "select * from `${project}.core.vw_a` join `${project}.ext.vw_a_1` using (id)")
+
+    def test_dataset_template(self):
+        definition = "select * from ${dataset}.vw_a join ${dataset}.vw_b using (id)"
+
+        self.assertEqual(self.rewriter.rewrite(definition, 'ext'), "select * from core.vw_a join ${dataset}.vw_b_renamed using (id)")
+        # ${dataset} is only the old dataset within its own files
+        self.assertEqual(self.rewriter.rewrite(definition, 'core'), definition)
+
+    def test_invalid_mapping(self):
+        with self.assertRaises(Exception):
+            ReferenceRewriter({'project.ext.vw_a': 'core.vw_a'})
+
+if __name__ == '__main__':
+    unittest.main()
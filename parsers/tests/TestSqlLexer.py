@@ -0,0 +1,45 @@
+# This block allows importing as if we were running at the root level
+import os, sys
+from pathlib import Path
+p = f"{str(Path.home())}/util/al_py_utils"
+sys.path.insert(1, p)
+
+from parsers.SqlLexer import SqlLexer
+import unittest
+
+class TestSqlLexer(unittest.TestCase):
+    project = 'soundcommerce-client-unittest'
+
+    def _references(self, definition: str, templates: dict[str, str] = dict()) -> list[str]:
+        return list(SqlLexer(definition).references(self.project, templates))
+
+    def test_references_split_by_any_whitespace(self):
+        definition = f"select *\nfrom\t`{self.project}.ext.vw_a`\njoin\n`{self.project}.core.vw_b`a using (id)"
+
+        self.assertEqual(self._references(definition), [f"{self.project}.ext.vw_a", f"{self.project}.core.vw_b"])
+
+    def test_comments_and_strings_are_ignored(self):
+        definition = f"""
+            -- select * from `{self.project}.ext.vw_line`
+            /* select * from `{self.project}.ext.vw_block` */
+            select '{self.project}.ext.vw_string' as s, \"\"\"{self.project}.ext.vw_triple\"\"\" as t
+            from `{self.project}.ext.vw_real` # trailing comment
+        """
+
+        self.assertEqual(self._references(definition), [f"{self.project}.ext.vw_real"])
+
+    def test_templates_and_separate_quoting(self):
+        definition = "select * from `${project}`.`${dataset}`.vw_a_${color} join ${project}.core.vw_b"
+
+        self.assertEqual(self._references(definition, {'${dataset}': 'ext', '${color}': 'blue'}), [
+            f"{self.project}.ext.vw_a_blue",
+            f"{self.project}.core.vw_b"
+        ])
+
+    def test_other_projects_and_short_paths_are_ignored(self):
+        definition = f"select t.id, 1.5 from `other-project.ext.vw_a` t join {self.project}.ext.vw_b"
+
+        self.assertEqual(self._references(definition), [f"{self.project}.ext.vw_b"])
+
+if __name__ == '__main__':
+    unittest.main()
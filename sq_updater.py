@@ -5,10 +5,12 @@ from google.cloud import bigquery_datatransfer
 from google.protobuf.field_mask_pb2 import FieldMask
 import argparse
 import csv
+import sys
 from dataclasses import dataclass
 from helpers.StaticMethods import get_all_clients
 from helpers.StaticMethods import print_info
 from clients.BqTransferClient import BqTransferClient
+from modules.ServiceAccountSweeper import ServiceAccountSweeper
 from google.cloud.bigquery_datatransfer_v1.types.transfer import TransferConfig, UserInfo
 
 @dataclass
@@ -52,6 +54,9 @@ def prepare_args(parser):
     parser.add_argument(
         '-sa',  action='store_true',
         help='(Optional) Set any scheduled query which is not using the service account to do so.')
+    parser.add_argument(
+        '-sw', '--sweep', action='store_true',
+        help='(Optional) With -sa, check all clients concurrently over one connection, reporting each client as it finishes.')
     parser.add_argument(
         '-go',  action='store_true',
         help='(Optional) Must be specified to cause changes, otherwise dryrun.')
@@ -130,11 +135,7 @@ def main():
         elif(args.sf):
             scheduled_queries = list(parse_query_file(args.sf))
             
-        transfer_configs = list(
-            filter(
-                lambda c: c.display_name in (x.display_name for x in scheduled_queries), 
-                transfer_configs)
-        )
+        transfer_configs = transfer_configs.find_by_display_name(*[x.display_name for x in scheduled_queries])
 
         print_transfers(transfer_configs, args.n, args.v)
         update_transfers(scheduled_queries, transfer_configs, bq_client)
@@ -143,6 +144,9 @@ def main():
             clients = [args.c]
         else:
             clients = get_all_clients(args.ic)
+
+        if args.sweep:
+            return 0 if ServiceAccountSweeper(clients).execute(is_dry_run = not args.go) else 1
         
         for client in clients:
             print_info(f"Checking client {client}...")
@@ -153,4 +157,4 @@ def main():
             bq_client.update_transfers(updates, not args.go)        
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -131,13 +131,7 @@ def validate_provision_funnel(bq_client: BqDeploymentClient) -> bool:
     funnel_transfer_names = [
         'Materialize Core mv_marketing_source_medium_override',
     ]
-    funnel_transfers = \
-        list(
-            filter(
-                lambda tc: tc.display_name in funnel_transfer_names, 
-                transfer_client.get_transfer_configs()
-            )
-        )
+    funnel_transfers = transfer_client.get_transfer_configs().find_by_display_name(*funnel_transfer_names)
 
     if len(funnel_transfers) == 0:
         print_fail(f'Scheduled Query `{funnel_transfer_names[0]}` was not deployed')
@@ -180,13 +174,7 @@ def uninstall_funnel(bq_client: BqDeploymentClient) -> bool:
         'Materialize ext mv_marketing_source_medium_override',
         'Materialize Core mv_marketing_source_medium_override'
     ]
-    funnel_transfers = \
-        list(
-            filter(
-                lambda tc: tc.display_name in funnel_transfer_names, 
-                transfer_client.get_transfer_configs()
-            )
-        )
+    funnel_transfers = transfer_client.get_transfer_configs().find_by_display_name(*funnel_transfer_names)
     transfer_client.delete_transfers(funnel_transfers)
 
 # def provision_client(client):